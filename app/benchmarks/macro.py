@@ -0,0 +1,62 @@
+import numpy as np
+
+from app.experiments.profile_simulation import simulate
+
+STRATEGIES = (
+    'default', 'random', 'constant',
+    'PricingSomeMethod', 'PricingSomeMethodv2', 'PricingSomeMethodv3', 'PricingSomeMethodv4',
+)
+
+# точки кривых масштабирования, остальные параметры по умолчанию
+SCALING = {
+    'number_of_rooms': (5, 15, 45, 135),
+    'number_of_days': (90, 180, 365, 730),
+    'mu': (10, 30, 90),
+}
+SCALING_DEFAULTS = {'number_of_rooms': 15, 'number_of_days': 365, 'mu': 30}
+
+
+def macro_setup(pricing_strategy, number_of_days=365, number_of_rooms=15, mu=30, seed=0):
+    """
+    Подготовка замера полного прогона simulate(), время на операцию -- время на симулируемый день
+    :param pricing_strategy: стратегия из STRATEGIES
+    :param seed: зерно, каждое повторение симулирует одну и ту же траекторию
+    :return: функция setup для measure
+    """
+    def setup():
+        rng = np.random.default_rng(seed)
+
+        def run():
+            simulate(
+                pricing_strategy, number_of_days=number_of_days, number_of_rooms=number_of_rooms, mu=mu, rng=rng
+            )
+
+        return run, number_of_days
+
+    return setup
+
+
+def scaling_points(pricing_strategy, seed=0):
+    """
+    Точки кривых масштабирования: меняется один параметр, остальные по умолчанию
+    :param pricing_strategy: стратегия из STRATEGIES
+    :param seed: зерно
+    :return: список (параметр, значение, имя замера, setup)
+    """
+    points = []
+    for parameter, values in SCALING.items():
+        for value in values:
+            config = dict(SCALING_DEFAULTS, **{parameter: value})
+            name = f'scaling/{pricing_strategy}/{parameter}={value}'
+            points.append((parameter, value, name, macro_setup(pricing_strategy, seed=seed, **config)))
+    return points
+
+
+def scaling_exponent(values, times):
+    """
+    Показатель степени k в time ~ value^k по наклону в логарифмических осях
+    :param values: значения параметра
+    :param times: полное время прогона
+    :return: k
+    """
+    return float(np.polyfit(np.log(values), np.log(times), 1)[0])
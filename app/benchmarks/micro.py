@@ -0,0 +1,208 @@
+from copy import deepcopy
+
+import numpy as np
+
+from app.utils.acceptance_rule import AcceptanceRule
+from app.utils.event_generator import EventGenerator
+from app.utils.hotel import Hotel
+from app.utils.pricing import (
+    PricingConstant, PricingDefault, PricingRandom,
+    PricingSomeMethod, PricingSomeMethodv2, PricingSomeMethodv3, PricingSomeMethodv4
+)
+
+# число дней бронирований перед замером, чтобы отель был заполнен как в середине симуляции
+WARMUP_DAYS = 60
+NOMINAL_PRICE = 1000
+
+
+def warm_hotel(rng, warmup_days=WARMUP_DAYS, number_of_rooms=15, number_of_days=365, mu=30):
+    """
+    Отель после warmup_days дней работы по дефолтной стратегии
+    :param rng: генератор случайных чисел numpy
+    :return: отель, генератор запросов, следующий свободный uid
+    """
+    event = EventGenerator(mu=mu, rng=rng)
+    hotel = Hotel(number_of_rooms=number_of_rooms, number_of_days=number_of_days)
+    acceptance = AcceptanceRule(nominal_price=NOMINAL_PRICE, rng=rng)
+    pricing = PricingDefault(NOMINAL_PRICE)
+    uid = 1
+    for day in range(warmup_days):
+        for request in event.generate_requests():
+            request.fill(day)
+            rooms = hotel.is_vacant(request)
+            if len(rooms):
+                price = pricing.set_price(hotel, request)
+                if acceptance.decision(price):
+                    hotel.booking(request, rooms, uid, price)
+            uid += 1
+        hotel.cancel_request(day)
+    return hotel, event, uid
+
+
+def day_requests(event, day, count):
+    """
+    Запросы, пришедшие в день day
+    :param event: генератор запросов
+    :param day: день
+    :param count: число запросов
+    :return: список запросов
+    """
+    requests = []
+    while len(requests) < count:
+        requests.extend(event.generate_requests())
+    requests = requests[:count]
+    for request in requests:
+        request.fill(day)
+    return requests
+
+
+def warm_pricing(pricing, rng, days=7):
+    """
+    История продаж стратегии после окончания исследования, чтобы замерялась ветка расчета цены
+    :param pricing: стратегия, наследник AbstractPricingSomeMethod
+    :param rng: генератор случайных чисел numpy
+    :param days: число дней в очереди запросов
+    :return: стратегия
+    """
+    acceptance = AcceptanceRule(nominal_price=NOMINAL_PRICE, rng=rng)
+    # PricingSomeMethod переходит к расчету цены, когда история строго больше explore_count + len(prices)
+    for price in rng.choice(pricing.prices, pricing.explore_count + len(pricing.prices) + 1).tolist():
+        pricing.update_history({'price': price, 'acceptance': acceptance.decision(price)})
+    for _ in range(days):
+        pricing.update_queue(dict(enumerate(rng.poisson(1, 31).tolist())))
+    return pricing
+
+
+def bench_generate_requests(rng, days=365, mu=30):
+    event = EventGenerator(mu=mu, rng=rng)
+
+    def run():
+        for _ in range(days):
+            event.generate_requests()
+
+    return run, days
+
+
+def bench_is_vacant(rng, count=2000):
+    hotel, event, _ = warm_hotel(rng)
+    requests = day_requests(event, WARMUP_DAYS, count)
+
+    def run():
+        for request in requests:
+            hotel.is_vacant(request)
+
+    return run, count
+
+
+def bench_booking(rng, count=2000):
+    hotel, event, uid = warm_hotel(rng)
+    # план бронирований считается на копии, замеряется только booking
+    planned = deepcopy(hotel)
+    plan = []
+    for request in day_requests(event, WARMUP_DAYS, count):
+        rooms = planned.is_vacant(request)
+        if len(rooms):
+            planned.booking(request, rooms, uid, NOMINAL_PRICE)
+            plan.append((request, rooms, uid))
+        uid += 1
+
+    def run():
+        for request, rooms, id in plan:
+            hotel.booking(request, rooms, id, NOMINAL_PRICE)
+
+    return run, len(plan)
+
+
+def bench_cancel_request(rng):
+    hotel, _, _ = warm_hotel(rng)
+    days = range(WARMUP_DAYS, hotel.number_of_days)
+
+    def run():
+        for day in days:
+            hotel.cancel_request(day)
+
+    return run, len(days)
+
+
+def bench_get_revenue(rng):
+    hotel, _, _ = warm_hotel(rng)
+    days = range(hotel.number_of_days)
+
+    def run():
+        for day in days:
+            hotel.get_revenue(day)
+
+    return run, len(days)
+
+
+def bench_decision(rng, count=10000):
+    acceptance = AcceptanceRule(nominal_price=NOMINAL_PRICE, rng=rng)
+    prices = rng.choice(PricingSomeMethod(NOMINAL_PRICE, 1).prices, count).tolist()
+
+    def run():
+        for price in prices:
+            acceptance.decision(price)
+
+    return run, count
+
+
+def set_price_bench(make_pricing, count, per_day_count=False):
+    """
+    Замер set_price стратегии на запросах одного дня заполненного отеля
+    :param make_pricing: функция rng -> стратегия
+    :param count: число запросов
+    :param per_day_count: передавать ли число запросов за день (AbstractPricingSomeMethodv2)
+    :return: функция rng -> (замеряемая функция, число операций)
+    """
+    def bench(rng):
+        hotel, event, _ = warm_hotel(rng)
+        requests = day_requests(event, WARMUP_DAYS, count)
+        pricing = make_pricing(rng)
+
+        if per_day_count:
+            def run():
+                for k, request in enumerate(requests):
+                    pricing.set_price(hotel, request, k % 30)
+        else:
+            def run():
+                for request in requests:
+                    pricing.set_price(hotel, request)
+
+        return run, count
+
+    return bench
+
+
+MICRO_BENCHMARKS = {
+    'EventGenerator.generate_requests': bench_generate_requests,
+    'Hotel.is_vacant': bench_is_vacant,
+    'Hotel.booking': bench_booking,
+    'Hotel.cancel_request': bench_cancel_request,
+    'Hotel.get_revenue': bench_get_revenue,
+    'AcceptanceRule.decision': bench_decision,
+    'PricingDefault.set_price': set_price_bench(lambda rng: PricingDefault(NOMINAL_PRICE), 10000),
+    'PricingConstant.set_price': set_price_bench(lambda rng: PricingConstant(NOMINAL_PRICE), 10000),
+    'PricingRandom.set_price': set_price_bench(lambda rng: PricingRandom(NOMINAL_PRICE, rng=rng), 10000),
+    'PricingSomeMethod.set_price': set_price_bench(
+        lambda rng: warm_pricing(PricingSomeMethod(NOMINAL_PRICE, 2, rng=rng), rng), 300
+    ),
+    'PricingSomeMethodv2.set_price': set_price_bench(
+        lambda rng: warm_pricing(PricingSomeMethodv2(NOMINAL_PRICE, 2, rng=rng), rng), 300, per_day_count=True
+    ),
+    'PricingSomeMethodv3.set_price': set_price_bench(
+        lambda rng: warm_pricing(PricingSomeMethodv3(NOMINAL_PRICE, 2, rng=rng), rng), 300, per_day_count=True
+    ),
+    'PricingSomeMethodv4.set_price': set_price_bench(
+        lambda rng: warm_pricing(PricingSomeMethodv4(NOMINAL_PRICE, 2, rng=rng), rng), 300, per_day_count=True
+    ),
+}
+
+
+def micro_setup(name, seed=0):
+    """
+    Подготовка микро-замера: каждое повторение строит одно и то же состояние
+    :param name: имя замера из MICRO_BENCHMARKS
+    :param seed: зерно
+    :return: функция setup для measure
+    """
+    return lambda: MICRO_BENCHMARKS[name](np.random.default_rng(seed))
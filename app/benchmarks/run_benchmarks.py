@@ -0,0 +1,99 @@
+import argparse
+from datetime import datetime
+import json
+import os
+import platform
+import sys
+
+from app.benchmarks.macro import SCALING, STRATEGIES, macro_setup, scaling_exponent, scaling_points
+from app.benchmarks.micro import MICRO_BENCHMARKS, micro_setup
+from app.benchmarks.timing import compare, load_baseline, measure, save_baseline
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--suites', default='micro,macro,scaling')
+    parser.add_argument('--strategies', default=','.join(STRATEGIES))
+    parser.add_argument('--scaling_strategy', default='default')
+    parser.add_argument('--number_of_days', default=365)
+    parser.add_argument('--repeat', default=3)
+    parser.add_argument('--seed', default=0, type=int)
+    parser.add_argument('--baseline', default=None)
+    parser.add_argument('--save_baseline', default=None)
+    parser.add_argument('--tolerance', default=0.25)
+    parser.add_argument('--output', default='./app/logs/benchmarks.json')
+    args = parser.parse_args()
+
+    suites = args.suites.split(',')
+    repeat = int(args.repeat)
+    seed = args.seed
+    results = {}
+    curves = {}
+
+    time_begin = datetime.now()
+    if 'micro' in suites:
+        for name in MICRO_BENCHMARKS:
+            results[f'micro/{name}'] = measure(micro_setup(name, seed), repeat)
+            print(f'micro/{name}: {round(results[f"micro/{name}"]["per_op_us"], 1)} us')
+
+    if 'macro' in suites:
+        for pricing_strategy in args.strategies.split(','):
+            name = f'macro/{pricing_strategy}'
+            results[name] = measure(
+                macro_setup(pricing_strategy, number_of_days=int(args.number_of_days), seed=seed), repeat
+            )
+            print(f'{name}: {round(results[name]["min_s"], 2)} s')
+
+    if 'scaling' in suites:
+        for parameter, value, name, setup in scaling_points(args.scaling_strategy, seed):
+            results[name] = measure(setup, repeat)
+            print(f'{name}: {round(results[name]["min_s"], 2)} s')
+            curves.setdefault(parameter, []).append((value, results[name]['min_s']))
+    time_diff = (datetime.now() - time_begin).total_seconds()
+
+    exponents = {
+        parameter: scaling_exponent(*zip(*points)) for parameter, points in curves.items()
+    }
+    meta = {
+        'date': time_begin.isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'repeat': repeat,
+        'seed': seed,
+        'number_of_days': int(args.number_of_days),
+        'scaling_strategy': args.scaling_strategy,
+    }
+    with open(args.output, 'w') as f:
+        json.dump({'meta': meta, 'results': results, 'scaling_exponents': exponents}, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, meta)
+
+    rows = compare(results, load_baseline(args.baseline), float(args.tolerance)) if args.baseline else []
+    regressions = [row for row in rows if row[4]]
+
+    with open('./app/logs/benchmarks.txt', 'a') as f:
+        f.write('benchmarks\n')
+        f.write(f'suites: {args.suites}\n')
+        f.write(f'repeat: {repeat}\n')
+        f.write(f'seed: {seed}\n')
+        f.write(f'time, s: {round(time_diff, 2)}\n')
+        for name, stats in results.items():
+            f.write(f'{name}: per op, us {round(stats["per_op_us"], 1)}, total, s {round(stats["min_s"], 3)}\n')
+        for parameter in SCALING:
+            if parameter in exponents:
+                f.write(f'scaling exponent {parameter}: {round(exponents[parameter], 2)}\n')
+        if args.baseline:
+            f.write(f'baseline: {args.baseline}\n')
+            f.write(f'tolerance: {args.tolerance}\n')
+            for name, before, after, ratio, slower in rows:
+                flag = ' SLOWER' if slower else ''
+                f.write(f'{name}: {round(before, 1)} -> {round(after, 1)} us, x{round(ratio, 2)}{flag}\n')
+            f.write(f'regressions: {len(regressions)}\n')
+        f.write('\n')
+
+    for name, before, after, ratio, _ in regressions:
+        print(f'SLOWER {name}: {round(before, 1)} -> {round(after, 1)} us, x{round(ratio, 2)}')
+    sys.exit(1 if regressions else 0)
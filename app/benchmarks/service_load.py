@@ -0,0 +1,157 @@
+import argparse
+import asyncio
+from datetime import datetime
+
+import numpy as np
+
+from app.utils.acceptance_rule import AcceptanceRule
+from app.utils.event_generator import EventGenerator
+from app.utils.pricing import (
+    PricingConstant, PricingDefault, PricingRandom, PricingSomeMethod, PricingSomeMethodv2, PricingSomeMethodv3,
+    PricingSomeMethodv4
+)
+from app.utils.pricing_service import PricingService
+from app.utils.rolling_hotel import RollingHotel
+
+LEARNING_STRATEGIES = {
+    'PricingSomeMethod': PricingSomeMethod,
+    'PricingSomeMethodv2': PricingSomeMethodv2,
+    'PricingSomeMethodv3': PricingSomeMethodv3,
+    'PricingSomeMethodv4': PricingSomeMethodv4,
+}
+
+
+def make_pricing(pricing_strategy, nominal_price=1000, threshold=2, explore_count=500, rng=None):
+    """
+    Экземпляр стратегии по имени
+    :param pricing_strategy: default, random, constant или имя класса стратегии PricingSomeMethod*
+    :return: экземпляр стратегии
+    """
+    if pricing_strategy == 'default':
+        return PricingDefault(nominal_price)
+    if pricing_strategy == 'random':
+        return PricingRandom(nominal_price, rng=rng)
+    if pricing_strategy == 'constant':
+        return PricingConstant(nominal_price)
+    return LEARNING_STRATEGIES[pricing_strategy](
+        nominal_price, threshold=threshold, explore_count=explore_count, rng=rng
+    )
+
+
+async def client(service, acceptance, request, delay):
+    """
+    Один клиент: ждет момента прихода, запрашивает цену и отвечает на нее
+    :param service: экземпляр класса PricingService
+    :param acceptance: экземпляр класса AcceptanceRule
+    :param request: запрос
+    :param delay: момент прихода от начала дня, с
+    :return: None
+    """
+    await asyncio.sleep(delay)
+    price, _, quoted = await service.quote(request)
+    if price is not None:
+        await service.confirm(quoted, price, acceptance.decision(price, request.acceptance_draw))
+
+
+async def replay(service, event, acceptance, number_of_days, day_duration, rng):
+    """
+    Воспроизведение потока EventGenerator: запросы дня приходят в случайные моменты в течение day_duration секунд
+    и обслуживаются конкурентно, затем день закрывается
+    :param service: запущенный экземпляр класса PricingService
+    :param event: источник запросов
+    :param acceptance: экземпляр класса AcceptanceRule
+    :param number_of_days: число дней
+    :param day_duration: длительность дня, с
+    :param rng: генератор моментов прихода
+    :return: общая выручка
+    """
+    total_revenue = 0
+    for _ in range(number_of_days):
+        requests = event.generate_requests()
+        delays = rng.random(len(requests)) * day_duration
+        await asyncio.gather(*(
+            client(service, acceptance, request, delay) for request, delay in zip(requests, delays.tolist())
+        ))
+        total_revenue += await service.close_day()
+    return total_revenue
+
+
+async def run_load(
+        pricing_strategy,
+        number_of_days=30,
+        day_duration=0.1,
+        batch_window=0.002,
+        max_batch=64,
+        number_of_rooms=15,
+        nominal_price=1000,
+        mu=30,
+        seed=None
+):
+    """
+    Нагрузочный прогон сервиса цен на локальном потоке запросов
+    :return: общая выручка, статистика задержки PricingService.latency
+    """
+    rng = np.random.default_rng(seed)
+    event = EventGenerator(mu=mu, rng=rng)
+    service = PricingService(
+        RollingHotel.for_event(event, number_of_rooms=number_of_rooms),
+        make_pricing(pricing_strategy, nominal_price, rng=rng),
+        batch_window=batch_window,
+        max_batch=max_batch,
+    )
+    async with service:
+        total_revenue = await replay(
+            service,
+            event,
+            AcceptanceRule(nominal_price=nominal_price, rng=rng),
+            number_of_days,
+            day_duration,
+            rng,
+        )
+    return total_revenue, service.latency()
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pricing_strategy', default='default')
+    parser.add_argument('--number_of_days', default=30)
+    parser.add_argument('--day_duration', default=0.1)
+    parser.add_argument('--batch_window', default=0.002)
+    parser.add_argument('--max_batch', default=64)
+    parser.add_argument('--mu', default=30)
+    parser.add_argument('--seed', default=None, type=int)
+    args = parser.parse_args()
+
+    time_begin = datetime.now()
+    total_revenue, latency = asyncio.run(run_load(
+        args.pricing_strategy,
+        number_of_days=int(args.number_of_days),
+        day_duration=float(args.day_duration),
+        batch_window=float(args.batch_window),
+        max_batch=int(args.max_batch),
+        mu=float(args.mu),
+        seed=args.seed,
+    ))
+    time_diff = (datetime.now() - time_begin).total_seconds()
+    p50_ms = 'n/a' if latency['p50_ms'] is None else round(latency['p50_ms'], 3)
+    p99_ms = 'n/a' if latency['p99_ms'] is None else round(latency['p99_ms'], 3)
+    mean_batch = 'n/a' if latency['mean_batch'] is None else round(latency['mean_batch'], 2)
+    print(f'quotes: {latency["quotes"]}, p50, ms {p50_ms}, p99, ms {p99_ms}')
+
+    with open('./app/logs/service_load.txt', 'a') as f:
+        f.write('service_load\n')
+        f.write(f'pricing_strategy: {args.pricing_strategy}\n')
+        f.write(f'number_of_days: {args.number_of_days}\n')
+        f.write(f'day_duration, s: {args.day_duration}\n')
+        f.write(f'batch_window, s: {args.batch_window}\n')
+        f.write(f'max_batch: {args.max_batch}\n')
+        f.write(f'mu: {args.mu}\n')
+        f.write(f'quotes: {latency["quotes"]}\n')
+        f.write(f'quotes per s: {round(latency["quotes"] / time_diff, 1)}\n')
+        f.write(f'mean batch: {mean_batch}\n')
+        f.write(f'p50, ms: {p50_ms}\n')
+        f.write(f'p99, ms: {p99_ms}\n')
+        f.write(f'revenue: {round(total_revenue, 0)}\n')
+        f.write(f'time, s: {round(time_diff, 2)}\n')
+        f.write('\n')
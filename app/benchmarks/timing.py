@@ -0,0 +1,76 @@
+import gc
+import json
+from time import perf_counter
+
+
+def measure(setup, repeat=5):
+    """
+    Замер времени как в timeit: каждое повторение получает свежее состояние из setup,
+    во время замера сборщик мусора выключен
+    :param setup: функция без аргументов, возвращающая (замеряемая функция, число операций в ней)
+    :param repeat: число повторений
+    :return: словарь статистик, время на операцию по лучшему и медианному повторению
+    """
+    times = []
+    for _ in range(repeat):
+        run, ops = setup()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            begin = perf_counter()
+            run()
+            times.append(perf_counter() - begin)
+        finally:
+            if gc_enabled:
+                gc.enable()
+    times.sort()
+    median = times[len(times) // 2]
+    return {
+        'ops': ops,
+        'repeat': repeat,
+        'min_s': times[0],
+        'median_s': median,
+        'per_op_us': times[0] / max(ops, 1) * 1e6,
+        'median_per_op_us': median / max(ops, 1) * 1e6,
+    }
+
+
+def load_baseline(path):
+    """
+    Загрузка сохраненного базового замера
+    :param path: путь к json
+    :return: словарь {имя замера: статистики}
+    """
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def save_baseline(path, results, meta=None):
+    """
+    Сохранение замера как базового
+    :param path: путь к json
+    :param results: словарь {имя замера: статистики}
+    :param meta: описание машины и параметров запуска
+    :return: None
+    """
+    with open(path, 'w') as f:
+        json.dump({'meta': meta or {}, 'results': results}, f, indent=2, sort_keys=True)
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Сравнение с базовым замером по лучшему времени на операцию
+    :param results: текущие замеры
+    :param baseline: базовые замеры
+    :param tolerance: допустимое относительное замедление
+    :return: список (имя, базовое время на операцию, текущее, отношение, замедление или нет)
+    """
+    rows = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        before = baseline[name]['per_op_us']
+        after = results[name]['per_op_us']
+        ratio = after / before if before else float('inf')
+        rows.append((name, before, after, ratio, ratio > 1 + tolerance))
+    return rows
@@ -1,76 +1,150 @@
 import argparse
 from datetime import datetime
-import sys
-sys.path.append('D:/git/dynamic_pricing/')
-
 
 import numpy as np
-from tqdm import tqdm
 
+from app.experiments.runner import Runner
 from app.utils.acceptance_rule import AcceptanceRule
 from app.utils.event_generator import EventGenerator
 from app.utils.hotel import Hotel
+from app.utils.interval_hotel import IntervalHotel
+from app.utils.price_table import PriceTable
 from app.utils.pricing import PricingConstant, PricingDefault, PricingRandom
-
-
-def simulate(pricing_method='default', verbose=0):
+from app.utils.replica_engine import ReplicaEngine
+from app.utils.result_store import ResultStore
+from app.utils.rolling_hotel import RollingHotel
+
+
+def simulate(
+        pricing_method='default',
+        verbose=0,
+        event=None,
+        rng=None,
+        number_of_days=365,
+        number_of_rooms=15,
+        nominal_price=1000,
+        mu=30,
+        price_table=None,
+        instrumentation=None,
+        rolling_horizon=False,
+        room_policy=None
+):
     """
     Симуляция деятельности отеля
+    :param event: источник запросов, по умолчанию EventGenerator
+    :param rng: генератор случайных чисел numpy, общий для генерации запросов, цен и решений клиентов
+    :param number_of_days: число дней для симуляции
+    :param number_of_rooms: число номеров
+    :param nominal_price: номинальная цена
+    :param mu: интенсивность прибытия
+    :param price_table: файл таблицы скидок PriceTable (.csv или .npy) для стратегии default
+    :param instrumentation: экземпляр класса Instrumentation для замера времени по фазам
+    :param rolling_horizon: хранить занятость в кольцевом буфере RollingHotel, без обрезки броней на конце горизонта
+    :param room_policy: политика выбора номеров IntervalHotel (first_fit или best_fit), None -- Hotel
     :return: общая выручка
     """
-    number_of_days = 365
-    nominal_price = 1000
-    mu = 30
-
-    event = EventGenerator(mu=mu)
-    hotel = Hotel(number_of_days=number_of_days)
-    acceptance = AcceptanceRule(nominal_price=nominal_price)
+    if rolling_horizon and room_policy:
+        raise ValueError('RollingHotel и IntervalHotel нельзя включать одновременно')
+    if rng is None:
+        rng = np.random.default_rng()
+    if event is None:
+        event = EventGenerator(mu=mu, rng=rng)
+    if rolling_horizon:
+        hotel = RollingHotel.for_event(event, number_of_rooms=number_of_rooms)
+    elif room_policy:
+        hotel = IntervalHotel(number_of_rooms=number_of_rooms, number_of_days=number_of_days, policy=room_policy)
+    else:
+        hotel = Hotel(number_of_rooms=number_of_rooms, number_of_days=number_of_days)
+    acceptance = AcceptanceRule(nominal_price=nominal_price, rng=rng)
     if pricing_method == 'default':
-        pricing = PricingDefault(1000)
+        pricing = PricingDefault(nominal_price, PriceTable.load(price_table) if price_table else None)
     if pricing_method == 'random':
-        pricing = PricingRandom(1000)
+        pricing = PricingRandom(nominal_price, rng=rng)
     if pricing_method == 'constant':
-        pricing = PricingConstant(1000)
-
-    total_revenue = 0
-    uid = 1
-    for day in range(number_of_days):
-        # print(f"day simulate: {day}")
-        requests = event.generate_requests()
-
-        for request in requests:
-            request.fill(day)
-            # проверяем, есть ли места
-            vacant_rooms = hotel.is_vacant(request)
-            if len(vacant_rooms):
-
-                # устанавливаем цену
-                price = pricing.set_price(hotel, request)
-
-                # проверяем, устраивает ли цена
-                acceptance_result = acceptance.decision(price)
-                if acceptance_result:
-                    hotel.booking(request, vacant_rooms, uid, price)
+        pricing = PricingConstant(nominal_price)
+
+    if instrumentation is not None:
+        instrumentation.start(event=event, hotel=hotel, acceptance=acceptance, pricing=pricing)
+
+    try:
+        total_revenue = 0
+        uid = 1
+        for day in range(number_of_days):
+            # print(f"day simulate: {day}")
+            requests = event.generate_requests()
+
+            for request in requests:
+                request.fill(day)
+                # проверяем, есть ли места
+                vacant_rooms = hotel.is_vacant(request)
+                if len(vacant_rooms):
+
+                    # устанавливаем цену
+                    price = pricing.set_price(hotel, request)
+
+                    # проверяем, устраивает ли цена
+                    acceptance_result = acceptance.decision(price, request.acceptance_draw)
+                    if acceptance_result:
+                        hotel.booking(request, vacant_rooms, uid, price)
+                    if verbose:
+                        print(f'price: {price}')
+                        print(f'LoS: {request.LoS}')
+                        print(f'depth: {request.depth}')
+                        print(f'acceptance_result: {acceptance_result}')
+                        print(f'vacant_rooms: {vacant_rooms}')
+                        print(f'person: {request.persons}')
+
+                uid += 1
                 if verbose:
-                    print(f'price: {price}')
-                    print(f'LoS: {request.LoS}')
-                    print(f'depth: {request.depth}')
-                    print(f'acceptance_result: {acceptance_result}')
-                    print(f'vacant_rooms: {vacant_rooms}')
-                    print(f'person: {request.persons}')
-
-            uid += 1
-            if verbose:
-                print('----------------')
-
-        # удаляем отменённые заказы
-        hotel.cancel_request(day)
-
-        # считаем выручку за день. Деньги за всех гостей за всё время проживания поступают сразу в день заезда
-        revenue = hotel.get_revenue(day)
-        total_revenue += revenue
+                    print('----------------')
+
+            # удаляем отменённые заказы
+            hotel.cancel_request(day)
+
+            # считаем выручку за день. Деньги за всех гостей за всё время проживания поступают сразу в день заезда
+            revenue = hotel.get_revenue(day)
+            total_revenue += revenue
+    finally:
+        # методы экземпляров подменены на обертки, их нужно вернуть и при исключении
+        if instrumentation is not None:
+            instrumentation.stop()
+    return total_revenue, pricing, hotel.get_free_share()
+
+
+def simulate_batch(
+        pricing_method='default',
+        iter_count=1,
+        rng=None,
+        number_of_days=365,
+        number_of_rooms=15,
+        nominal_price=1000,
+        mu=30,
+        price_table=None
+):
+    """
+    Симуляция iter_count независимых копий отеля одним векторным прогоном
+    :param rng: генератор случайных чисел numpy
+    :param number_of_days: число дней для симуляции
+    :param number_of_rooms: число номеров
+    :param nominal_price: номинальная цена
+    :param mu: интенсивность прибытия
+    :param price_table: файл таблицы скидок PriceTable (.csv или .npy) для стратегии default
+    :return: выручки и доли свободных номеров по копиям
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if pricing_method == 'default':
+        pricing = PricingDefault(nominal_price, PriceTable.load(price_table) if price_table else None)
+    if pricing_method == 'random':
+        pricing = PricingRandom(nominal_price, rng=rng)
+    if pricing_method == 'constant':
+        pricing = PricingConstant(nominal_price)
 
-    return total_revenue, pricing, (hotel.state == 0).sum() / hotel.number_of_rooms / number_of_days
+    engine = ReplicaEngine(
+        pricing, iter_count, number_of_rooms=number_of_rooms, number_of_days=number_of_days,
+        nominal_price=nominal_price, mu=mu, rng=rng
+    )
+    return engine.run()
 
 print('begin')
 
@@ -79,23 +153,41 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--iter_count', required=True)
     parser.add_argument('--pricing_method', required=True)
+    parser.add_argument('--trace', default=None)
+    parser.add_argument('--workers', default=None)
+    parser.add_argument('--seed', default=None, type=int)
+    parser.add_argument('--store', default=None)
+    parser.add_argument('--engine', default='loop')
+    parser.add_argument('--price_table', default=None)
+    parser.add_argument('--room_policy', default=None)
     args = parser.parse_args()
 
     range_N = int(args.iter_count)
+    workers = int(args.workers) if args.workers else None
+    seed = args.seed
+    store = ResultStore(args.store) if args.store else None
     pricing_method = args.pricing_method
     # Симулируем N_sim раз и считаем среднюю выручку и её дисперсию при заданной стратегии
     # 1000
 
     time_begin = datetime.now()
 
-    res = []
     # range_N = 1
     threshold = 1
-    hotel_states = []
-    for k in tqdm(range(range_N)):
-        total_revenue, pricing, hotel_state = simulate(pricing_method)
-        res.append(total_revenue)
-        hotel_states.append(hotel_state)
+    if args.engine == 'batch':
+        # все повторения одним векторным прогоном, трассы запросов здесь не используются
+        entropy = np.random.SeedSequence(seed).entropy
+        res, hotel_states = simulate_batch(
+            pricing_method, range_N, rng=np.random.default_rng(entropy), price_table=args.price_table
+        )
+    else:
+        with Runner(workers=workers, seed=seed, store=store) as runner:
+            res, hotel_states = runner.run(
+                simulate, range_N, args=(pricing_method,),
+                kwargs={'price_table': args.price_table, 'room_policy': args.room_policy},
+                trace_path=args.trace
+            )
+        entropy = runner.entropy
 
     time_diff = (datetime.now() - time_begin).total_seconds()
 
@@ -104,6 +196,10 @@ if __name__ == '__main__':
         f.write(f'pricing_method: {pricing_method}\n')
         f.write(f'threshold: {threshold}\n')
         f.write(f'iter_counts: {range_N}\n')
+        f.write(f'engine: {args.engine}\n')
+        f.write(f'price_table: {args.price_table}\n')
+        f.write(f'room_policy: {args.room_policy}\n')
+        f.write(f'seed: {entropy}\n')
         f.write(f'revenue_mean: {round(np.mean(res), 0)}\n')
         f.write(f'revenue_std: {round(np.std(res), 0)}\n')
         f.write(f'hotel_states_mean: {round(np.mean(hotel_states), 4)}\n')
@@ -0,0 +1,245 @@
+import argparse
+from datetime import datetime
+import math
+
+import numpy as np
+from tqdm import tqdm
+
+from app.experiments.profile_simulation import simulate as simulate_strategy
+from app.experiments.runner import Runner, describe, replication_streams
+from app.utils.event_generator import DayStreamEventGenerator
+
+
+def _run_estimation_replication(simulate, args, kwargs, entropy, replication, antithetic):
+    """
+    Одно повторение с раздельными потоками случайных чисел: поток запросов (вместе с решениями клиентов)
+    зависит только от номера повторения, поток стратегии -- отдельный. Поэтому все точки с одним номером
+    повторения видят одних и тех же клиентов (общие случайные числа), как бы ни тратила числа стратегия
+    :return: номер повторения, выручка, доля свободных номеров, число запросов, ожидаемое число запросов
+    """
+    config = describe(simulate, args, kwargs)
+    # при антитетических парах повторения 2k и 2k + 1 разыгрывают один поток, второе -- зеркально
+    stream = replication // 2 if antithetic else replication
+    _, policy_rng = replication_streams(entropy, replication, stream)
+    # у каждого дня свой поток спроса, поэтому запрос k дня d разыгрывается от u и 1 - u в обоих повторениях
+    # пары, даже если раньше число запросов у них разошлось
+    event = DayStreamEventGenerator(
+        np.random.SeedSequence(entropy, spawn_key=(stream, 0)), antithetic=antithetic and replication % 2 == 1,
+        mu=config['mu'], acceptance_draws=True
+    )
+    total_revenue, _, hotel_state = simulate(*args, rng=policy_rng, event=event, **kwargs)
+    request_number = np.dot(event.request_number_values, np.diff(event.request_number_cdf, prepend=0))
+    return replication, total_revenue, hotel_state, event.generated, config['number_of_days'] * request_number
+
+
+class Estimator:
+    """
+    Оценка средней выручки точек (стратегий или параметров) с понижением дисперсии и последовательной остановкой.
+    - Общие случайные числа: поток запросов и решений клиентов отделен от потока стратегии, повторение k
+      всех точек видит одних и тех же клиентов, поэтому разности выручек парные.
+    - Антитетические пары: повторения 2k и 2k + 1 разыгрывают поток запросов от u и 1 - u
+      (DayStreamEventGenerator, числа выровнены по дню и номеру запроса), единица оценки -- среднее пары.
+    - Контрольная переменная: фактическое число запросов C с известным средним E[C] = mu * число дней,
+      оценка -- среднее Y - beta (C - E[C]), beta -- коэффициент регрессии Y на C по тем же повторениям.
+    Доверительный интервал -- z * sd / sqrt(n) по единицам оценки. В последовательном режиме повторения
+    добавляются пачками, пока полуширина интервалов средних или парных разностей не станет не больше цели.
+    """
+
+    def __init__(self, runner, antithetic=False, control=True, z=1.96):
+        """
+        Инициализация
+        :param runner: экземпляр класса Runner, дает пул процессов и зерно эксперимента
+        :param antithetic: антитетические пары повторений
+        :param control: поправка на число запросов как контрольную переменную
+        :param z: квантиль нормального распределения для доверительного интервала
+        """
+        self.runner = runner
+        self.antithetic = antithetic
+        self.control = control
+        self.z = z
+        self.revenues = None
+        self.hotel_states = None
+        self.requests = None
+        self.expected_requests = None
+
+    def replicate(self, simulate, points, replications, progress=True):
+        """
+        Досчитать повторения для всех точек
+        :param simulate: функция симуляции, принимающая rng и event
+        :param points: список пар (args, kwargs)
+        :param replications: номера повторений
+        :param progress: показывать ли прогресс
+        :return: None
+        """
+        replications = list(replications)
+        size = max(replications) + 1
+        if self.revenues is None:
+            self.revenues = np.full([len(points), 0], np.nan)
+            self.hotel_states = np.full([len(points), 0], np.nan)
+            self.requests = np.full(0, np.nan)
+            self.expected_requests = np.full(0, np.nan)
+        if size > self.revenues.shape[1]:
+            grow = size - self.revenues.shape[1]
+            self.revenues = np.pad(self.revenues, [(0, 0), (0, grow)], constant_values=np.nan)
+            self.hotel_states = np.pad(self.hotel_states, [(0, 0), (0, grow)], constant_values=np.nan)
+            self.requests = np.pad(self.requests, (0, grow), constant_values=np.nan)
+            self.expected_requests = np.pad(self.expected_requests, (0, grow), constant_values=np.nan)
+
+        jobs = [
+            (point, (simulate, args, kwargs, self.runner.entropy, replication, self.antithetic))
+            for point, (args, kwargs) in enumerate(points) for replication in replications
+        ]
+        bar = tqdm(total=len(jobs), disable=not progress)
+        if self.runner.executor is None:
+            rows = []
+            for point, job in jobs:
+                rows.append((point, _run_estimation_replication(*job)))
+                bar.update()
+        else:
+            futures = [(point, self.runner.executor.submit(_run_estimation_replication, *job)) for point, job in jobs]
+            rows = []
+            for point, future in futures:
+                rows.append((point, future.result()))
+                bar.update()
+        bar.close()
+        for point, (replication, total_revenue, hotel_state, requests, expected_requests) in rows:
+            self.revenues[point, replication] = total_revenue
+            self.hotel_states[point, replication] = hotel_state
+            self.requests[replication] = requests
+            self.expected_requests[replication] = expected_requests
+
+    def _units(self, values):
+        """
+        Единицы оценки: повторения или средние антитетических пар
+        :param values: массив по повторениям
+        :return: массив по единицам оценки
+        """
+        if not self.antithetic:
+            return values
+        return values[:len(values) // 2 * 2].reshape(-1, 2).mean(axis=1)
+
+    def interval(self, values):
+        """
+        Оценка среднего и полуширина доверительного интервала
+        :param values: выручки (или парные разности) по повторениям
+        :return: среднее, полуширина, число единиц оценки
+        """
+        y = self._units(values)
+        n = len(y)
+        if n < 3:
+            return float(np.mean(y)), math.inf, n
+        if not self.control:
+            return float(y.mean()), self.z * float(y.std(ddof=1)) / math.sqrt(n), n
+
+        c = self._units(self.requests[:len(values)] - self.expected_requests[:len(values)])
+        variance = float(c.var(ddof=1))
+        beta = float(np.cov(y, c)[0, 1]) / variance if variance > 0 else 0.0
+        adjusted = y - beta * c
+        # поправка не сдвигает оценку, т.к. E[C] известно точно; одна степень свободы уходит на beta
+        residual = adjusted - adjusted.mean()
+        sd = math.sqrt(float(np.dot(residual, residual)) / (n - 2))
+        return float(adjusted.mean()), self.z * sd / math.sqrt(n), n
+
+    def summary(self, paired=False):
+        """
+        Интервалы по текущим повторениям
+        :param paired: считать ли парные разности точек с первой точкой
+        :return: список словарей: mean, half_width, units для каждой точки, и для paired -- разности
+        """
+        rows = []
+        for point in range(len(self.revenues)):
+            mean, half_width, units = self.interval(self.revenues[point])
+            row = {'mean': mean, 'half_width': half_width, 'units': units}
+            if paired and point:
+                difference, difference_width, _ = self.interval(self.revenues[point] - self.revenues[0])
+                row['difference'] = difference
+                row['difference_half_width'] = difference_width
+            rows.append(row)
+        return rows
+
+    def run_until(
+            self, simulate, points, target_width, paired=False, min_replications=16, max_replications=1000,
+            growth=1.5, progress=True
+    ):
+        """
+        Последовательный режим: повторения добавляются, пока полуширина интервалов не станет не больше цели
+        :param simulate: функция симуляции, принимающая rng и event
+        :param points: список пар (args, kwargs)
+        :param target_width: целевая полуширина интервала
+        :param paired: по разностям с первой точкой, иначе по средним всех точек
+        :param min_replications: число повторений в первом раунде
+        :param max_replications: максимальное число повторений
+        :param growth: во сколько раз растет число повторений за раунд
+        :param progress: показывать ли прогресс
+        :return: summary(paired) по последнему раунду
+        """
+        done = 0
+        count = min_replications
+        while True:
+            count = min(count, max_replications)
+            if self.antithetic:
+                count += count % 2
+            self.replicate(simulate, points, range(done, count), progress=progress)
+            done = count
+            rows = self.summary(paired)
+            if paired:
+                widths = [row['difference_half_width'] for row in rows[1:]]
+            else:
+                widths = [row['half_width'] for row in rows]
+            if max(widths) <= target_width or done >= max_replications:
+                return rows
+            count = int(math.ceil(done * growth))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--strategies', required=True)
+    parser.add_argument('--target_width', required=True)
+    parser.add_argument('--paired', action='store_true')
+    parser.add_argument('--antithetic', action='store_true')
+    parser.add_argument('--no_control', action='store_true')
+    parser.add_argument('--threshold', default=2)
+    parser.add_argument('--explore_count', default=500)
+    parser.add_argument('--number_of_days', default=365)
+    parser.add_argument('--min_replications', default=16)
+    parser.add_argument('--max_replications', default=1000)
+    parser.add_argument('--workers', default=None)
+    parser.add_argument('--seed', default=None, type=int)
+    args = parser.parse_args()
+
+    strategies = args.strategies.split(',')
+    points = [
+        ((strategy,), {
+            'threshold': float(args.threshold),
+            'explore_count': int(args.explore_count),
+            'number_of_days': int(args.number_of_days),
+        })
+        for strategy in strategies
+    ]
+
+    time_begin = datetime.now()
+    with Runner(workers=int(args.workers) if args.workers else None, seed=args.seed) as runner:
+        estimator = Estimator(runner, antithetic=args.antithetic, control=not args.no_control)
+        rows = estimator.run_until(
+            simulate_strategy, points, float(args.target_width), paired=args.paired,
+            min_replications=int(args.min_replications), max_replications=int(args.max_replications)
+        )
+    time_diff = (datetime.now() - time_begin).total_seconds()
+
+    with open('./app/logs/estimation.txt', 'a') as f:
+        f.write('estimation\n')
+        f.write(f'strategies: {args.strategies}\n')
+        f.write(f'target_width: {args.target_width}\n')
+        f.write(f'paired: {args.paired}\n')
+        f.write(f'antithetic: {args.antithetic}\n')
+        f.write(f'control: {not args.no_control}\n')
+        f.write(f'seed: {runner.entropy}\n')
+        f.write(f'replications: {estimator.revenues.shape[1]}\n')
+        for strategy, row in zip(strategies, rows):
+            f.write(f'{strategy}: revenue_mean {round(row["mean"], 0)} +- {round(row["half_width"], 0)}')
+            if 'difference' in row:
+                f.write(f', difference {round(row["difference"], 0)} +- {round(row["difference_half_width"], 0)}')
+            f.write('\n')
+        f.write(f'time, s: {round(time_diff, 2)}\n')
+        f.write('\n')
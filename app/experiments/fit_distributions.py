@@ -0,0 +1,21 @@
+import argparse
+
+from app.utils.distribution_fitter import DistributionFitter
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests_file', required=True)
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--chunk_size', default=1_000_000)
+    args = parser.parse_args()
+
+    # Оцениваем распределения за один проход по журналу, дальше генератор строится через EventGenerator.load
+    fitter = DistributionFitter.from_file(args.requests_file, chunk_size=int(args.chunk_size))
+    fitter.save(args.output)
+    params = fitter.params()
+    print(
+        f'requests: {len(fitter)}, days: {len(fitter.day_counts)}, mu: {round(float(params["mu"]), 2)}, '
+        f'cancellation: {round(float(fitter.cancelled.sum() / len(fitter)), 4)}'
+    )
@@ -0,0 +1,24 @@
+import argparse
+
+from app.utils.request_trace import RequestTrace
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', required=True)
+    parser.add_argument('--trace_count', required=True)
+    parser.add_argument('--number_of_days', default=365)
+    parser.add_argument('--mu', default=30)
+    parser.add_argument('--seed', default=None, type=int)
+    args = parser.parse_args()
+
+    # Генерируем трассы запросов один раз, дальше симуляции воспроизводят их через --trace
+    trace = RequestTrace.generate(
+        args.path,
+        n_traces=int(args.trace_count),
+        number_of_days=int(args.number_of_days),
+        mu=float(args.mu),
+        seed=args.seed,
+    )
+    print(f'traces: {len(trace)}, requests: {len(trace.records)}')
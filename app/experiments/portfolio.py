@@ -0,0 +1,263 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import csv
+from datetime import datetime
+import os
+
+import numpy as np
+from tqdm import tqdm
+
+from app.experiments.base_experiments import simulate_batch
+from app.experiments.profile_simulation import simulate
+from app.experiments.runner import replication_rng
+
+# стратегии без обратной связи, которые можно считать пачкой копий в ReplicaEngine
+BATCH_STRATEGIES = ('default', 'random', 'constant')
+# столбцы таблицы отелей и значения по умолчанию
+PORTFOLIO_FIELDS = {
+    'name': None,
+    'number_of_rooms': 15,
+    'mu': 30.0,
+    'nominal_price': 1000.0,
+    'strategy': 'default',
+    'threshold': 2.0,
+    'explore_count': 500,
+}
+
+
+def _parse_field(field, value, default):
+    """
+    Значение столбца таблицы отелей того же типа, что и значение по умолчанию.
+    Целые столбцы принимают и запись с нулевой дробной частью: 15 и 15.0
+    :param field: имя столбца
+    :param value: строка из csv
+    :param default: значение по умолчанию
+    :return: значение
+    """
+    if default is None or isinstance(default, str):
+        return value
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f'{field}: ожидается число, получено {value!r}') from None
+    if isinstance(default, int):
+        if not number.is_integer():
+            raise ValueError(f'{field}: ожидается целое число, получено {value!r}')
+        return int(number)
+    return number
+
+
+def load_portfolio(path):
+    """
+    Загрузка таблицы отелей из csv со столбцами PORTFOLIO_FIELDS, отсутствующие столбцы берутся по умолчанию.
+    Числовые столбцы -- числа, целые (number_of_rooms, explore_count) -- без дробной части
+    :param path: путь к csv
+    :return: список словарей конфигураций
+    """
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    configs = []
+    for k, row in enumerate(rows):
+        config = {}
+        for field, default in PORTFOLIO_FIELDS.items():
+            value = row.get(field)
+            config[field] = _parse_field(field, value, default) if value else default
+        config['name'] = config['name'] or f'hotel_{k}'
+        configs.append(config)
+    return configs
+
+
+def random_portfolio(size, seed=None):
+    """
+    Случайный портфель отелей разного размера и спроса, интенсивность прибытия растет с числом номеров
+    :param size: число отелей
+    :param seed: зерно
+    :return: список словарей конфигураций
+    """
+    rng = np.random.default_rng(seed)
+    strategies = ('default', 'random', 'constant', 'PricingSomeMethodv2', 'PricingSomeMethodv3')
+    configs = []
+    for k in range(size):
+        number_of_rooms = int(rng.choice([5, 10, 15, 30, 60]))
+        configs.append(dict(
+            PORTFOLIO_FIELDS,
+            name=f'hotel_{k}',
+            number_of_rooms=number_of_rooms,
+            mu=float(2 * number_of_rooms),
+            nominal_price=float(rng.choice([600, 800, 1000, 1500])),
+            strategy=str(rng.choice(strategies, p=[0.4, 0.1, 0.1, 0.2, 0.2])),
+        ))
+    return configs
+
+
+def _simulate_shard(configs, indices, entropy, number_of_days):
+    """
+    Симуляция части портфеля в одном процессе
+    :param configs: конфигурации отелей части
+    :param indices: номера отелей в портфеле
+    :param entropy: энтропия эксперимента
+    :param number_of_days: число дней для симуляции
+    :return: список (номер отеля, выручка, доля свободных номеров)
+    """
+    config = configs[0]
+    if len(configs) > 1:
+        # отели с одинаковыми стратегией, размером, спросом и ценой считаются одной пачкой копий
+        revenues, free_shares = simulate_batch(
+            config['strategy'], len(configs), rng=replication_rng(entropy, indices[0]),
+            number_of_days=number_of_days, number_of_rooms=config['number_of_rooms'],
+            nominal_price=config['nominal_price'], mu=config['mu']
+        )
+        return list(zip(indices, revenues.tolist(), free_shares.tolist()))
+
+    total_revenue, _, free_share = simulate(
+        config['strategy'],
+        threshold=config['threshold'],
+        explore_count=config['explore_count'],
+        number_of_days=number_of_days,
+        number_of_rooms=config['number_of_rooms'],
+        nominal_price=config['nominal_price'],
+        mu=config['mu'],
+        rng=replication_rng(entropy, indices[0]),
+    )
+    return [(indices[0], total_revenue, free_share)]
+
+
+class Portfolio:
+    """
+    Симуляция портфеля отелей разных размеров, спроса, цен и стратегий.
+    Отели со стратегиями без обратной связи и одинаковыми (стратегия, номера, mu, цена) объединяются
+    в пачки по batch_size копий для ReplicaEngine, остальные считаются по одному через simulate().
+    Части раздаются пулу процессов, самые дорогие первыми, поэтому процессы загружены равномерно.
+    Генератор части зависит только от зерна и номера первого отеля части, поэтому результат
+    не зависит от числа процессов.
+    """
+
+    def __init__(self, configs, workers=None, seed=None, batch_size=64):
+        """
+        Инициализация
+        :param configs: список словарей конфигураций отелей
+        :param workers: число процессов, по умолчанию по числу ядер; 1 -- считать в текущем процессе
+        :param seed: зерно эксперимента, None -- случайное
+        :param batch_size: максимальное число отелей в одной пачке
+        """
+        self.configs = configs
+        self.workers = workers or os.cpu_count()
+        self.entropy = np.random.SeedSequence(seed).entropy
+        self.batch_size = batch_size
+
+    def shards(self):
+        """
+        Разбиение портфеля на части
+        :return: список (оценка стоимости, номера отелей), самые дорогие первыми
+        """
+        groups = {}
+        shards = []
+        for index, config in enumerate(self.configs):
+            if config['strategy'] in BATCH_STRATEGIES:
+                key = (config['strategy'], config['number_of_rooms'], config['mu'], config['nominal_price'])
+                groups.setdefault(key, []).append(index)
+            else:
+                # обучающиеся стратегии на порядки дороже: цена каждого запроса считается по истории продаж
+                shards.append((100 * config['mu'], [index]))
+        for (_, _, mu, _), indices in groups.items():
+            for begin in range(0, len(indices), self.batch_size):
+                chunk = indices[begin: begin + self.batch_size]
+                # пачка стоит примерно как один проход по дням плюс запросы всех копий
+                shards.append((mu * (1 + 0.1 * len(chunk)), chunk))
+        return sorted(shards, key=lambda shard: shard[0], reverse=True)
+
+    def run(self, number_of_days=365, progress=True):
+        """
+        Симуляция портфеля
+        :param number_of_days: число дней для симуляции
+        :param progress: показывать ли прогресс
+        :return: список словарей по отелям: конфигурация, выручка, доля свободных номеров, загрузка
+        """
+        jobs = [
+            ([self.configs[index] for index in indices], indices, self.entropy, number_of_days)
+            for _, indices in self.shards()
+        ]
+        rows = []
+        bar = tqdm(total=len(self.configs), disable=not progress)
+        if self.workers == 1:
+            for job in jobs:
+                rows.extend(_simulate_shard(*job))
+                bar.update(len(job[1]))
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(_simulate_shard, *job) for job in jobs]
+                for future in as_completed(futures):
+                    shard = future.result()
+                    rows.extend(shard)
+                    bar.update(len(shard))
+        bar.close()
+
+        results = []
+        for index, total_revenue, free_share in sorted(rows):
+            results.append(dict(
+                self.configs[index], revenue=total_revenue, free_share=free_share, occupancy=1 - free_share
+            ))
+        return results
+
+
+def aggregate(results):
+    """
+    Итоги по портфелю
+    :param results: результаты Portfolio.run
+    :return: словарь: число отелей и номеров, выручка, загрузка, взвешенная по числу номеров
+    """
+    rooms = np.array([row['number_of_rooms'] for row in results])
+    return {
+        'hotels': len(results),
+        'rooms': int(rooms.sum()),
+        'revenue': float(sum(row['revenue'] for row in results)),
+        'occupancy': float(np.dot(rooms, [row['occupancy'] for row in results]) / rooms.sum()),
+    }
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--portfolio', default=None)
+    parser.add_argument('--random_portfolio', default=100)
+    parser.add_argument('--number_of_days', default=365)
+    parser.add_argument('--batch_size', default=64)
+    parser.add_argument('--workers', default=None)
+    parser.add_argument('--seed', default=None, type=int)
+    parser.add_argument('--output', default='./app/logs/portfolio.csv')
+    args = parser.parse_args()
+
+    workers = int(args.workers) if args.workers else None
+    seed = args.seed
+    if args.portfolio:
+        configs = load_portfolio(args.portfolio)
+    else:
+        configs = random_portfolio(int(args.random_portfolio), seed)
+
+    time_begin = datetime.now()
+    portfolio = Portfolio(configs, workers=workers, seed=seed, batch_size=int(args.batch_size))
+    results = portfolio.run(number_of_days=int(args.number_of_days))
+    time_diff = (datetime.now() - time_begin).total_seconds()
+    total = aggregate(results)
+
+    with open(args.output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+    with open('./app/logs/portfolio.txt', 'a') as f:
+        f.write('portfolio\n')
+        f.write(f'portfolio: {args.portfolio or "random " + str(args.random_portfolio)}\n')
+        f.write(f'hotels: {total["hotels"]}\n')
+        f.write(f'rooms: {total["rooms"]}\n')
+        f.write(f'shards: {len(portfolio.shards())}\n')
+        f.write(f'workers: {portfolio.workers}\n')
+        f.write(f'seed: {portfolio.entropy}\n')
+        f.write(f'revenue: {round(total["revenue"], 0)}\n')
+        f.write(f'occupancy: {round(total["occupancy"], 4)}\n')
+        for strategy in sorted({row['strategy'] for row in results}):
+            rows = [row for row in results if row['strategy'] == strategy]
+            f.write(f'{strategy}: hotels {len(rows)}, revenue {round(sum(row["revenue"] for row in rows), 0)}\n')
+        f.write(f'output: {args.output}\n')
+        f.write(f'time, s: {round(time_diff, 2)}\n')
+        f.write('\n')
@@ -0,0 +1,110 @@
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+from app.experiments import (
+    base_experiments, new_algorithm_experiments, new_algorithm_v2_experiments_iterates
+)
+from app.utils.instrumentation import Instrumentation
+from app.utils.request_stream import RequestStream
+from app.utils.snapshot import save_snapshot
+
+
+def simulate(
+        pricing_strategy,
+        threshold=2,
+        explore_count=500,
+        number_of_days=365,
+        number_of_rooms=15,
+        nominal_price=1000,
+        mu=30,
+        rng=None,
+        event=None,
+        instrumentation=None,
+        rolling_horizon=False,
+        warm_start=None
+):
+    """
+    Один прогон simulate() нужной стратегии
+    :param pricing_strategy: default, random, constant или имя класса стратегии PricingSomeMethod*
+    :param event: источник запросов, по умолчанию EventGenerator
+    :param warm_start: файл save_snapshot для теплого старта обучающейся стратегии
+    :return: общая выручка, стратегия, доля свободных номеров
+    """
+    kwargs = dict(
+        rng=rng, event=event, number_of_days=number_of_days, number_of_rooms=number_of_rooms,
+        nominal_price=nominal_price, mu=mu, instrumentation=instrumentation, rolling_horizon=rolling_horizon
+    )
+    if pricing_strategy in ('default', 'random', 'constant'):
+        return base_experiments.simulate(pricing_strategy, **kwargs)
+    params = {'threshold': threshold, 'explore_count': explore_count}
+    if pricing_strategy == 'PricingSomeMethod':
+        return new_algorithm_experiments.simulate(
+            params, pricing_strategy=pricing_strategy, warm_start=warm_start, **kwargs
+        )
+    return new_algorithm_v2_experiments_iterates.simulate(
+        params, pricing_strategy=pricing_strategy, warm_start=warm_start, **kwargs
+    )
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pricing_strategy', required=True)
+    parser.add_argument('--threshold', default=2)
+    parser.add_argument('--explore_count', default=500)
+    parser.add_argument('--number_of_days', default=365)
+    parser.add_argument('--seed', default=None, type=int)
+    parser.add_argument('--capture', default=None, choices=Instrumentation.CAPTURES[1:])
+    parser.add_argument('--report', default=None)
+    parser.add_argument('--rolling_horizon', action='store_true')
+    parser.add_argument('--requests_file', default=None)
+    parser.add_argument('--chunk_size', default=1_000_000)
+    parser.add_argument('--warm_start', default=None)
+    parser.add_argument('--save_snapshot', default=None)
+    args = parser.parse_args()
+
+    pricing_strategy = args.pricing_strategy
+    entropy = np.random.SeedSequence(args.seed).entropy
+    report_path = args.report or f'./app/logs/profile_{pricing_strategy}.json'
+
+    instrumentation = Instrumentation(capture=args.capture)
+    time_begin = datetime.now()
+    total_revenue, pricing, hotel_state = simulate(
+        pricing_strategy,
+        threshold=float(args.threshold),
+        explore_count=int(args.explore_count),
+        number_of_days=int(args.number_of_days),
+        rng=np.random.default_rng(entropy),
+        event=RequestStream(args.requests_file, chunk_size=int(args.chunk_size)) if args.requests_file else None,
+        instrumentation=instrumentation,
+        rolling_horizon=args.rolling_horizon,
+        warm_start=args.warm_start,
+    )
+    time_diff = (datetime.now() - time_begin).total_seconds()
+    instrumentation.save(report_path)
+    if args.save_snapshot:
+        save_snapshot(args.save_snapshot, pricing)
+
+    report = instrumentation.report()
+    with open('./app/logs/profile_simulation.txt', 'a') as f:
+        f.write('profile_simulation\n')
+        f.write(f'pricing_strategy: {pricing_strategy}\n')
+        f.write(f'seed: {entropy}\n')
+        f.write(f'capture: {args.capture}\n')
+        f.write(f'rolling_horizon: {args.rolling_horizon}\n')
+        f.write(f'requests_file: {args.requests_file}\n')
+        f.write(f'warm_start: {args.warm_start}\n')
+        f.write(f'save_snapshot: {args.save_snapshot}\n')
+        f.write(f'report: {report_path}\n')
+        f.write(f'revenue: {round(total_revenue, 0)}\n')
+        f.write(f'hotel_state: {round(hotel_state, 4)}\n')
+        f.write(f'time, s: {round(time_diff, 2)}\n')
+        for phase, stats in sorted(report['phases'].items(), key=lambda item: item[1]['self_s'], reverse=True):
+            f.write(
+                f'{phase}: calls {stats["calls"]}, self, s {round(stats["self_s"], 3)}, '
+                f'share {round(stats["share"], 3)}, mean, us {round(stats["mean_us"], 1)}\n'
+            )
+        f.write(f'other, s: {round(report["other_s"], 3)}\n')
+        f.write('\n')
@@ -0,0 +1,185 @@
+import inspect
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import numpy as np
+from tqdm import tqdm
+
+from app.utils.event_generator import EventGenerator, default_tables
+from app.utils.request_trace import RequestTrace
+
+
+def replication_rng(entropy, replication):
+    """
+    Генератор случайных чисел повторения. Зависит только от entropy и номера повторения,
+    поэтому результат не зависит ни от числа процессов, ни от общего числа повторений
+    :param entropy: энтропия эксперимента
+    :param replication: номер повторения
+    :return: np.random.Generator
+    """
+    return np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(replication,)))
+
+
+def replication_streams(entropy, replication, demand_replication=None):
+    """
+    Раздельные генераторы повторения: поток спроса (запросы и решения клиентов) и поток стратегии.
+    Поток спроса зависит только от номера повторения, поэтому повторение k всех точек перебора видит одних
+    и тех же клиентов, сколько бы случайных чисел ни потратила стратегия
+    :param entropy: энтропия эксперимента
+    :param replication: номер повторения
+    :param demand_replication: номер повторения для потока спроса, по умолчанию replication
+    :return: генератор потока спроса, генератор потока стратегии
+    """
+    if demand_replication is None:
+        demand_replication = replication
+    demand_rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(demand_replication, 0)))
+    policy_rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(replication, 1)))
+    return demand_rng, policy_rng
+
+
+@lru_cache(maxsize=None)
+def _open_trace(path):
+    return RequestTrace(path)
+
+
+def describe(simulate, args, kwargs):
+    """
+    Полная конфигурация вызова simulate(): все аргументы с учетом значений по умолчанию,
+    кроме не влияющих на результат, и имя функции
+    :return: словарь конфигурации
+    """
+    arguments = inspect.signature(simulate).bind(*args, **kwargs)
+    arguments.apply_defaults()
+    config = {
+        name: value for name, value in arguments.arguments.items()
+        if name not in ('verbose', 'event', 'rng', 'instrumentation')
+    }
+    module = os.path.splitext(os.path.basename(inspect.getfile(simulate)))[0]
+    config['simulate'] = f'{module}.{simulate.__qualname__}'
+    return config
+
+
+def _init_worker():
+    # таблицы распределений строятся один раз на процесс, до первого повторения
+    default_tables()
+
+
+def _run_replication(simulate, args, kwargs, entropy, replication, trace_path):
+    """
+    Одно повторение симуляции
+    :return: номер повторения, выручка, доля свободных номеров
+    """
+    kwargs = dict(kwargs)
+    demand_rng, policy_rng = replication_streams(entropy, replication)
+    if trace_path:
+        kwargs['event'] = _open_trace(trace_path).replay(replication)
+    else:
+        # решения клиентов разыгрываются вместе с запросами, стратегии достается только policy_rng
+        mu = describe(simulate, args, kwargs)['mu']
+        kwargs['event'] = EventGenerator(mu=mu, rng=demand_rng, acceptance_draws=True)
+    total_revenue, _, hotel_state = simulate(*args, rng=policy_rng, **kwargs)
+    return replication, total_revenue, hotel_state
+
+
+class Runner:
+    """
+    Параллельный запуск повторений simulate() на пуле процессов.
+    Каждое повторение получает свои генераторы, порожденные от SeedSequence по номеру повторения,
+    поэтому результаты одинаковы при любом числе процессов. Поток спроса и решений клиентов отделен от потока
+    стратегии (replication_streams), поэтому simulate() должна принимать event и mu.
+    Пул переиспользуется между точками перебора.
+    Если задано хранилище результатов, уже посчитанные повторения берутся из него, а новые записываются.
+    """
+
+    def __init__(self, workers=None, seed=None, store=None):
+        """
+        Инициализация
+        :param workers: число процессов, по умолчанию по числу ядер; 1 -- считать в текущем процессе
+        :param seed: зерно эксперимента, None -- случайное
+        :param store: экземпляр класса ResultStore
+        """
+        self.workers = workers or os.cpu_count()
+        self.entropy = np.random.SeedSequence(seed).entropy
+        self.store = store
+        self.executor = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self
+
+    def __exit__(self, *exc):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def run_sweep(self, simulate, points, iter_count, trace_path=None, replications=None, progress=True):
+        """
+        Повторения simulate() для нескольких точек перебора. Повторение k всех точек использует один
+        и тот же поток спроса и решений клиентов, т.е. точки сравниваются на общих случайных числах
+        :param simulate: функция симуляции, принимающая rng и возвращающая (выручка, стратегия, доля свободных)
+        :param points: список пар (args, kwargs) для simulate
+        :param iter_count: число повторений на точку
+        :param trace_path: каталог трасс запросов для воспроизведения, повторение k воспроизводит трассу k;
+            трасс должно хватать на все повторения, а дней -- на горизонт симуляции
+        :param replications: номера повторений, по умолчанию range(iter_count)
+        :param progress: показывать ли прогресс
+        :return: для каждой точки пара массивов (выручки, доли свободных номеров) в порядке повторений
+        """
+        if replications is None:
+            replications = range(iter_count)
+        replications = list(replications)
+        position = {replication: k for k, replication in enumerate(replications)}
+        results = [(np.zeros(len(replications)), np.zeros(len(replications))) for _ in points]
+
+        configs = [
+            dict(describe(simulate, args, kwargs), seed=self.entropy, trace=trace_path) for args, kwargs in points
+        ]
+        if trace_path:
+            trace = _open_trace(trace_path)
+            for config in configs:
+                trace.check(replications, config['number_of_days'])
+
+        jobs = []
+        for point, (args, kwargs) in enumerate(points):
+            cached = self.store.load(configs[point]) if self.store is not None else {}
+            for replication in replications:
+                if replication in cached:
+                    self._put(results[point], position, (replication, *cached[replication]))
+                else:
+                    jobs.append((point, (simulate, args, kwargs, self.entropy, replication, trace_path)))
+
+        bar = tqdm(total=len(jobs), disable=not progress)
+        if self.executor is None:
+            for point, job in jobs:
+                self._collect(results, position, configs, point, _run_replication(*job))
+                bar.update()
+        else:
+            futures = {self.executor.submit(_run_replication, *job): point for point, job in jobs}
+            for future in as_completed(futures):
+                self._collect(results, position, configs, futures[future], future.result())
+                bar.update()
+        bar.close()
+        return results
+
+    def run(self, simulate, iter_count, args=(), kwargs=None, trace_path=None, replications=None, progress=True):
+        """
+        Повторения simulate() для одной точки
+        :return: массивы выручек и долей свободных номеров в порядке повторений
+        """
+        return self.run_sweep(
+            simulate, [(args, kwargs or {})], iter_count,
+            trace_path=trace_path, replications=replications, progress=progress
+        )[0]
+
+    def _collect(self, results, position, configs, point, row):
+        self._put(results[point], position, row)
+        if self.store is not None:
+            self.store.save(configs[point], [row])
+
+    @staticmethod
+    def _put(result, position, row):
+        replication, total_revenue, hotel_state = row
+        result[0][position[replication]] = total_revenue
+        result[1][position[replication]] = hotel_state
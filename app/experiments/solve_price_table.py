@@ -0,0 +1,46 @@
+import argparse
+from datetime import datetime
+
+from app.utils.acceptance_rule import AcceptanceRule
+from app.utils.event_generator import EventGenerator
+from app.utils.price_optimizer import PriceOptimizer
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nominal_price', default=1000)
+    parser.add_argument('--number_of_rooms', default=15)
+    parser.add_argument('--mu', default=30)
+    parser.add_argument('--event_params', default=None)
+    parser.add_argument('--output', default='./app/logs/optimal_price_table.csv')
+    args = parser.parse_args()
+
+    nominal_price = float(args.nominal_price)
+    # модель спроса: оцененная по журналу броней (fit_distributions) или по умолчанию с интенсивностью mu
+    if args.event_params:
+        event = EventGenerator.load(args.event_params)
+    else:
+        event = EventGenerator(mu=float(args.mu))
+
+    time_begin = datetime.now()
+    optimizer = PriceOptimizer(
+        nominal_price=nominal_price,
+        number_of_rooms=int(args.number_of_rooms),
+        event=event,
+        acceptance=AcceptanceRule(nominal_price=nominal_price),
+    )
+    optimizer.solve()
+    time_diff = (datetime.now() - time_begin).total_seconds()
+    # таблица скидок, как default_strategy: simulate(..., price_table=output) или PricingDefault(table=...)
+    optimizer.price_table().save(args.output)
+
+    with open('./app/logs/price_optimizer.txt', 'a') as f:
+        f.write('solve_price_table\n')
+        f.write(f'nominal_price: {nominal_price}\n')
+        f.write(f'number_of_rooms: {args.number_of_rooms}\n')
+        f.write(f'event_params: {args.event_params or "mu " + str(args.mu)}\n')
+        f.write(f'expected revenue per night: {round(optimizer.expected_revenue(), 1)}\n')
+        f.write(f'output: {args.output}\n')
+        f.write(f'time, s: {round(time_diff, 3)}\n')
+        f.write('\n')
@@ -0,0 +1,213 @@
+import argparse
+from datetime import datetime
+from itertools import product
+import math
+
+import numpy as np
+
+from app.experiments import new_algorithm_experiments, new_algorithm_v2_experiments_iterates
+from app.experiments.runner import Runner
+from app.utils.result_store import ResultStore
+
+STRATEGY_SIMULATE = {
+    'PricingSomeMethod': new_algorithm_experiments.simulate,
+    'PricingSomeMethodv2': new_algorithm_v2_experiments_iterates.simulate,
+    'PricingSomeMethodv3': new_algorithm_v2_experiments_iterates.simulate,
+    'PricingSomeMethodv4': new_algorithm_v2_experiments_iterates.simulate,
+}
+
+
+def simulate(pricing_strategy, threshold, explore_count, number_of_days=365, mu=30, rng=None, event=None):
+    """
+    Симуляция одной конфигурации перебора
+    :return: общая выручка, стратегия, доля свободных номеров
+    """
+    return STRATEGY_SIMULATE[pricing_strategy](
+        {'threshold': threshold, 'explore_count': explore_count},
+        pricing_strategy=pricing_strategy,
+        event=event,
+        rng=rng,
+        number_of_days=number_of_days,
+        mu=mu,
+    )
+
+
+class ThresholdSweep:
+    """
+    Перебор сетки (стратегия, threshold, explore_count) с адаптивным числом повторений.
+    Сначала все конфигурации отсеиваются на коротком горизонте, затем на полном горизонте
+    число повторений растет в eta раз за раунд, а после каждого раунда остаются только конфигурации,
+    которые не проиграли лучшей по парным разностям выручки (гонка) и входят в лучшую 1/eta часть
+    (последовательное деление пополам). Повторение k всех конфигураций идет на общих случайных числах,
+    поэтому разности выручек парные.
+    """
+
+    def __init__(self, runner, configs, z=2.0, eta=2):
+        """
+        Инициализация
+        :param runner: экземпляр класса Runner
+        :param configs: список конфигураций (стратегия, threshold, explore_count)
+        :param z: квантиль для отсева по парной разности
+        :param eta: во сколько раз сокращается число конфигураций и растет число повторений за раунд
+        """
+        self.runner = runner
+        self.configs = list(configs)
+        self.z = z
+        self.eta = eta
+        # (конфигурация, горизонт) -> {номер повторения: (выручка, доля свободных номеров)}
+        self.results = {}
+        self.eliminated = {}
+
+    def evaluate(self, configs, iter_count, number_of_days):
+        """
+        Досчитать недостающие повторения 0..iter_count - 1 для конфигураций
+        :return: None
+        """
+        missing = {}
+        for config in configs:
+            done = self.results.setdefault((config, number_of_days), {})
+            replications = tuple(k for k in range(iter_count) if k not in done)
+            if replications:
+                missing.setdefault(replications, []).append(config)
+
+        for replications, group in missing.items():
+            points = [(config, {'number_of_days': number_of_days}) for config in group]
+            results = self.runner.run_sweep(simulate, points, len(replications), replications=replications)
+            for config, (revenues, hotel_states) in zip(group, results):
+                self.results[(config, number_of_days)].update(
+                    zip(replications, zip(revenues.tolist(), hotel_states.tolist()))
+                )
+
+    def revenues(self, config, number_of_days):
+        """
+        Выручки конфигурации по номерам повторений
+        :return: массив выручек в порядке номеров повторений
+        """
+        done = self.results[(config, number_of_days)]
+        return np.array([done[k][0] for k in sorted(done)])
+
+    def race(self, configs, number_of_days):
+        """
+        Отсев конфигураций, которые значимо хуже лучшей по парной разности выручки
+        :return: оставшиеся конфигурации
+        """
+        means = {config: self.revenues(config, number_of_days).mean() for config in configs}
+        best = max(configs, key=means.get)
+        best_revenues = self.revenues(best, number_of_days)
+
+        survivors = []
+        for config in configs:
+            difference = self.revenues(config, number_of_days) - best_revenues
+            if config != best and len(difference) > 1:
+                upper = difference.mean() + self.z * difference.std(ddof=1) / math.sqrt(len(difference))
+                if upper < 0:
+                    continue
+            survivors.append(config)
+        return sorted(survivors, key=means.get, reverse=True)
+
+    def halve(self, configs, number_of_days, stage):
+        """
+        Гонка и деление пополам: оставляем не проигравших лучшей и только лучшую 1/eta часть
+        :return: оставшиеся конфигурации
+        """
+        survivors = self.race(configs, number_of_days)
+        survivors = survivors[:max(1, math.ceil(len(configs) / self.eta))]
+        for config in configs:
+            if config not in survivors:
+                self.eliminated[config] = stage
+        return survivors
+
+    def run(self, screen_days, screen_iter_count, iter_count, max_iter_count, number_of_days=365):
+        """
+        Перебор
+        :param screen_days: горизонт отсеивающего этапа, 0 -- без отсева
+        :param screen_iter_count: число повторений отсеивающего этапа
+        :param iter_count: число повторений первого раунда на полном горизонте
+        :param max_iter_count: максимальное число повторений на конфигурацию
+        :param number_of_days: полный горизонт
+        :return: оставшиеся конфигурации, лучшая первая
+        """
+        survivors = self.configs
+        if screen_days:
+            self.evaluate(survivors, screen_iter_count, screen_days)
+            survivors = self.halve(survivors, screen_days, f'screen {screen_days} days')
+
+        stage = 1
+        while True:
+            self.evaluate(survivors, iter_count, number_of_days)
+            if len(survivors) == 1 or iter_count >= max_iter_count:
+                finalists = self.race(survivors, number_of_days)
+                for config in survivors:
+                    if config not in finalists:
+                        self.eliminated[config] = f'final race, {iter_count} iterations'
+                return finalists
+            survivors = self.halve(survivors, number_of_days, f'round {stage}, {iter_count} iterations')
+            iter_count = min(iter_count * self.eta, max_iter_count)
+            stage += 1
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pricing_strategies', default='PricingSomeMethodv2,PricingSomeMethodv3')
+    parser.add_argument('--thresholds', default='1.0,1.2,1.4,1.6,1.8,2,2.2,2.4,2.6,2.8,3,3.2,3.4,3.6,3.8,4')
+    parser.add_argument('--explore_counts', default='500')
+    parser.add_argument('--number_of_days', default=365)
+    parser.add_argument('--screen_days', default=90)
+    parser.add_argument('--screen_iter_count', default=4)
+    parser.add_argument('--iter_count', default=4)
+    parser.add_argument('--max_iter_count', default=64)
+    parser.add_argument('--eta', default=2)
+    parser.add_argument('--z', default=2.0)
+    parser.add_argument('--workers', default=None)
+    parser.add_argument('--seed', default=None, type=int)
+    parser.add_argument('--store', default=None)
+    args = parser.parse_args()
+
+    configs = list(product(
+        args.pricing_strategies.split(','),
+        [float(x) for x in args.thresholds.split(',')],
+        [int(x) for x in args.explore_counts.split(',')],
+    ))
+    workers = int(args.workers) if args.workers else None
+    seed = args.seed
+    store = ResultStore(args.store) if args.store else None
+    number_of_days = int(args.number_of_days)
+
+    time_begin = datetime.now()
+    with Runner(workers=workers, seed=seed, store=store) as runner:
+        sweep = ThresholdSweep(runner, configs, z=float(args.z), eta=int(args.eta))
+        survivors = sweep.run(
+            screen_days=int(args.screen_days),
+            screen_iter_count=int(args.screen_iter_count),
+            iter_count=int(args.iter_count),
+            max_iter_count=int(args.max_iter_count),
+            number_of_days=number_of_days,
+        )
+    time_diff = (datetime.now() - time_begin).total_seconds()
+
+    with open('./app/logs/threshold_sweep.txt', 'a') as f:
+        f.write('threshold_sweep\n')
+        f.write(f'configs: {len(configs)}\n')
+        f.write(f'seed: {runner.entropy}\n')
+        f.write(f'loops: {sum(len(done) for done in sweep.results.values())}\n')
+        f.write(f'time, s: {round(time_diff, 2)}\n')
+        f.write('\n')
+        for config in survivors + [config for config in configs if config in sweep.eliminated]:
+            pricing_strategy, threshold, explore_count = config
+            done = sweep.results.get((config, number_of_days), {})
+            status = f'eliminated at {sweep.eliminated[config]}' if config in sweep.eliminated else 'survived'
+            res = [revenue for revenue, _ in done.values()]
+            hotel_states = [hotel_state for _, hotel_state in done.values()]
+            f.write(f'{pricing_strategy}\n')
+            f.write(f'threshold: {threshold}\n')
+            f.write(f'explore_count: {explore_count}\n')
+            f.write(f'status: {status}\n')
+            f.write(f'iter_counts: {len(res)}\n')
+            if res:
+                f.write(f'revenue_mean: {round(np.mean(res), 0)}\n')
+                f.write(f'revenue_std: {round(np.std(res), 0)}\n')
+                f.write(f'hotel_states_mean: {round(np.mean(hotel_states), 4)}\n')
+                f.write(f'hotel_states_std: {round(np.std(hotel_states), 4)}\n')
+            f.write('\n')
+        f.write('\n')
@@ -1,5 +1,9 @@
+import math
+
 import numpy as np
-from scipy.stats import norm
+
+# 1 - Phi(x) = erfc(x / sqrt(2)) / 2, без scipy
+_erfc = np.vectorize(math.erfc, otypes=[float])
 
 
 class AcceptanceRule:
@@ -9,12 +13,16 @@ class AcceptanceRule:
     где Phi -- cdf стандартного нормального распределения, а rho таким образом, что вероятность принятия при
     отклонении на 50% от номинальной цены 0 и 1 соответственно.
     Здесь price_{algo} и price_{nominal} нормированы относительно price_{nominal}, т.е. price_{nominal} = 1.
+    Цены берутся из небольшой известной сетки, поэтому вероятности принятия считаются один раз на цену
+    и кешируются, а решение сводится к сравнению с равномерным числом.
     """
-    def __init__(self, nominal_price=None, rho=None):
+    def __init__(self, nominal_price=None, rho=None, prices=None, rng=None):
         """
         Инициализация
         :param nominal_price: номинальная цена
         :param rho: параметр rho
+        :param prices: сетка цен, для которой вероятности принятия считаются заранее
+        :param rng: генератор случайных чисел numpy
         """
         if not nominal_price:
             self.nominal_price = 1000
@@ -23,12 +31,66 @@ class AcceptanceRule:
 
         if not rho:
             self.rho = 4.66
+        else:
+            self.rho = rho
+
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        self.acceptance_table = {}
+        if prices is not None:
+            prices = np.asarray(prices, dtype=float)
+            self.acceptance_table.update(zip(prices.tolist(), self.acceptance_chance(prices).tolist()))
+
+    def acceptance_chance(self, price):
+        """
+        Вероятность принятия цены
+        :param price: цена или массив цен
+        :return: вероятность принятия
+        """
+        return 0.5 * _erfc(self.rho * (np.asarray(price, dtype=float) / self.nominal_price - 1) / math.sqrt(2))
+
+    def get_acceptance_chance(self, price):
+        """
+        Вероятность принятия цены из таблицы, при промахе значение считается и запоминается
+        :param price: цена
+        :return: вероятность принятия
+        """
+        chance = self.acceptance_table.get(price)
+        if chance is None:
+            chance = float(self.acceptance_chance(price))
+            self.acceptance_table[price] = chance
+        return chance
 
-    def decision(self, price):
+    def willingness_to_pay(self, size=None):
+        """
+        Готовность клиентов платить: клиент принимает любую цену ниже своей.
+        P(wtp > price) = 1 - Phi(rho (price / nominal_price - 1)), т.е. wtp = nominal_price * (1 + Z / rho)
+        :param size: число клиентов
+        :return: максимальная приемлемая цена
+        """
+        return self.nominal_price * (1 + self.rng.standard_normal(size) / self.rho)
+
+    def decision(self, price, u=None):
         """
         Принятие решения о бронировании при указанной цене
         :param price: цена
+        :param u: равномерное на [0, 1) число, если решение нужно воспроизвести
         :return: забронировали или нет
         """
-        acceptance_chance = 1 - norm.cdf(self.rho * (price / self.nominal_price - 1))
-        return np.random.choice([0, 1], p=[1-acceptance_chance, acceptance_chance])
+        if u is None:
+            u = self.rng.random()
+        return int(u < self.get_acceptance_chance(price))
+
+    def decision_batch(self, prices, u=None):
+        """
+        Принятие решений о бронировании сразу для массива цен
+        :param prices: цены
+        :param u: равномерные на [0, 1) числа, если решения нужно воспроизвести
+        :return: массив решений из 0 и 1
+        """
+        prices = np.asarray(prices, dtype=float)
+        unique, inverse = np.unique(prices, return_inverse=True)
+        chances = np.array([self.get_acceptance_chance(price) for price in unique.tolist()])
+        if u is None:
+            u = self.rng.random(len(prices))
+        return (u < chances[inverse.reshape(prices.shape)]).astype(int)
@@ -0,0 +1,144 @@
+import numpy as np
+
+# столбцы журнала, номера заказа -- последним, т.к. это двумерный массив
+LEDGER_COLUMNS = ('uid', 'start_day', 'end_day', 'persons', 'price', 'cancel_day', 'rooms')
+
+
+class BookingLedger:
+    """
+    Журнал действующих броней в колоночном виде: массивы uid, день заезда, последний занятый день,
+    число гостей, цена за гостя, день отмены (-1 -- без отмены) и номера, занятые заказом.
+    Строки идут в порядке бронирования. Отмены дня и выручка дня считаются масками по массивам,
+    а брони с днем заезда раньше дня, выручка которого уже получена, удаляются из журнала,
+    поэтому память зависит от числа действующих броней, а не от горизонта симуляции.
+    """
+
+    def __init__(self, capacity=256, room_slots=4):
+        """
+        Инициализация
+        :param capacity: начальное число строк
+        :param room_slots: начальное число номеров на заказ, растет при необходимости
+        """
+        self.size = 0
+        self.uid = np.zeros(capacity, dtype=np.int64)
+        self.start_day = np.zeros(capacity, dtype=np.int32)
+        self.end_day = np.zeros(capacity, dtype=np.int32)
+        self.persons = np.zeros(capacity, dtype=np.int32)
+        self.price = np.zeros(capacity)
+        self.cancel_day = np.zeros(capacity, dtype=np.int32)
+        self.rooms = np.full([capacity, room_slots], -1, dtype=np.int32)
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, capacity, room_slots):
+        """
+        Увеличение массивов
+        :param capacity: нужное число строк
+        :param room_slots: нужное число номеров на заказ
+        :return: None
+        """
+        if capacity > len(self.uid):
+            capacity = max(capacity, 2 * len(self.uid))
+            for name in LEDGER_COLUMNS[:-1]:
+                column = getattr(self, name)
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[:self.size] = column[:self.size]
+                setattr(self, name, grown)
+        if capacity > len(self.rooms) or room_slots > self.rooms.shape[1]:
+            shape = [max(capacity, len(self.rooms)), max(room_slots, self.rooms.shape[1])]
+            rooms = np.full(shape, -1, dtype=np.int32)
+            rooms[:self.size, :self.rooms.shape[1]] = self.rooms[:self.size]
+            self.rooms = rooms
+
+    def add(self, uid, rooms, start_day, end_day, price, cancel_day=None):
+        """
+        Запись брони
+        :param uid: номер заказа
+        :param rooms: номера, занятые заказом
+        :param start_day: день заезда
+        :param end_day: последний занятый день
+        :param price: цена за гостя
+        :param cancel_day: день отмены, None -- без отмены
+        :return: None
+        """
+        self._grow(self.size + 1, len(rooms))
+        row = self.size
+        self.uid[row] = uid
+        self.start_day[row] = start_day
+        self.end_day[row] = end_day
+        self.persons[row] = len(rooms)
+        self.price[row] = price
+        self.cancel_day[row] = -1 if cancel_day is None else cancel_day
+        self.rooms[row, :len(rooms)] = rooms
+        self.size += 1
+
+    def _keep(self, mask):
+        """
+        Оставить в журнале только строки mask, сохраняя порядок
+        :param mask: маска строк
+        :return: None
+        """
+        size = int(mask.sum())
+        for name in LEDGER_COLUMNS:
+            column = getattr(self, name)
+            column[:size] = column[:self.size][mask]
+        self.size = size
+
+    def snapshot(self):
+        """
+        Действующие брони для сохранения
+        :return: словарь массивов
+        """
+        return {name: getattr(self, name)[:self.size] for name in LEDGER_COLUMNS}
+
+    def restore(self, snapshot):
+        """
+        Восстановление броней из snapshot
+        :param snapshot: словарь из snapshot()
+        :return: None
+        """
+        rooms = np.asarray(snapshot['rooms'])
+        size = len(rooms)
+        self.size = 0
+        self._grow(size, rooms.shape[1])
+        for name in LEDGER_COLUMNS[:-1]:
+            getattr(self, name)[:size] = snapshot[name]
+        self.rooms[:size] = -1
+        self.rooms[:size, :rooms.shape[1]] = rooms
+        self.size = size
+
+    def cancel(self, day):
+        """
+        Удаление броней, отменяемых в день day
+        :param day: день отмены
+        :return: список (uid, номера, день заезда, последний занятый день) в порядке бронирования
+        """
+        cancelled = self.cancel_day[:self.size] == day
+        if not cancelled.any():
+            return []
+        rows = np.flatnonzero(cancelled)
+        result = [
+            (uid, rooms[:persons], start_day, end_day)
+            for uid, rooms, start_day, end_day, persons in zip(
+                self.uid[rows].tolist(), self.rooms[rows].tolist(), self.start_day[rows].tolist(),
+                self.end_day[rows].tolist(), self.persons[rows].tolist()
+            )
+        ]
+        self._keep(~cancelled)
+        return result
+
+    def revenue(self, day):
+        """
+        Выручка броней с заездом в день day. Брони с заездом раньше day удаляются
+        :param day: день заезда
+        :return: выручка
+        """
+        start_day = self.start_day[:self.size]
+        past = start_day < day
+        if past.any():
+            self._keep(~past)
+            start_day = self.start_day[:self.size]
+        rows = start_day == day
+        # сумма слева направо в порядке бронирования, как при обходе словаря броней
+        return sum((self.price[:self.size][rows] * self.persons[:self.size][rows]).tolist())
@@ -0,0 +1,102 @@
+import numpy as np
+
+
+class DemandEstimator:
+    """
+    Оценка числа запросов с глубиной бронирования не больше заданной.
+    Для каждой глубины хранится кольцевой буфер последних window записанных дневных чисел запросов
+    (массив [глубина, window]); глубина продвигается только в те дни, когда по ней были запросы.
+    Суммы буферов по глубинам поддерживаются при записи, а накопленные по глубине суммы пересчитываются
+    один раз в день, поэтому запрос оценки -- O(1), а дневное обновление -- O(число глубин).
+    При заданном smoothing вместо окна используется экспоненциальное сглаживание дневных чисел,
+    оценка приводится к масштабу окна: window * сглаженное число.
+    Массивы растут, если приходит запрос глубже max_depth, например из журнала броней.
+    """
+
+    def __init__(self, window=7, max_depth=30, smoothing=None):
+        """
+        Инициализация
+        :param window: число последних записей по глубине
+        :param max_depth: максимальная глубина бронирования
+        :param smoothing: вес новой записи при экспоненциальном сглаживании, None -- окно
+        """
+        self.window = window
+        self.max_depth = max_depth
+        self.smoothing = smoothing
+        self.buffer = np.zeros([max_depth + 1, window], dtype=np.int64)
+        self.position = np.zeros(max_depth + 1, dtype=np.int64)
+        self.sums = np.zeros(max_depth + 1, dtype=np.int64)
+        self.level = np.zeros(max_depth + 1)
+        self.cumulative = [0] * (max_depth + 1)
+
+    def _grow(self, size):
+        """
+        Увеличение массивов по глубине
+        :param size: нужное число глубин
+        :return: None
+        """
+        grow = size - len(self.sums)
+        if grow <= 0:
+            return
+        self.buffer = np.pad(self.buffer, [(0, grow), (0, 0)])
+        self.position = np.pad(self.position, (0, grow))
+        self.sums = np.pad(self.sums, (0, grow))
+        self.level = np.pad(self.level, (0, grow))
+        self.max_depth = size - 1
+
+    def update(self, counts):
+        """
+        Запись дневных чисел запросов
+        :param counts: словарь {глубина: число запросов}
+        :return: None
+        """
+        if counts:
+            depths = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            values = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+            self._grow(int(depths.max()) + 1)
+            if self.smoothing is None:
+                position = self.position[depths]
+                self.sums[depths] += values - self.buffer[depths, position]
+                self.buffer[depths, position] = values
+                self.position[depths] = (position + 1) % self.window
+            else:
+                self.level[depths] += self.smoothing * (values - self.level[depths])
+
+        if self.smoothing is None:
+            self.cumulative = np.cumsum(self.sums).tolist()
+        else:
+            self.cumulative = (self.window * np.cumsum(self.level)).tolist()
+
+    def snapshot(self):
+        """
+        Состояние оценки для сохранения
+        :return: словарь массивов
+        """
+        return {'buffer': self.buffer, 'position': self.position, 'sums': self.sums, 'level': self.level}
+
+    def restore(self, snapshot):
+        """
+        Восстановление оценки из snapshot
+        :param snapshot: словарь из snapshot()
+        :return: None
+        """
+        if np.shape(snapshot['buffer'])[1] != self.window:
+            raise ValueError('размер окна снимка не совпадает с оценкой')
+        self.max_depth = len(snapshot['sums']) - 1
+        self.buffer = np.array(snapshot['buffer'], dtype=np.int64)
+        self.position = np.array(snapshot['position'], dtype=np.int64)
+        self.sums = np.array(snapshot['sums'], dtype=np.int64)
+        self.level = np.array(snapshot['level'], dtype=float)
+        if self.smoothing is None:
+            self.cumulative = np.cumsum(self.sums).tolist()
+        else:
+            self.cumulative = (self.window * np.cumsum(self.level)).tolist()
+
+    def query(self, depth):
+        """
+        Оценка числа запросов с глубиной не больше depth
+        :param depth: глубина бронирования
+        :return: сумма по глубинам 0..depth
+        """
+        # глубже max_depth запросов еще не было
+        return self.cumulative[min(depth, len(self.cumulative) - 1)]
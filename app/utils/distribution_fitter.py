@@ -0,0 +1,173 @@
+import numpy as np
+
+from app.utils.event_generator import EventGenerator
+from app.utils.request_stream import DEFAULT_COLUMNS, read_chunks, to_batches
+
+
+def _add(histogram, counts):
+    """
+    Сумма двух гистограмм разной длины
+    :param histogram: массив счетчиков
+    :param counts: массив счетчиков
+    :return: новая гистограмма длины max из двух
+    """
+    result = np.zeros(max(len(histogram), len(counts)), dtype=np.int64)
+    result[:len(histogram)] += histogram
+    result[:len(counts)] += counts
+    return result
+
+
+class DistributionFitter:
+    """
+    Оценка распределений EventGenerator по журналу броней за один проход.
+    Каждая пачка запросов добавляется в гистограммы np.bincount: продолжительность, число гостей,
+    глубина, число отмен по глубине, глубина отмены по глубине заказа (двумерная гистограмма через
+    индекс глубина * (D + 1) + глубина отмены) и число запросов по дням прихода.
+    В памяти только гистограммы, поэтому размер журнала не ограничен; гистограммы двух оценщиков
+    можно сложить через merge, например при параллельном чтении нескольких файлов.
+    """
+
+    def __init__(self, max_depth=30):
+        """
+        Инициализация
+        :param max_depth: начальная максимальная глубина, растет при необходимости
+        """
+        self.LoS = np.zeros(0, dtype=np.int64)
+        self.persons = np.zeros(0, dtype=np.int64)
+        self.depth = np.zeros(max_depth + 1, dtype=np.int64)
+        self.cancelled = np.zeros(max_depth + 1, dtype=np.int64)
+        self.cancellation_depth = np.zeros([max_depth + 1, max_depth + 1], dtype=np.int64)
+        # число запросов по дням прихода, начиная с first_day
+        self.first_day = None
+        self.day_counts = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return int(self.depth.sum())
+
+    def _grow_depth(self, size):
+        """
+        Увеличение гистограмм по глубине
+        :param size: нужное число глубин
+        :return: None
+        """
+        if size <= len(self.depth):
+            return
+        self.depth = _add(self.depth, np.zeros(size, dtype=np.int64))
+        self.cancelled = _add(self.cancelled, np.zeros(size, dtype=np.int64))
+        table = np.zeros([size, size], dtype=np.int64)
+        table[:len(self.cancellation_depth), :len(self.cancellation_depth)] = self.cancellation_depth
+        self.cancellation_depth = table
+
+    def _add_day_counts(self, first_day, counts):
+        """
+        Добавление числа запросов по дням
+        :param first_day: день первого счетчика
+        :param counts: число запросов по дням начиная с first_day
+        :return: None
+        """
+        if self.first_day is None:
+            self.first_day = first_day
+        if first_day < self.first_day:
+            self.day_counts = np.concatenate([np.zeros(self.first_day - first_day, dtype=np.int64), self.day_counts])
+            self.first_day = first_day
+        offset = first_day - self.first_day
+        self.day_counts = _add(self.day_counts, np.concatenate([np.zeros(offset, dtype=np.int64), counts]))
+
+    def update(self, batch):
+        """
+        Добавление пачки запросов
+        :param batch: экземпляр класса RequestBatch
+        :return: None
+        """
+        if not len(batch):
+            return
+        self.LoS = _add(self.LoS, np.bincount(batch.LoS))
+        self.persons = _add(self.persons, np.bincount(batch.persons))
+        self._grow_depth(int(batch.depth.max()) + 1)
+        size = len(self.depth)
+        self.depth += np.bincount(batch.depth, minlength=size)
+
+        cancelled = batch.cancellation >= 0
+        depth = batch.depth[cancelled]
+        # глубина отмены не больше глубины заказа
+        offset = np.minimum(batch.cancellation[cancelled], depth)
+        self.cancelled += np.bincount(depth, minlength=size)
+        self.cancellation_depth += np.bincount(depth * size + offset, minlength=size * size).reshape(size, size)
+
+        first_day = int(batch.day.min())
+        self._add_day_counts(first_day, np.bincount(batch.day - first_day))
+
+    def merge(self, other):
+        """
+        Добавление гистограмм другого оценщика
+        :param other: экземпляр класса DistributionFitter
+        :return: None
+        """
+        self.LoS = _add(self.LoS, other.LoS)
+        self.persons = _add(self.persons, other.persons)
+        self._grow_depth(len(other.depth))
+        size = len(other.depth)
+        self.depth[:size] += other.depth
+        self.cancelled[:size] += other.cancelled
+        self.cancellation_depth[:size, :size] += other.cancellation_depth
+        if other.first_day is not None:
+            self._add_day_counts(other.first_day, other.day_counts)
+
+    @classmethod
+    def from_file(cls, path, columns=None, chunk_size=1_000_000):
+        """
+        Оценка по журналу .csv или .parquet, файл читается кусками и не обязан быть упорядочен
+        :param path: путь к файлу
+        :param columns: словарь поле запроса -> столбец файла поверх DEFAULT_COLUMNS
+        :param chunk_size: число строк в куске
+        :return: экземпляр класса DistributionFitter
+        """
+        columns = dict(DEFAULT_COLUMNS, **(columns or {}))
+        fitter = cls()
+        chunks = read_chunks(path, [column for column in columns.values() if column], chunk_size)
+        for batch in to_batches(chunks, columns):
+            fitter.update(batch)
+        return fitter
+
+    def params(self):
+        """
+        Оцененные параметры в формате EventGenerator.from_params
+        :return: словарь массивов
+        """
+        if not len(self):
+            raise ValueError('нет данных для оценки')
+        depth = self.depth[:int(np.flatnonzero(self.depth).max()) + 1]
+        size = len(depth)
+        request_number = np.bincount(self.day_counts)
+        return {
+            'LoS_values': np.arange(len(self.LoS)),
+            'LoS_probs': self.LoS / self.LoS.sum(),
+            'persons_values': np.arange(len(self.persons)),
+            'persons_probs': self.persons / self.persons.sum(),
+            'depth_values': np.arange(size),
+            'depth_probs': depth / depth.sum(),
+            'request_number_values': np.arange(len(request_number)),
+            'request_number_probs': request_number / request_number.sum(),
+            'mu': np.float64(self.day_counts.mean()),
+            'cancellation_chance': np.divide(
+                self.cancelled[:size], depth, out=np.zeros(size), where=depth > 0
+            ),
+            'cancellation_depth_probs': self.cancellation_depth[:size, :size].astype(float),
+        }
+
+    def save(self, path):
+        """
+        Сохранение параметров в файл .npz для EventGenerator.load
+        :param path: путь к файлу
+        :return: None
+        """
+        np.savez(path, **self.params())
+
+    def to_generator(self, rng=None, poisson=False):
+        """
+        Генератор запросов с оцененными распределениями
+        :param rng: генератор случайных чисел numpy
+        :param poisson: брать число запросов за день из распределения Пуассона с оцененным mu
+        :return: экземпляр класса EventGenerator
+        """
+        return EventGenerator.from_params(self.params(), rng=rng, poisson=poisson)
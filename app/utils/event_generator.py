@@ -1,10 +1,112 @@
-import sys
-sys.path.append('D:/git/dynamic_pricing/app/utils')
+from functools import lru_cache
+import math
 
 import numpy as np
-from scipy.stats import bernoulli, poisson, rv_discrete
 
-from request import Request
+from app.utils.request import RequestBatch
+
+# распределения по умолчанию: значения и вероятности
+DEFAULT_LOS = (
+    np.arange(1, 9),
+    [0.382844, 0.217141, 0.153037, 0.100752, 0.059283, 0.038609, 0.033461, 0.014873],
+)
+DEFAULT_PERSONS = (
+    np.arange(1, 6),
+    [0.607341, 0.326343, 0.053066, 0.011490, 0.001760],
+)
+DEFAULT_DEPTH = (
+    np.arange(31),
+    [0.215860, 0.119922, 0.081003, 0.063378, 0.049164, 0.040811, 0.035930,
+     0.030865, 0.028687, 0.027782, 0.023071, 0.021199, 0.020164, 0.018959,
+     0.019762, 0.017536, 0.017516, 0.016372, 0.015004, 0.013438, 0.014983,
+     0.012648, 0.012206, 0.012499, 0.011484, 0.010770, 0.010136, 0.010729,
+     0.009490, 0.009517, 0.009115],
+)
+DEFAULT_CANCELLATION_CHANCE = 0.25
+
+
+def inverse_cdf(values, probs):
+    """
+    Таблица обратной функции распределения по значениям и вероятностям
+    :param values: значения
+    :param probs: вероятности
+    :return: значения и функция распределения в них
+    """
+    probs = np.asarray(probs, dtype=float)
+    cdf = np.cumsum(probs) / np.sum(probs)
+    cdf[-1] = 1.0
+    return np.asarray(values), cdf
+
+
+def make_inverse_cdf(rv, tail=1e-12):
+    """
+    Таблица обратной функции распределения для дискретной случайной величины
+    :param rv: дискретное распределение scipy
+    :param tail: отбрасываемая вероятность хвоста для распределений с бесконечным носителем
+    :return: значения и функция распределения в них
+    """
+    if hasattr(rv, 'xk'):
+        return inverse_cdf(rv.xk, rv.pk)
+    low, _ = rv.support()
+    values = np.arange(low, rv.ppf(1 - tail) + 1).astype(int)
+    return inverse_cdf(values, rv.pmf(values))
+
+
+def _read_only(*arrays):
+    # таблицы общие для всех генераторов процесса, поэтому защищены от записи
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+
+@lru_cache(maxsize=None)
+def poisson_table(mu, tail=1e-12):
+    """
+    Таблица обратной функции распределения Пуассона, строится один раз на процесс для каждого mu
+    :param mu: интенсивность
+    :param tail: отбрасываемая вероятность хвоста
+    :return: значения и функция распределения в них
+    """
+    if mu == 0:
+        # спроса нет: log(0) не определен, распределение вырождено в нуле
+        return _read_only(np.array([0]), np.array([1.0]))
+    values = np.arange(int(mu + 40 * math.sqrt(mu) + 40))
+    probs = np.exp(values * math.log(mu) - mu - np.array([math.lgamma(k + 1) for k in values.tolist()]))
+    # носитель обрезается по квантилю 1 - tail, как rv.ppf(1 - tail) в make_inverse_cdf
+    size = int(np.searchsorted(np.cumsum(probs), 1 - tail)) + 1
+    return _read_only(*inverse_cdf(values[:size], probs[:size]))
+
+
+@lru_cache(maxsize=None)
+def cancellation_depth_table(max_depth=30):
+    """
+    Функции распределения глубины отмены для заказов глубины 1..max_depth. Фиксируем 40% отмен
+    в последний день с распределением ((R + 1 - i) / (R + 1)) ** alpha - ((R - i) / (R + 1)) ** alpha,
+    alpha = np.log(0.6) / np.log(R / (R + 1)). Строится один раз на процесс
+    :param max_depth: максимальная глубина заказа
+    :return: массив [глубина заказа, глубина отмены]; хвост строки заполнен единицами,
+    чтобы поиск не выходил за носитель
+    """
+    table = np.ones([max_depth + 1, max_depth + 1])
+    for depth in range(1, max_depth + 1):
+        i = np.arange(depth + 1)
+        alpha = np.log(0.6) / np.log(depth / (depth + 1))
+        y = ((depth + 1 - i) / (depth + 1)) ** alpha - ((depth - i) / (depth + 1)) ** alpha
+        table[depth, i] = inverse_cdf(i, y)[1]
+    return _read_only(table)[0]
+
+
+@lru_cache(maxsize=None)
+def default_tables():
+    """
+    Таблицы распределений по умолчанию, строятся один раз на процесс
+    :return: словарь таблиц (значения, функция распределения)
+    """
+    return {
+        'LoS': _read_only(*inverse_cdf(*DEFAULT_LOS)),
+        'persons': _read_only(*inverse_cdf(*DEFAULT_PERSONS)),
+        'depth': _read_only(*inverse_cdf(*DEFAULT_DEPTH)),
+    }
 
 
 class EventGenerator:
@@ -12,6 +114,10 @@ class EventGenerator:
     Класс, отвечающий за генерацию запросов.
     Многие цифры в распределениии являются "магическими"
     и были выявлены опытным путем куратором проекта.
+    Все распределения сводятся к таблицам обратной функции распределения,
+    поэтому запросы можно генерировать сразу пачкой на день или на весь горизонт.
+    Таблицы распределений по умолчанию строятся на NumPy один раз на процесс и общие для всех генераторов,
+    scipy нужен только для пользовательских распределений, которые передаются уже готовыми объектами.
     """
     def __init__(
             self,
@@ -20,56 +126,140 @@ class EventGenerator:
             rv_depth=None,
             rv_request_number=None,
             rv_cancelation=None,
-            mu=None
+            mu=None,
+            rng=None,
+            acceptance_draws=False
     ):
         """
         Инициализация
         :param rv_LoS: распределение продолжительности заказа
         :param rv_persons: распределение числа гостей
         :param rv_depth: распределение глубины бронирования
-        :param rv_request_number: распределение числа запросов
+        :param rv_request_number: распределение числа запросов, по умолчанию Пуассона с параметром mu
         :param rv_cancellation: распределение отмены броней
         :param mu: интенсивность прибытия
+        :param rng: генератор случайных чисел numpy
+        :param acceptance_draws: разыгрывать ли вместе с запросом равномерное число для решения клиента,
+            чтобы решения зависели только от потока запросов, а не от стратегии
         """
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.acceptance_draws = acceptance_draws
+        # число сгенерированных запросов, например для контрольной переменной
+        self.generated = 0
+        tables = default_tables()
 
-        if not rv_LoS:
-            x_LoS = np.arange(1, 9)
-            y_LoS = [0.382844, 0.217141, 0.153037, 0.100752, 0.059283, 0.038609, 0.033461, 0.014873]
-            self.rv_LoS = rv_discrete(name='LoS', values=(x_LoS, y_LoS))
+        self.LoS_values, self.LoS_cdf = make_inverse_cdf(rv_LoS) if rv_LoS else tables['LoS']
+        self.persons_values, self.persons_cdf = make_inverse_cdf(rv_persons) if rv_persons else tables['persons']
+        self.depth_values, self.depth_cdf = make_inverse_cdf(rv_depth) if rv_depth else tables['depth']
+
+        if rv_request_number:
+            self.request_number_values, self.request_number_cdf = make_inverse_cdf(rv_request_number)
+        elif mu is None:
+            raise ValueError('нужно задать интенсивность прибытия mu или распределение числа запросов')
         else:
-            self.rv_LoS = rv_LoS
+            self.request_number_values, self.request_number_cdf = poisson_table(mu)
 
-        if not rv_persons:
-            x_persons = np.arange(1, 6)
-            y_persons = [0.607341, 0.326343, 0.053066, 0.011490, 0.001760]
-            self.rv_persons = rv_discrete(name='persons', values=(x_persons, y_persons))
+        # вероятность отмены по глубине заказа; заказы в день заезда не отменяются
+        max_depth = int(self.depth_values.max())
+        if rv_cancelation:
+            self.cancellation_chance = np.full(max_depth + 1, float(rv_cancelation.mean()))
         else:
-            self.rv_persons = rv_persons
-
-        if not rv_depth:
-            x_depth = np.arange(31)
-            y_depth = [0.215860, 0.119922, 0.081003, 0.063378, 0.049164, 0.040811, 0.035930,
-                       0.030865, 0.028687, 0.027782, 0.023071, 0.021199, 0.020164, 0.018959,
-                       0.019762, 0.017536, 0.017516, 0.016372, 0.015004, 0.013438, 0.014983,
-                       0.012648, 0.012206, 0.012499, 0.011484, 0.010770, 0.010136, 0.010729,
-                       0.009490, 0.009517, 0.009115]
-            self.rv_depth = rv_discrete(name='depth', values=(x_depth, y_depth))
+            self.cancellation_chance = np.full(max_depth + 1, DEFAULT_CANCELLATION_CHANCE)
+        self.cancellation_chance[0] = 0
+
+        # строка depth -- функция распределения глубины отмены для заказа глубины depth
+        if max_depth == 30:
+            self.cancellation_depth_cdf = cancellation_depth_table(max_depth)
         else:
-            self.rv_depth = rv_depth
+            table = cancellation_depth_table()
+            size = min(max_depth, table.shape[0] - 1) + 1
+            self.cancellation_depth_cdf = np.ones([max_depth + 1, max_depth + 1])
+            self.cancellation_depth_cdf[:size, :size] = table[:size, :size]
 
-        if not rv_request_number:
-            self.rv_request_number = poisson(mu)
+    @classmethod
+    def from_params(cls, params, rng=None, poisson=False):
+        """
+        Генератор по оцененным параметрам, например из DistributionFitter.params
+        :param params: словарь: LoS, persons, depth, request_number -- значения *_values и вероятности *_probs,
+            mu -- средняя интенсивность, cancellation_chance -- вероятность отмены по глубине заказа,
+            cancellation_depth_probs -- массив [глубина заказа, глубина отмены] частот отмен
+        :param rng: генератор случайных чисел numpy
+        :param poisson: брать число запросов за день из распределения Пуассона с параметром mu,
+            а не из оцененного распределения
+        :return: экземпляр класса EventGenerator
+        """
+        generator = cls(mu=float(params['mu']), rng=rng)
+        for name in ('LoS', 'persons', 'depth', 'request_number'):
+            if name == 'request_number' and poisson:
+                continue
+            values, cdf = inverse_cdf(params[f'{name}_values'], params[f'{name}_probs'])
+            setattr(generator, f'{name}_values', values)
+            setattr(generator, f'{name}_cdf', cdf)
 
-        if not rv_cancelation:
-            chance = 0.25
-            self.rv_cancellation = bernoulli(chance)
+        max_depth = int(generator.depth_values.max())
+        generator.cancellation_chance = np.zeros(max_depth + 1)
+        chance = np.asarray(params['cancellation_chance'], dtype=float)[:max_depth + 1]
+        generator.cancellation_chance[:len(chance)] = chance
 
-        self.rv_cancellation_depth = {}
-        for depth in range(1, 31):
-          i = np.arange(depth + 1)
-          alpha = np.log(0.6) / np.log(depth / (depth + 1))
-          y = ((depth + 1 - i) / (depth + 1)) ** alpha - ((depth - i) / (depth + 1)) ** alpha
-          self.rv_cancellation_depth[depth] = rv_discrete(name='cancel', values=(i, y))
+        generator.cancellation_depth_cdf = np.ones([max_depth + 1, max_depth + 1])
+        probs = np.asarray(params['cancellation_depth_probs'], dtype=float)
+        for depth in range(min(max_depth + 1, len(probs))):
+            row = probs[depth, :depth + 1]
+            if row.sum() > 0:
+                last = int(np.flatnonzero(row).max())
+                generator.cancellation_depth_cdf[depth, :last] = (np.cumsum(row) / row.sum())[:last]
+        return generator
+
+    @classmethod
+    def load(cls, path, rng=None, poisson=False):
+        """
+        Генератор по файлу параметров .npz, сохраненному DistributionFitter.save
+        :param path: путь к файлу
+        :param rng: генератор случайных чисел numpy
+        :param poisson: брать число запросов за день из распределения Пуассона с параметром mu
+        :return: экземпляр класса EventGenerator
+        """
+        with np.load(path) as params:
+            return cls.from_params(dict(params), rng=rng, poisson=poisson)
+
+    def _draw_requests(self, size):
+        """
+        Генерация параметров size запросов
+        :param size: число запросов
+        :return: массивы LoS, persons, depth, cancellation (-1 -- без отмены)
+        """
+        return self._requests_from_uniforms(self.rng.random([5, size]))
+
+    def _requests_from_uniforms(self, u):
+        """
+        Параметры запросов по равномерным числам
+        :param u: массив [5, число запросов]: LoS, persons, depth, отмена, глубина отмены
+        :return: массивы LoS, persons, depth, cancellation (-1 -- без отмены)
+        """
+        LoS = self.LoS_values[np.searchsorted(self.LoS_cdf, u[0], side='right')]
+        persons = self.persons_values[np.searchsorted(self.persons_cdf, u[1], side='right')]
+        depth = self.depth_values[np.searchsorted(self.depth_cdf, u[2], side='right')]
+
+        cancellation = (u[4][:, None] >= self.cancellation_depth_cdf[depth]).sum(axis=1)
+        cancellation[u[3] >= self.cancellation_chance[depth]] = -1
+        return LoS, persons, depth, cancellation
+
+    def generate_batch(self, number_of_days=1, first_day=0):
+        """
+        Генерация запросов сразу на несколько дней
+        :param number_of_days: число дней
+        :param first_day: номер первого дня
+        :return: экземпляр класса RequestBatch, запросы упорядочены по дню прихода
+        """
+        counts = self.request_number_values[
+            np.searchsorted(self.request_number_cdf, self.rng.random(number_of_days), side='right')
+        ]
+        day = np.repeat(np.arange(first_day, first_day + number_of_days), counts)
+        self.generated += len(day)
+        batch = RequestBatch(day, *self._draw_requests(len(day)))
+        if self.acceptance_draws:
+            batch.acceptance_draw = self.rng.random(len(day))
+        return batch
 
     def generate_cancellation(self, depth):
         """
@@ -78,11 +268,8 @@ class EventGenerator:
         :param depth: глубина заказа
         :return: глубина отмены
         """
-        if self.rv_cancellation.rvs():
-            if depth == 0:
-                return None
-
-            return self.rv_cancellation_depth[depth].rvs()
+        if self.rng.random() < self.cancellation_chance[depth]:
+            return int(np.searchsorted(self.cancellation_depth_cdf[depth], self.rng.random(), side='right'))
         else:
             return None
 
@@ -91,19 +278,73 @@ class EventGenerator:
         Генерация запроса на бронирование в соответствии с распределениями
         :return: экземпляр класса Request
         """
-        LoS = self.rv_LoS.rvs()
-        persons = self.rv_persons.rvs()
-        depth = self.rv_depth.rvs()
-        cancellation = self.generate_cancellation(depth)
-        return Request(LoS, persons, depth, cancellation)
+        return RequestBatch(np.zeros(1, dtype=int), *self._draw_requests(1)).to_requests()[0]
 
     def generate_requests(self):
         """
         Генерация запросов на бронирование в соответствии с распределением
         :return:
         """
-        number_of_requests = self.rv_request_number.rvs()
-        requests = []
-        for k in range(number_of_requests):
-            requests.append(self.generate_one_request())
-        return requests
\ No newline at end of file
+        return self.generate_batch().to_requests()
+
+
+class DayStreamEventGenerator(EventGenerator):
+    """
+    Генератор, в котором случайные числа дня d берутся из отдельного потока SeedSequence(entropy, spawn_key + (d,)):
+    сначала число запросов, затем по 6 чисел на запрос (LoS, гости, глубина, отмена, глубина отмены, решение клиента).
+    Запрос k дня d читает одни и те же позиции потока при любом числе запросов в этот и в предыдущие дни,
+    поэтому два генератора с одним seed_sequence выровнены по запросам. С antithetic=True генератор берет 1 - u
+    на тех же позициях, что дает антитетическую пару: число запросов, их параметры и решения клиентов
+    отрицательно коррелированы с исходным генератором.
+    """
+
+    def __init__(self, seed_sequence, antithetic=False, **kwargs):
+        """
+        Инициализация
+        :param seed_sequence: np.random.SeedSequence потока спроса
+        :param antithetic: брать ли 1 - u вместо u
+        :param kwargs: параметры EventGenerator
+        """
+        super().__init__(**kwargs)
+        self.seed_sequence = seed_sequence
+        self.antithetic = antithetic
+        # число уже сгенерированных дней -- номер следующего потока
+        self.day = 0
+
+    def _day_uniforms(self):
+        """
+        Поток равномерных чисел следующего дня
+        :return: функция draw(shape) -> массив равномерных чисел
+        """
+        rng = np.random.default_rng(np.random.SeedSequence(
+            self.seed_sequence.entropy, spawn_key=self.seed_sequence.spawn_key + (self.day,)
+        ))
+        self.day += 1
+        if not self.antithetic:
+            return rng.random
+        # u = 0 дало бы 1, за пределами [0, 1)
+        return lambda shape: np.minimum(1 - rng.random(shape), 1 - np.finfo(float).epsneg)
+
+    def generate_batch(self, number_of_days=1, first_day=0):
+        """
+        Генерация запросов сразу на несколько дней, каждый день -- из своего потока
+        :param number_of_days: число дней
+        :param first_day: номер первого дня
+        :return: экземпляр класса RequestBatch, запросы упорядочены по дню прихода
+        """
+        days = []
+        uniforms = []
+        for day in range(first_day, first_day + number_of_days):
+            draw = self._day_uniforms()
+            index = np.searchsorted(self.request_number_cdf, draw(1), side='right')
+            count = int(self.request_number_values[index][0])
+            days.append(np.full(count, day))
+            # [запрос, поле]: позиции чисел запроса k не зависят от числа запросов
+            uniforms.append(draw((count, 6)))
+        day = np.concatenate(days).astype(int)
+        u = np.concatenate(uniforms).T
+        self.generated += len(day)
+        batch = RequestBatch(day, *self._requests_from_uniforms(u[:5]))
+        if self.acceptance_draws:
+            batch.acceptance_draw = u[5]
+        return batch
@@ -1,6 +1,7 @@
-from collections import defaultdict
 import numpy as np
 
+from app.utils.booking_ledger import BookingLedger
+
 
 class Hotel:
     """
@@ -14,9 +15,71 @@ class Hotel:
         """
         self.number_of_rooms = number_of_rooms
         self.number_of_days = number_of_days
+        self._init_rooms()
+        # число свободных номеров по дням, обновляется при бронировании и отмене
+        self.free_rooms = np.full(self.number_of_days, self.number_of_rooms)
+        self.ledger = BookingLedger()
+
+    def _init_rooms(self):
+        """
+        Создание хранилища занятости номеров: матрица [номер, день] с uid заказа
+        :return: None
+        """
         self.state = np.zeros([self.number_of_rooms, self.number_of_days])
-        self.cancel_days = defaultdict(list)
-        self.bookings = defaultdict(dict)  # day -> {uid --> data}
+
+    def _days(self, start_day, end_day):
+        """
+        Индекс дней [start_day, end_day] в массивах занятости, дни за горизонтом отбрасываются
+        :param start_day: первый день
+        :param end_day: последний день
+        :return: срез
+        """
+        return slice(start_day, end_day + 1)
+
+    def _find_vacant_rooms(self, request):
+        """
+        Номера, свободные на все дни запроса
+        :param request: запрос
+        :return: список номеров
+        """
+        nights = self.state[:, self._days(request.start_day, request.end_day)]
+        return np.flatnonzero(~nights.any(axis=1)).tolist()
+
+    def _occupy(self, id, rooms, start_day, end_day):
+        """
+        Занять номера заказом
+        :param id: номер заказа
+        :param rooms: номера
+        :param start_day: день заезда
+        :param end_day: последний занятый день
+        :return: None
+        """
+        for room in rooms:
+            self.state[room, self._days(start_day, end_day)] = id
+
+    def _release(self, id, rooms, start_day, end_day):
+        """
+        Освободить номера, занятые заказом
+        :param id: номер заказа
+        :param rooms: номера
+        :param start_day: день заезда
+        :param end_day: последний занятый день
+        :return: None
+        """
+        for room in rooms:
+            self.state[room, self._days(start_day, end_day)] = 0
+
+    def has_capacity(self, request):
+        """
+        Хватает ли свободных номеров в каждый день запроса. Условие необходимое, но не достаточное:
+        свободные в разные дни номера могут не совпадать
+        :param request: запрос
+        :return: хватает или нет
+        """
+        free = self.free_rooms[self._days(request.start_day, request.end_day)]
+        if not len(free):
+            return request.persons <= self.number_of_rooms
+        return free.min() >= request.persons
 
     def is_vacant(self, request):
         """
@@ -24,11 +87,10 @@ class Hotel:
         :param request: запрос
         :return: номера свободных комнат
         """
-        nights = self.state[:, request.start_day: request.end_day + 1]
-        indices = []
-        for idx, row in enumerate(nights):
-            if sum(row) == 0:
-                indices.append(idx)
+        if not self.has_capacity(request):
+            return []
+
+        indices = self._find_vacant_rooms(request)
         if len(indices) >= request.persons:
             return indices
         else:
@@ -43,16 +105,13 @@ class Hotel:
         :param price: цена бронирования
         :return: None
         """
-        for k in range(request.persons):
-            self.state[rooms[k], request.start_day: request.end_day + 1] = id
+        self._occupy(id, rooms[0:request.persons], request.start_day, request.end_day)
+        self.free_rooms[self._days(request.start_day, request.end_day)] -= request.persons
 
-        # регистрируем дату отмены
-        if request.cancellation_day is not None:
-            self.cancel_days[request.cancellation_day].append(
-                (id, rooms[0:request.persons], request.start_day, request.end_day))
-
-        # добавляем в список заказов
-        self.bookings[request.start_day][id] = {'price_per_person': price, 'request': request}
+        # добавляем в журнал заказов вместе с датой отмены
+        self.ledger.add(
+            id, rooms[0:request.persons], request.start_day, request.end_day, price, request.cancellation_day
+        )
 
     def get_loading(self, days):
         """
@@ -63,7 +122,7 @@ class Hotel:
         if days >= self.number_of_days:
             return 0
 
-        return np.count_nonzero(self.state[:, days], axis=0)
+        return self.number_of_rooms - self.free_rooms[days]
 
     def cancel_request(self, day):
         """
@@ -71,20 +130,50 @@ class Hotel:
         :param day: день отмены
         :return: None
         """
-        for data in self.cancel_days[day]:
-            id, rooms, start_day, end_day = data
-            for room in rooms:
-                self.state[room, start_day: end_day + 1] = 0
-
-            self.bookings[start_day].pop(id)
+        for id, rooms, start_day, end_day in self.ledger.cancel(day):
+            self._release(id, rooms, start_day, end_day)
+            self.free_rooms[self._days(start_day, end_day)] += len(rooms)
 
     def get_revenue(self, day):
         """
-        Получаем выручку за указанный день
+        Получаем выручку за указанный день. Заказы с заездом раньше этого дня удаляются из журнала
         :param day: интересующий день
         :return: выручка
         """
-        revenue = 0
-        for id in self.bookings[day]:
-            revenue += self.bookings[day][id]['price_per_person'] * self.bookings[day][id]['request'].persons
-        return revenue
+        return self.ledger.revenue(day)
+
+    def _restore_rooms(self, state):
+        """
+        Восстановление хранилища занятости по матрице [номер, день]
+        :param state: матрица с uid заказов
+        :return: None
+        """
+        self.state = np.array(state, dtype=float)
+
+    def snapshot(self):
+        """
+        Состояние отеля для сохранения: занятость, число свободных номеров и журнал броней
+        :return: словарь массивов
+        """
+        return {'state': self.state, 'free_rooms': self.free_rooms, 'ledger': self.ledger.snapshot()}
+
+    def restore(self, snapshot):
+        """
+        Восстановление отеля из snapshot
+        :param snapshot: словарь из snapshot()
+        :return: None
+        """
+        if np.shape(snapshot['free_rooms']) != self.free_rooms.shape:
+            raise ValueError('число дней снимка не совпадает с отелем')
+        if np.shape(snapshot['state'])[0] != self.number_of_rooms:
+            raise ValueError('число номеров снимка не совпадает с отелем')
+        self._restore_rooms(snapshot['state'])
+        self.free_rooms = np.array(snapshot['free_rooms'])
+        self.ledger.restore(snapshot['ledger'])
+
+    def get_free_share(self):
+        """
+        Доля свободных номеро-дней за горизонт симуляции
+        :return: доля
+        """
+        return (self.state == 0).sum() / self.number_of_rooms / self.number_of_days
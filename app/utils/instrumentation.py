@@ -0,0 +1,187 @@
+import cProfile
+import json
+import pstats
+import tracemalloc
+from time import perf_counter
+
+
+class Instrumentation:
+    """
+    Замер времени по фазам цикла simulate().
+    На время прогона методы компонентов (генератор запросов, отель, правило принятия, стратегия)
+    подменяются на экземплярах обертками, которые считают вызовы и время. Если инструментирование
+    не передано в simulate(), объекты не трогаются и накладных расходов нет.
+    Время фазы считается двумя способами: полное (inclusive) и собственное (self), из которого
+    вычтено время вложенных фаз, например get_loading внутри set_price.
+    Дополнительно можно снять профиль cProfile или статистику выделения памяти tracemalloc.
+    """
+
+    # компонент -> (метод, фаза)
+    PHASES = {
+        'event': (
+            ('generate_requests', 'generate_requests'),
+        ),
+        'hotel': (
+            ('is_vacant', 'is_vacant'),
+            ('get_loading', 'get_loading'),
+            ('booking', 'booking'),
+            ('cancel_request', 'cancel_request'),
+            ('get_revenue', 'get_revenue'),
+        ),
+        'acceptance': (
+            ('decision', 'decision'),
+        ),
+        'pricing': (
+            ('set_price', 'set_price'),
+            ('update_history', 'update_history'),
+            ('update_queue', 'update_queue'),
+        ),
+    }
+    CAPTURES = (None, 'profile', 'memory')
+
+    def __init__(self, capture=None, top=20):
+        """
+        Инициализация
+        :param capture: None -- только фазы, 'profile' -- профиль cProfile, 'memory' -- статистика tracemalloc
+        :param top: сколько строк профиля или мест выделения памяти оставлять в отчете
+        """
+        if capture not in self.CAPTURES:
+            raise ValueError(f'capture должен быть одним из {self.CAPTURES}, получено {capture!r}')
+        self.capture = capture
+        self.top = top
+        self.calls = {}
+        self.inclusive = {}
+        self.exclusive = {}
+        self.wall_time = 0.0
+        self.profile = None
+        self.memory = None
+        self._patched = []
+        self._stack = []
+        self._profiler = None
+        self._time_begin = None
+
+    def _wrap(self, method, phase):
+        """
+        Обертка метода, считающая вызовы и время фазы
+        :param method: связанный метод
+        :param phase: имя фазы
+        :return: обертка
+        """
+        self.calls.setdefault(phase, 0)
+        self.inclusive.setdefault(phase, 0.0)
+        self.exclusive.setdefault(phase, 0.0)
+        stack = self._stack
+
+        def wrapper(*args, **kwargs):
+            # в стеке копится время вложенных фаз, чтобы вычесть его из собственного времени
+            stack.append(0.0)
+            begin = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - begin
+                nested = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                self.calls[phase] += 1
+                self.inclusive[phase] += elapsed
+                self.exclusive[phase] += elapsed - nested
+
+        return wrapper
+
+    def start(self, **components):
+        """
+        Подключение к компонентам и начало замера
+        :param components: компоненты по именам из PHASES, например event=..., hotel=...
+        :return: None
+        """
+        for name, component in components.items():
+            for method_name, phase in self.PHASES.get(name, ()):
+                method = getattr(component, method_name, None)
+                if method is None:
+                    continue
+                setattr(component, method_name, self._wrap(method, phase))
+                self._patched.append((component, method_name))
+
+        if self.capture == 'profile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.capture == 'memory':
+            tracemalloc.start()
+        self._time_begin = perf_counter()
+
+    def stop(self):
+        """
+        Конец замера: методы компонентов возвращаются к исходным
+        :return: None
+        """
+        self.wall_time += perf_counter() - self._time_begin
+
+        if self.capture == 'profile':
+            self._profiler.disable()
+            stats = pstats.Stats(self._profiler)
+            self.profile = [
+                {
+                    'function': f'{filename}:{line}({function})',
+                    'calls': calls,
+                    'total_time': total_time,
+                    'cumulative_time': cumulative_time,
+                }
+                for (filename, line, function), (_, calls, total_time, cumulative_time, _) in sorted(
+                    stats.stats.items(), key=lambda item: item[1][3], reverse=True
+                )[:self.top]
+            ]
+            self._profiler = None
+        elif self.capture == 'memory':
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.memory = {
+                'peak_bytes': peak,
+                'top': [
+                    {'location': str(stat.traceback), 'size_bytes': stat.size, 'count': stat.count}
+                    for stat in snapshot.statistics('lineno')[:self.top]
+                ],
+            }
+
+        for component, method_name in self._patched:
+            # обертка лежит в атрибуте экземпляра, после удаления снова виден метод класса
+            delattr(component, method_name)
+        self._patched = []
+
+    def report(self):
+        """
+        Отчет по прогону
+        :return: словарь, сериализуемый в json
+        """
+        phases = {
+            phase: {
+                'calls': self.calls[phase],
+                'inclusive_s': self.inclusive[phase],
+                'self_s': self.exclusive[phase],
+                'mean_us': self.inclusive[phase] / self.calls[phase] * 1e6 if self.calls[phase] else 0.0,
+                'share': self.exclusive[phase] / self.wall_time if self.wall_time else 0.0,
+            }
+            for phase in self.calls
+        }
+        report = {
+            'capture': self.capture,
+            'wall_time_s': self.wall_time,
+            # время цикла вне замеряемых фаз: fill, подсчет запросов по глубине, сам цикл
+            'other_s': self.wall_time - sum(self.exclusive.values()),
+            'phases': phases,
+        }
+        if self.profile is not None:
+            report['profile'] = self.profile
+        if self.memory is not None:
+            report['memory'] = self.memory
+        return report
+
+    def save(self, path):
+        """
+        Сохранение отчета в json
+        :param path: путь к файлу
+        :return: None
+        """
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
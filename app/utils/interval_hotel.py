@@ -0,0 +1,221 @@
+import numpy as np
+
+from app.utils.hotel import Hotel
+
+
+class IntervalHotel(Hotel):
+    """
+    Отель, в котором занятость хранится как интервалы заказов [start_day, end_day] с маской номеров
+    вместо плотной матрицы [номер, день].
+    Для поиска свободных номеров по каждому дню хранится битовая маска занятых номеров (int, бит r -- номер r),
+    поэтому свободные на весь заказ номера -- одно отрицание OR масок дней заказа: O(LoS) операций над
+    масками вместо обхода всех номеров, и запрос не замедляется с ростом числа номеров.
+    Политика first_fit выдает номера по порядку, как Hotel; best_fit предпочитает номера,
+    в которых заказ оставляет наименьшие свободные промежутки, что уменьшает фрагментацию календаря.
+    Промежутки тоже считаются по маскам: проход по дням от заезда назад до дня запроса и вперед
+    до последнего занятого дня.
+    """
+    policies = ('first_fit', 'best_fit')
+
+    def __init__(self, number_of_rooms=15, number_of_days=365, policy='best_fit'):
+        """
+        Инициализация. Задание свойств отеля
+        :param number_of_rooms: число номеров
+        :param number_of_days: число дней для симуляции
+        :param policy: политика выбора номеров, first_fit или best_fit
+        """
+        if policy not in self.policies:
+            raise ValueError(f'неизвестная политика {policy}, ожидается одна из {self.policies}')
+        self.policy = policy
+        super().__init__(number_of_rooms=number_of_rooms, number_of_days=number_of_days)
+
+    def _init_rooms(self):
+        """
+        Создание интервального индекса заказов
+        :return: None
+        """
+        # uid заказа -> [день заезда, последний занятый день в горизонте, маска номеров]
+        self.bookings = {}
+        # маски занятых номеров по дням и последний день, в который хоть один номер занят
+        self.busy = [0] * self.number_of_days
+        self.last_busy_day = -1
+        self.all_rooms = (1 << self.number_of_rooms) - 1
+
+    @staticmethod
+    def _mask(rooms):
+        """
+        Битовая маска номеров
+        :param rooms: номера
+        :return: int
+        """
+        mask = 0
+        for room in rooms:
+            mask |= 1 << room
+        return mask
+
+    @staticmethod
+    def _rooms(mask, count=None):
+        """
+        Номера из маски по возрастанию
+        :param mask: битовая маска
+        :param count: сколько номеров взять, None -- все
+        :return: список номеров
+        """
+        rooms = []
+        while mask and (count is None or len(rooms) < count):
+            low = mask & -mask
+            rooms.append(low.bit_length() - 1)
+            mask ^= low
+        return rooms
+
+    def _clip(self, start_day, end_day):
+        """
+        Обрезка интервала по горизонту симуляции, как это происходит со срезом матрицы в Hotel
+        :param start_day: день заезда
+        :param end_day: последний занятый день
+        :return: обрезанный последний день, None если интервал целиком за горизонтом
+        """
+        if start_day >= self.number_of_days:
+            return None
+        return min(end_day, self.number_of_days - 1)
+
+    def _find_vacant_rooms(self, request):
+        """
+        Номера, свободные на все дни запроса, в порядке предпочтения политики.
+        Возвращаются только номера, которые займет заказ (request.persons штук), или все свободные, если их меньше
+        :param request: запрос
+        :return: список номеров
+        """
+        start_day = request.start_day
+        end_day = self._clip(start_day, request.end_day)
+        if end_day is None:
+            return list(range(self.number_of_rooms))
+
+        busy = 0
+        for day in range(start_day, end_day + 1):
+            busy |= self.busy[day]
+        free = self.all_rooms & ~busy
+        if self.policy == 'first_fit' or not free:
+            return self._rooms(free, request.persons)
+        return self._best_fit(free, start_day, end_day, request.booking_day, request.persons)
+
+    def _best_fit(self, free, start_day, end_day, booking_day, count):
+        """
+        Свободные номера с наименьшим суммарным промежутком слева и справа от заказа, при равенстве -- по порядку
+        :param free: маска свободных на все дни заказа номеров
+        :param start_day: день заезда
+        :param end_day: последний занятый день
+        :param booking_day: день запроса
+        :param count: число номеров
+        :return: список номеров
+        """
+        # прошедшие дни уже не продать, поэтому промежуток слева считается от дня запроса
+        left = {}
+        rest = free
+        for day in range(start_day - 1, booking_day - 1, -1):
+            found = rest & self.busy[day]
+            if found:
+                left[start_day - 1 - day] = found
+                rest ^= found
+                if not rest:
+                    break
+        if rest:
+            left[start_day - max(booking_day, 0)] = rest
+
+        right = {}
+        rest = free
+        for day in range(end_day + 1, min(self.last_busy_day, self.number_of_days - 1) + 1):
+            found = rest & self.busy[day]
+            if found:
+                right[day - end_day - 1] = found
+                rest ^= found
+                if not rest:
+                    break
+        if rest:
+            right[self.number_of_days - end_day - 1] = rest
+
+        gaps = {}
+        for left_gap, left_mask in left.items():
+            for right_gap, right_mask in right.items():
+                both = left_mask & right_mask
+                if both:
+                    gaps[left_gap + right_gap] = gaps.get(left_gap + right_gap, 0) | both
+
+        rooms = []
+        for gap in sorted(gaps):
+            rooms += self._rooms(gaps[gap], count - len(rooms))
+            if len(rooms) == count:
+                break
+        return rooms
+
+    def _occupy(self, id, rooms, start_day, end_day):
+        """
+        Занять номера заказом
+        :param id: номер заказа
+        :param rooms: номера
+        :param start_day: день заезда
+        :param end_day: последний занятый день
+        :return: None
+        """
+        end_day = self._clip(start_day, end_day)
+        if end_day is None:
+            return
+
+        mask = self._mask(rooms)
+        for day in range(start_day, end_day + 1):
+            self.busy[day] |= mask
+        self.last_busy_day = max(self.last_busy_day, end_day)
+
+        if id in self.bookings:
+            # при восстановлении по матрице номера одного заказа добавляются по одному
+            self.bookings[id][2] |= mask
+        else:
+            self.bookings[id] = [start_day, end_day, mask]
+
+    def _release(self, id, rooms, start_day, end_day):
+        """
+        Освободить номера, занятые заказом
+        :param id: номер заказа
+        :param rooms: номера
+        :param start_day: день заезда
+        :param end_day: последний занятый день
+        :return: None
+        """
+        end_day = self._clip(start_day, end_day)
+        if end_day is None:
+            return
+
+        mask = self._mask(rooms)
+        booking = self.bookings.get(id)
+        if booking is None or booking[:2] != [start_day, end_day] or booking[2] & mask != mask:
+            raise KeyError(f'заказ {id} не найден в номерах {rooms}')
+        for day in range(start_day, end_day + 1):
+            self.busy[day] &= ~mask
+        booking[2] ^= mask
+        if not booking[2]:
+            del self.bookings[id]
+
+    def _restore_rooms(self, state):
+        """
+        Восстановление интервального индекса по матрице [номер, день]: каждый участок подряд идущих дней
+        с одним uid -- интервал
+        :param state: матрица с uid заказов
+        :return: None
+        """
+        self._init_rooms()
+        for room, row in enumerate(np.asarray(state)):
+            edges = np.flatnonzero(np.diff(row, prepend=0, append=0))
+            for start_day, end_day in zip(edges[:-1].tolist(), (edges[1:] - 1).tolist()):
+                if row[start_day]:
+                    self._occupy(int(row[start_day]), [room], start_day, end_day)
+
+    @property
+    def state(self):
+        """
+        Плотная матрица [номер, день] с uid заказов, как в Hotel. Строится заново при каждом обращении
+        :return: np.ndarray
+        """
+        state = np.zeros([self.number_of_rooms, self.number_of_days])
+        for id, (start_day, end_day, mask) in self.bookings.items():
+            state[self._rooms(mask), start_day: end_day + 1] = id
+        return state
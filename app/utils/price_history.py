@@ -0,0 +1,169 @@
+import numpy as np
+
+HISTORY_LOG_DTYPE = np.dtype([('price', '<f8'), ('acceptance', 'i1')])
+
+
+class HistoryLog:
+    """
+    Журнал предложенных цен, в который можно только дописывать.
+    Хранится кусками фиксированного размера, поэтому запись стоит O(1) и не копирует старые данные.
+    """
+
+    def __init__(self, chunk_size=4096):
+        """
+        Инициализация
+        :param chunk_size: число записей в одном куске
+        """
+        self.chunk_size = chunk_size
+        self.chunks = []
+        self.position = chunk_size
+
+    def __len__(self):
+        if not self.chunks:
+            return 0
+        return (len(self.chunks) - 1) * self.chunk_size + self.position
+
+    def append(self, price, acceptance):
+        """
+        Добавление записи в журнал
+        :param price: цена
+        :param acceptance: принята ли цена
+        :return: None
+        """
+        if self.position == self.chunk_size:
+            self.chunks.append(np.empty(self.chunk_size, dtype=HISTORY_LOG_DTYPE))
+            self.position = 0
+        self.chunks[-1][self.position] = (price, acceptance)
+        self.position += 1
+
+    def to_array(self):
+        """
+        Все записи журнала одним массивом
+        :return: структурированный массив с полями price и acceptance
+        """
+        if not self.chunks:
+            return np.empty(0, dtype=HISTORY_LOG_DTYPE)
+        return np.concatenate(self.chunks[:-1] + [self.chunks[-1][:self.position]])
+
+    def to_frame(self):
+        """
+        Журнал в виде таблицы pandas
+        :return: pd.DataFrame с колонками price и acceptance
+        """
+        import pandas as pd
+
+        return pd.DataFrame(self.to_array())
+
+
+class PriceHistory:
+    """
+    Статистика принятия цен на фиксированной сетке цен.
+    Для каждой цены копятся число показов и число принятий, обновление стоит O(1).
+    Опционально статистика считается по скользящему окну из последних window показов
+    или с экспоненциальным забыванием с коэффициентом decay.
+    """
+
+    def __init__(self, prices, window=None, decay=None, keep_log=False):
+        """
+        Инициализация
+        :param prices: сетка цен с постоянным шагом
+        :param window: размер скользящего окна, None -- учитывать все показы
+        :param decay: коэффициент забывания на один показ, None -- без забывания
+        :param keep_log: вести ли полный журнал показов
+        """
+        if window and decay:
+            # окно вычитает незабытый показ из уже забытых счетчиков, счетчики уходят в минус
+            raise ValueError('скользящее окно и забывание нельзя включать одновременно')
+        self.prices = np.asarray(prices, dtype=float)
+        self.price_step = self.prices[1] - self.prices[0]
+        self.counts = np.zeros(len(self.prices))
+        self.acceptances = np.zeros(len(self.prices))
+        self.total = 0
+        self.version = 0
+
+        self.window = window
+        if window:
+            self.window_index = np.full(window, -1)
+            self.window_acceptance = np.zeros(window)
+
+        self.decay = decay
+        self.log = HistoryLog() if keep_log else None
+
+    def __len__(self):
+        return self.total
+
+    def snapshot(self):
+        """
+        Состояние статистики для сохранения
+        :return: словарь массивов
+        """
+        snapshot = {
+            'prices': self.prices,
+            'counts': self.counts,
+            'acceptances': self.acceptances,
+            'total': self.total,
+        }
+        if self.window:
+            snapshot['window_index'] = self.window_index
+            snapshot['window_acceptance'] = self.window_acceptance
+        return snapshot
+
+    def restore(self, snapshot):
+        """
+        Восстановление статистики из snapshot. Журнал показов не сохраняется
+        :param snapshot: словарь из snapshot()
+        :return: None
+        """
+        prices = np.asarray(snapshot['prices'])
+        if prices.shape != self.prices.shape or not np.allclose(prices, self.prices):
+            raise ValueError('сетка цен снимка не совпадает с сеткой стратегии')
+        if self.window and len(snapshot.get('window_index', [])) != self.window:
+            raise ValueError('размер окна снимка не совпадает с окном статистики')
+        self.counts = np.array(snapshot['counts'], dtype=float)
+        self.acceptances = np.array(snapshot['acceptances'], dtype=float)
+        self.total = int(snapshot['total'])
+        if self.window:
+            self.window_index = np.array(snapshot['window_index'])
+            self.window_acceptance = np.array(snapshot['window_acceptance'], dtype=float)
+        self.version += 1
+
+    def price_index(self, price):
+        """
+        Номер цены в сетке
+        :param price: цена
+        :return: индекс в self.prices
+        """
+        index = int(round((price - self.prices[0]) / self.price_step))
+        if not 0 <= index < len(self.prices) or not np.isclose(self.prices[index], price):
+            raise ValueError(f'цена {price} не лежит на сетке цен')
+        return index
+
+    def add(self, price, acceptance):
+        """
+        Учет показа цены
+        :param price: цена
+        :param acceptance: принята ли цена
+        :return: None
+        """
+        index = self.price_index(price)
+
+        if self.decay:
+            self.counts *= self.decay
+            self.acceptances *= self.decay
+
+        if self.window:
+            position = self.total % self.window
+            old_index = self.window_index[position]
+            if old_index >= 0:
+                self.counts[old_index] -= 1
+                self.acceptances[old_index] -= self.window_acceptance[position]
+            self.window_index[position] = index
+            self.window_acceptance[position] = acceptance
+
+        self.counts[index] += 1
+        self.acceptances[index] += acceptance
+        self.total += 1
+        self.version += 1
+
+        if self.log is not None:
+            self.log.append(price, acceptance)
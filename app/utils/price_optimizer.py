@@ -0,0 +1,165 @@
+import numpy as np
+
+from app.utils.acceptance_rule import AcceptanceRule
+from app.utils.event_generator import EventGenerator
+from app.utils.price_table import PriceTable
+
+
+def distribution_pmf(values, cdf):
+    """
+    Вероятности по таблице обратной функции распределения
+    :param values: неотрицательные целые значения
+    :param cdf: функция распределения в них
+    :return: массив вероятностей, индекс -- значение
+    """
+    pmf = np.zeros(int(np.max(values)) + 1)
+    np.add.at(pmf, np.asarray(values, dtype=int), np.diff(cdf, prepend=0))
+    return pmf
+
+
+class PriceOptimizer:
+    """
+    Оптимальная таблица скидок (загрузка, глубина) обратной индукцией по дням до заезда.
+    Модель -- одна ночь отеля: состояние -- число занятых номеров x, шаг -- день до заезда t = 30..0.
+    Запросы, накрывающие ночь, приходят за t дней пуассоновским потоком с интенсивностью
+    mu * sum_j P(depth = t - j) P(ночей > j). Заказ на m гостей занимает m номеров, принимается с вероятностью
+    AcceptanceRule и приносит цену * m, деленную на среднее число ночей, за вычетом доли отмен на глубине t.
+    Оператор одного запроса T V(x) = V(x) + max_p a(p) sum_m P(m) [p m g + V(x + m) - V(x)]
+    (отказать нельзя, можно только назначить высокую цену) считается сразу для всех состояний и всех цен сетки,
+    день -- смесь T^k по пуассоновскому числу запросов k.
+    Скидка в состоянии (x, t) -- argmax того же выражения при ценности V_{t-1} конца дня.
+    Это приближение: многодневные заказы и освобождение номеров при отмене учитываются только в среднем.
+    """
+
+    def __init__(self, nominal_price=1000, number_of_rooms=15, event=None, acceptance=None, price_steps_count=40):
+        """
+        Инициализация
+        :param nominal_price: номинальная цена
+        :param number_of_rooms: число номеров
+        :param event: модель спроса EventGenerator, по умолчанию с mu=30
+        :param acceptance: эластичность AcceptanceRule
+        :param price_steps_count: число шагов сетки цен между Netto и RackRate
+        """
+        self.nominal_price = nominal_price
+        self.number_of_rooms = number_of_rooms
+        self.event = event if event is not None else EventGenerator(mu=30)
+        self.acceptance = acceptance if acceptance is not None else AcceptanceRule(nominal_price=nominal_price)
+        self.RackRate = 1.5 * nominal_price
+        self.Netto = 0.5 * nominal_price
+        # скидки в % от 0 (RackRate) до 100 (Netto), как в default_strategy
+        self.discounts = np.linspace(0, 100, price_steps_count + 1)
+        self.prices = self.RackRate - (self.RackRate - self.Netto) * self.discounts / 100
+        self.values = None
+        self.policy = None
+
+    def _demand(self):
+        """
+        Параметры спроса из модели EventGenerator
+        :return: интенсивность запросов по глубине, вероятности числа гостей, доля оплаченных заказов по глубине,
+            выручка на ночь на единицу цены и гостя
+        """
+        event = self.event
+        LoS = distribution_pmf(event.LoS_values, event.LoS_cdf)
+        mean_nights = float(np.dot(np.arange(len(LoS)), LoS)) + 1
+        request_number = distribution_pmf(event.request_number_values, event.request_number_cdf)
+        mu = float(np.dot(np.arange(len(request_number)), request_number))
+        depth = distribution_pmf(event.depth_values, event.depth_cdf)
+        persons = distribution_pmf(event.persons_values, event.persons_cdf)
+        paid = 1 - np.asarray(event.cancellation_chance, dtype=float)[:len(depth)]
+        # заказ с заездом через s дней накрывает ночь через t = s + j дней, если LoS >= j
+        survival = 1 - np.cumsum(LoS) + LoS
+        rates = mu * np.convolve(depth, survival)[:len(depth)]
+        return rates, persons, paid, 1 / mean_nights
+
+    def _gains(self, values, persons, gain):
+        """
+        Ожидаемый прирост ценности от одного запроса для всех состояний и цен
+        :param values: ценность V(x), x = 0..number_of_rooms
+        :param persons: вероятности числа гостей
+        :param gain: выручка на единицу цены и гостя
+        :return: массив [состояние, цена]
+        """
+        rooms = self.number_of_rooms
+        x = np.arange(rooms + 1)[:, None]
+        m = np.arange(len(persons))[None, :]
+        fits = x + m <= rooms
+        after = np.where(fits, values[np.minimum(x + m, rooms)], 0)
+        # [состояние, гости]: прирост ценности при продаже, если заказ помещается
+        delta = np.where(fits, after - values[x], 0) * persons
+        revenue = np.where(fits, m, 0) * persons
+        chance = self.acceptance.acceptance_chance(self.prices)
+        return chance[None, :] * (
+            gain * self.prices[None, :] * revenue.sum(axis=1)[:, None] + delta.sum(axis=1)[:, None]
+        )
+
+    def solve(self, tail=1e-9):
+        """
+        Обратная индукция от дня заезда к глубине max_depth
+        :param tail: отбрасываемая вероятность хвоста пуассоновского числа запросов за день
+        :return: массив скидок [занятые номера, глубина]
+        """
+        rates, persons, paid, gain = self._demand()
+        max_depth = len(rates) - 1
+        values = np.zeros(self.number_of_rooms + 1)
+        self.values = np.zeros([self.number_of_rooms + 1, max_depth + 1])
+        self.policy = np.zeros([self.number_of_rooms + 1, max_depth + 1])
+        for depth in range(max_depth + 1):
+            gains = self._gains(values, persons, gain * paid[depth])
+            best = gains.argmax(axis=1)
+            # в полном отеле продавать нечего, цена -- RackRate
+            self.policy[:, depth] = np.where(gains.max(axis=1) > 0, self.discounts[best], 0)
+
+            # ценность дня: смесь T^k по пуассоновскому числу запросов
+            rate = rates[depth]
+            day_values = np.zeros_like(values)
+            current = values
+            probability = np.exp(-rate)
+            k = 0
+            covered = 0
+            while covered < 1 - tail and k < 10 * rate + 100:
+                day_values += probability * current
+                covered += probability
+                current = current + self._gains(current, persons, gain * paid[depth]).max(axis=1)
+                k += 1
+                probability *= rate / k
+            values = day_values + (1 - covered) * current
+            self.values[:, depth] = values
+        return self.policy
+
+    def strategy(self, base=2):
+        """
+        Таблица скидок в формате default_strategy
+        :param base: шаг загрузки и глубины в ключах
+        :return: словарь {(загрузка, глубина): скидка}
+        """
+        if self.policy is None:
+            self.solve()
+        rooms = self.number_of_rooms
+        max_depth = self.policy.shape[1] - 1
+        occupied = np.arange(rooms + 1)
+        strategy = {}
+        for load in range(base, 100 + base, base):
+            # корзина загрузки load -- занятость (load - base, load] %, иначе ближайшая меньшая занятость
+            x = int(occupied[occupied * 100 / rooms <= load].max())
+            for depth in range(base, max_depth + 1, base):
+                # корзина глубины depth -- глубины depth - base + 1..depth, первая корзина включает глубину 0
+                depths = range(0 if depth == base else depth - base + 1, depth + 1)
+                strategy[(load, depth)] = float(np.mean(self.policy[x, list(depths)]))
+        return strategy
+
+    def price_table(self, base=2):
+        """
+        Таблица скидок для PricingDefault
+        :param base: шаг загрузки и глубины
+        :return: экземпляр класса PriceTable
+        """
+        return PriceTable.from_dict(self.strategy(base), base)
+
+    def expected_revenue(self):
+        """
+        Ожидаемая выручка пустого отеля за одну ночь по модели
+        :return: ценность V(0) на максимальной глубине
+        """
+        if self.values is None:
+            self.solve()
+        return float(self.values[0, -1])
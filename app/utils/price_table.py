@@ -0,0 +1,130 @@
+import math
+import os
+
+import numpy as np
+
+
+def ceil_to_base_batch(x, base=2):
+    """
+    Векторный вариант ceil_to_base
+    :param x: массив значений
+    :param base: основание
+    :return: массив целых, кратных base
+    """
+    x = np.asarray(x)
+    return np.where(x == 0, base, base * np.ceil(x / base)).astype(int)
+
+
+def strategy_to_array(strategy, base=2):
+    """
+    Перевод словаря стратегии {(загрузка, глубина): скидка} в плотную таблицу
+    :param strategy: словарь стратегии
+    :param base: шаг загрузки и глубины в ключах
+    :return: массив [загрузка // base, глубина // base], отсутствующие ключи -- nan
+    """
+    loads, depths = zip(*strategy)
+    table = np.full([max(loads) // base + 1, max(depths) // base + 1], np.nan)
+    for (load, depth), value in strategy.items():
+        table[load // base, depth // base] = value
+    return table
+
+
+class PriceTable:
+    """
+    Статическая таблица значений (скидок или цен) по корзинам загрузки и глубины бронирования.
+    Загрузка и глубина округляются вверх до кратного base, как ceil_to_base, и номер корзины -- частное от
+    деления на base, поэтому таблица -- плотный массив [корзина загрузки, корзина глубины].
+    Для одного запроса значение берется из вложенных списков без NumPy, для пачки -- одной индексацией массива.
+    Таблицу можно построить из словаря вида default_strategy или загрузить из файла .npy (плотный массив)
+    или .csv (строки load,depth,value). Глубина дальше последней корзины берется из последней корзины.
+    """
+
+    def __init__(self, values, base=2):
+        """
+        Инициализация
+        :param values: массив [корзина загрузки, корзина глубины]; нулевые строка и столбец не используются
+        :param base: шаг корзин
+        """
+        values = np.asarray(values, dtype=float)
+        if values.ndim != 2 or np.isnan(values[1:, 1:]).any():
+            raise ValueError('таблица должна быть двумерной и без пропусков в используемых корзинах')
+        self.values = values
+        self.base = base
+        self._rows = values.tolist()
+        self._last_depth = values.shape[1] - 1
+
+    @classmethod
+    def from_dict(cls, strategy, base=2):
+        """
+        Таблица из словаря {(загрузка, глубина): значение}
+        :param strategy: словарь стратегии
+        :param base: шаг загрузки и глубины в ключах
+        :return: экземпляр класса PriceTable
+        """
+        return cls(strategy_to_array(strategy, base), base)
+
+    @classmethod
+    def load(cls, path, base=2):
+        """
+        Загрузка таблицы из файла
+        :param path: путь к .npy или .csv
+        :param base: шаг корзин
+        :return: экземпляр класса PriceTable
+        """
+        if os.path.splitext(path)[1] == '.npy':
+            return cls(np.load(path), base)
+        rows = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+        return cls.from_dict({(int(load), int(depth)): value for load, depth, value in rows.tolist()}, base)
+
+    def save(self, path):
+        """
+        Сохранение таблицы в .npy или .csv
+        :param path: путь к файлу
+        :return: None
+        """
+        if os.path.splitext(path)[1] == '.npy':
+            np.save(path, self.values)
+            return
+        with open(path, 'w') as f:
+            f.write('load,depth,value\n')
+            for load in range(1, self.values.shape[0]):
+                for depth in range(1, self.values.shape[1]):
+                    f.write(f'{load * self.base},{depth * self.base},{self._rows[load][depth]!r}\n')
+
+    def map(self, func):
+        """
+        Новая таблица с преобразованными значениями, например цены из скидок
+        :param func: функция от массива значений
+        :return: экземпляр класса PriceTable
+        """
+        return PriceTable(func(self.values), self.base)
+
+    def bucket(self, x):
+        """
+        Номер корзины, ceil_to_base(x, base) // base
+        :param x: загрузка или глубина
+        :return: номер корзины
+        """
+        if x == 0:
+            return 1
+        return math.ceil(x / self.base)
+
+    def lookup(self, load, depth):
+        """
+        Значение для одного запроса
+        :param load: загрузка отеля, %
+        :param depth: глубина бронирования
+        :return: значение
+        """
+        return self._rows[self.bucket(load)][min(self.bucket(depth), self._last_depth)]
+
+    def lookup_batch(self, loads, depths):
+        """
+        Значения сразу для массива запросов
+        :param loads: загрузка отеля, %
+        :param depths: глубина бронирования
+        :return: массив значений
+        """
+        load_buckets = ceil_to_base_batch(loads, self.base) // self.base
+        depth_buckets = np.minimum(ceil_to_base_batch(depths, self.base) // self.base, self._last_depth)
+        return self.values[load_buckets, depth_buckets]
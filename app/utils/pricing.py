@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
 
 import numpy as np
-import pandas as pd
-from default_strategy import default_strategy
+
+from app.utils.default_strategy import default_strategy
+from app.utils.demand_estimator import DemandEstimator
+from app.utils.price_history import PriceHistory
+from app.utils.price_table import PriceTable
 
 
 def ceil_to_base(x, base=2):
@@ -11,38 +14,112 @@ def ceil_to_base(x, base=2):
     return int(base * np.ceil(x / base))
 
 
+def _last_argmax(values):
+    """
+    Индекс последнего максимума: при равных оценках выбирается наибольшая цена сетки
+    :param values: массив
+    :return: индекс
+    """
+    return len(values) - 1 - int(np.argmax(values[::-1]))
+
+
+def _best_revenue(rs, prices):
+    """
+    Индекс цены с наибольшей ожидаемой выручкой оценка * цена.
+    Из равных выручек выбирается цена с меньшей оценкой, при равных оценках (все нули) -- наименьшая цена
+    :param rs: оценки по сетке цен
+    :param prices: сетка цен
+    :return: индекс
+    """
+    revenue = rs * prices
+    best = np.flatnonzero(revenue == revenue.max())
+    return best[rs[best].argmin()]
+
+
 class AbstractPricingSomeMethod(ABC):
     """
     Абстрактый класс для реализации различных стратегий ценообразования
     """
 
-    def __init__(self, nominal_price, threshold, explore_count=500):
+    def __init__(
+            self,
+            nominal_price,
+            threshold,
+            explore_count=500,
+            history_window=None,
+            history_decay=None,
+            keep_history_log=False,
+            average_period=7,
+            demand_smoothing=None,
+            rng=None
+    ):
         self.BAR = nominal_price
         self.RackRate = 1.5 * nominal_price
         self.Netto = 0.5 * nominal_price
-        self.history = pd.DataFrame(columns=['price', 'acceptance'])
         self.price_steps_count = 40
         self.price_step = (self.RackRate - self.Netto) / self.price_steps_count
         self.prices = [self.Netto + x * self.price_step for x in range(self.price_steps_count + 1)]
-        self.average_period = 7
-        self.event_queue = {x: [0] for x in range(31)}
+        self.history = PriceHistory(
+            self.prices, window=history_window, decay=history_decay, keep_log=keep_history_log
+        )
+        self.average_period = average_period
+        self.demand = DemandEstimator(window=self.average_period, smoothing=demand_smoothing)
         self.threshold = threshold
         self.explore_count = explore_count
+        self.rng = rng if rng is not None else np.random.default_rng()
+        # верхняя оценка доли принятия по сетке цен и версия статистики, по которой она посчитана
+        self.confidence = None
+        self.confidence_version = None
 
     def update_history(self, event):
-        self.history = pd.concat([self.history, pd.DataFrame(event, index=[0])])
+        self.history.add(event['price'], event['acceptance'])
+
+    def get_confidence(self):
+        """
+        Верхняя оценка доли принятия p + sqrt(p (1 - p) / count) для всей сетки цен.
+        Пересчитывается, только если статистика принятия изменилась (PriceHistory.version),
+        оценка запроса -- это вектор, умноженный на скаляр rest
+        :return: массив по сетке self.history.prices, -inf для цен, которые еще не предлагались
+        """
+        if self.confidence_version != self.history.version:
+            counts = self.history.counts
+            seen = counts > 0
+            p = self.history.acceptances[seen] / counts[seen]
+            self.confidence = np.full(len(counts), -np.inf)
+            self.confidence[seen] = p + (p * (1 - p) / counts[seen]) ** 0.5
+            self.confidence_version = self.history.version
+        return self.confidence
+
+    def snapshot(self):
+        """
+        Обученное состояние стратегии: статистика принятия цен, оценка спроса и порог
+        :return: словарь массивов
+        """
+        return {
+            'threshold': self.threshold,
+            'explore_count': self.explore_count,
+            'history': self.history.snapshot(),
+            'demand': self.demand.snapshot(),
+        }
+
+    def restore(self, snapshot, threshold=True):
+        """
+        Теплый старт из snapshot. Если показов в снимке больше explore_count + len(prices),
+        стратегия сразу назначает цены по статистике, без случайного исследования
+        :param snapshot: словарь из snapshot()
+        :param threshold: брать ли порог из снимка
+        :return: None
+        """
+        self.history.restore(snapshot['history'])
+        self.demand.restore(snapshot['demand'])
+        if threshold:
+            self.threshold = float(snapshot['threshold'])
 
     def update_queue(self, events_dict):
-        for key in events_dict:
-            if len(self.event_queue[key]) == 7:
-                self.event_queue[key].pop(0)
-            self.event_queue[key].append(events_dict[key])
+        self.demand.update(events_dict)
 
     def get_average_orders(self, depth):
-        result = 0
-        for x in range(depth + 1):
-            result += sum(self.event_queue[x])
-        return result
+        return self.demand.query(depth)
 
     @abstractmethod
     def set_price(self, hotel, request, verbose=0):
@@ -51,22 +128,35 @@ class AbstractPricingSomeMethod(ABC):
 
 class PricingDefault:
     """
-    Дефолтная стратегия ценообразования
+    Дефолтная стратегия ценообразования.
+    Таблица скидок один раз переводится в таблицу цен, поэтому цена запроса -- поиск в PriceTable
     """
-    def __init__(self, nominal_price):
+    def __init__(self, nominal_price, table=None):
+        """
+        Инициализация
+        :param nominal_price: номинальная цена
+        :param table: таблица скидок в %, экземпляр класса PriceTable, по умолчанию default_strategy
+        """
         self.BAR = nominal_price
         self.RackRate = 1.5 * nominal_price
         self.Netto = 0.5 * nominal_price
+        self.table = table if table is not None else PriceTable.from_dict(default_strategy)
+        self.price_table = self.table.map(
+            lambda discounts: self.RackRate - (self.RackRate - self.Netto) * (discounts / 100)
+        )
 
     def set_price(self, hotel, request):
         load = hotel.get_loading(request.start_day) / hotel.number_of_rooms * 100
-        load = ceil_to_base(load)
-
-        depth = request.depth
-        depth = ceil_to_base(depth)
-        value = default_strategy[(load, depth)] / 100
+        return self.price_table.lookup(load, request.depth)
 
-        return self.RackRate - (self.RackRate - self.Netto) * value
+    def set_price_batch(self, loads, depths):
+        """
+        Цены сразу для массива запросов
+        :param loads: загрузка отеля в день заезда, %
+        :param depths: глубина бронирования
+        :return: массив цен
+        """
+        return self.price_table.lookup_batch(loads, depths)
 
 
 class PricingConstant:
@@ -79,34 +169,49 @@ class PricingConstant:
     def set_price(self, hotel, request):
         return self.price
 
+    def set_price_batch(self, loads, depths):
+        return np.full(len(loads), self.price, dtype=float)
+
 
 class PricingRandom:
     """
     Константная цена
     """
-    def __init__(self, nominal_price):
+    def __init__(self, nominal_price, rng=None):
         self.BAR = nominal_price
         self.RackRate = 1.5 * nominal_price
         self.Netto = 0.5 * nominal_price
         self.step = 40
         self.price_step = self.BAR/self.step
+        self.rng = rng if rng is not None else np.random.default_rng()
 
     def set_price(self, hotel, request):
-        rand_int = np.random.randint(self.step + 1)
+        rand_int = self.rng.integers(self.step + 1)
 
         return self.Netto + rand_int * self.price_step
 
+    def set_price_batch(self, loads, depths):
+        return self.Netto + self.rng.integers(self.step + 1, size=len(loads)) * self.price_step
+
 
 class PricingSomeMethod(AbstractPricingSomeMethod):
     """
     Класс, описывающий одну из стратегий ценообразования
     """
 
-    def calc_price(self, rs: pd.DataFrame) -> int:
-        if not len(rs[rs > self.threshold]):
-            return rs.index[-1]
-        else:
-            return rs[rs > self.threshold].index[0]
+    def calc_price(self, rs):
+        """
+        Цена с наименьшей оценкой выше порога, если такой нет -- с наибольшей оценкой
+        :param rs: оценки по сетке цен, -inf -- цена не предлагалась
+        :return: цена
+        """
+        seen = np.flatnonzero(rs > -np.inf)
+        # порядок равных оценок задает сортировка, поэтому здесь, в отличие от v2, сортировка остается
+        order = seen[np.argsort(rs[seen], kind='quicksort')]
+        above = order[rs[order] > self.threshold]
+        if not len(above):
+            return self.history.prices[order[-1]]
+        return self.history.prices[above[0]]
 
     def set_price(self, hotel, request, verbose=0):
 
@@ -114,17 +219,14 @@ class PricingSomeMethod(AbstractPricingSomeMethod):
             rest = self.get_average_orders(request.depth) / (
                         hotel.number_of_rooms - hotel.get_loading(request.start_day))
 
-            p = self.history.groupby('price')['acceptance'].mean()
-            count = self.history.groupby('price')['acceptance'].count()
-            rs = ((p + (p * (1 - p) / count) ** 0.5) * rest).sort_values()
+            rs = self.get_confidence() * rest
             if verbose:
-                print(p)
                 print(f'rest: {rest}')
                 print(rs)
 
             price = self.calc_price(rs)
         else:
-            price = self.prices[np.random.randint(len(self.prices))]
+            price = self.prices[self.rng.integers(len(self.prices))]
         return price
 
 
@@ -133,9 +235,31 @@ class AbstractPricingSomeMethodv2(AbstractPricingSomeMethod):
     Класс, описывающий одну из стратегий ценообразования
     """
     @abstractmethod
-    def calc_price(self, rs: pd.DataFrame, verbose):
+    def calc_price(self, rs, verbose):
+        """
+        Выбор цены по оценкам
+        :param rs: оценки по сетке цен self.history.prices, -inf -- цена не предлагалась
+        :param verbose: печатать ли выбор
+        :return: цена
+        """
         pass
 
+    def calc_price_above_threshold(self, rs, verbose):
+        """
+        Наибольшая цена с оценкой выше порога
+        :param rs: оценки по сетке цен
+        :param verbose: печатать ли выбор
+        :return: цена или None, если выше порога нет ни одной оценки
+        """
+        above = np.flatnonzero(rs > self.threshold)
+        if not len(above):
+            return None
+        # сетка цен возрастает, наибольшая цена -- последняя
+        price = self.history.prices[above[-1]]
+        if verbose:
+            print(f'price_up_thr: {price}')
+        return price
+
     def set_price(self, hotel, request, total_requests_per_day_count, verbose=0):
 
         if len(self.history) >= self.explore_count + len(self.prices):
@@ -147,27 +271,21 @@ class AbstractPricingSomeMethodv2(AbstractPricingSomeMethod):
             else:
                 estimate_requests_count = np.max(
                     [self.get_average_orders(request.depth) - total_requests_per_day_count, 1])
-                rest = estimate_requests_count / (hotel.number_of_rooms - hotel.get_loading(request.start_day))
-
-                p = self.history.groupby('price')['acceptance'].mean()
-                count = self.history.groupby('price')['acceptance'].count()
-                rs = ((p + (p * (1 - p) / count) ** 0.5) * rest).sort_values()
-                rs = pd.DataFrame(rs).reset_index().sort_values(
-                    ['acceptance'], ascending=[True]
-                ).set_index('price')['acceptance']
+                rest = estimate_requests_count / vacante_room_count
+
+                # вектор верхних оценок кешируется до следующего изменения статистики, rest -- скаляр
+                rs = self.get_confidence() * rest
                 if verbose:
-                    print(p)
                     print(f'rest: {rest}')
                     print(f'explore_count: {self.explore_count}')
                     print(f'estimate_requests_count: {estimate_requests_count}')
                     print(rs)
-                    print(f'index: {rs.index[0]}')
                     print(f'threshold: {self.threshold}')
-                    print(f'threshold cond len: {len(rs[rs > self.threshold])}')
+                    print(f'threshold cond len: {int((rs > self.threshold).sum())}')
                 price = self.calc_price(rs, verbose)
 
         else:
-            price = self.prices[np.random.randint(len(self.prices))]
+            price = self.prices[self.rng.integers(len(self.prices))]
             if verbose:
                 print(f'price_randomed: {price}')
             # print('False')
@@ -178,13 +296,11 @@ class PricingSomeMethodv2(AbstractPricingSomeMethodv2):
     """
     Класс, описывающий одну из стратегий ценообразования
     """
-    def calc_price(self, rs: pd.DataFrame, verbose):
-        if len(rs[rs > self.threshold]):
-            price = rs[rs > self.threshold].index.max()
-            if verbose:
-                print(f'price_up_thr: {price}')
-        else:
-            price = np.max(rs[rs == rs.max()].index)
+    def calc_price(self, rs, verbose):
+        price = self.calc_price_above_threshold(rs, verbose)
+        if price is None:
+            # наибольшая цена среди цен с наибольшей оценкой
+            price = self.history.prices[_last_argmax(rs)]
             if verbose:
                 print(f'price_m_thr: {price}')
         return price
@@ -195,13 +311,10 @@ class PricingSomeMethodv3(AbstractPricingSomeMethodv2):
     Класс, описывающий одну из стратегий ценообразования
     """
 
-    def calc_price(self, rs: pd.DataFrame, verbose):
-        if len(rs[rs > self.threshold]):
-            price = rs[rs > self.threshold].index.max()
-            if verbose:
-                print(f'price_up_thr: {price}')
-        else:
-            price = (rs*rs.index).idxmax()
+    def calc_price(self, rs, verbose):
+        price = self.calc_price_above_threshold(rs, verbose)
+        if price is None:
+            price = self.history.prices[_best_revenue(rs, self.history.prices)]
             if verbose:
                 print(f'price_m_thr: {price}')
         return price
@@ -212,29 +325,16 @@ class PricingSomeMethodv4(AbstractPricingSomeMethodv2):
     Класс, описывающий одну из стратегий ценообразования
     """
 
-    def __init__(self, nominal_price, threshold, explore_count=500):
-        self.BAR = nominal_price
-        self.RackRate = 1.5 * nominal_price
-        self.Netto = 0.5 * nominal_price
-        self.history = pd.DataFrame({
-            'price': self.prices,
-            'acceptance': [0] * (self.price_steps_count + 1)
-        })
-        self.price_steps_count = 40
-        self.price_step = (self.RackRate - self.Netto) / self.price_steps_count
-        self.prices = [self.Netto + x * self.price_step for x in range(self.price_steps_count + 1)]
-        self.average_period = 7
-        self.event_queue = {x: [0] for x in range(31)}
-        self.threshold = threshold
-        self.explore_count = explore_count
+    def __init__(self, nominal_price, threshold, explore_count=500, **kwargs):
+        super().__init__(nominal_price, threshold, explore_count, **kwargs)
+        # каждая цена заранее считается один раз показанной и отвергнутой
+        for price in self.prices:
+            self.update_history({'price': price, 'acceptance': 0})
 
-    def calc_price(self, rs: pd.DataFrame, verbose):
-        if len(rs[rs > self.threshold]):
-            price = rs[rs > self.threshold].index.max()
-            if verbose:
-                print(f'price_up_thr: {price}')
-        else:
-            price = (rs*rs.index).idxmax()
+    def calc_price(self, rs, verbose):
+        price = self.calc_price_above_threshold(rs, verbose)
+        if price is None:
+            price = self.history.prices[_best_revenue(rs, self.history.prices)]
             if verbose:
                 print(f'price_m_thr: {price}')
         return price
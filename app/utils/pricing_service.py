@@ -0,0 +1,236 @@
+import asyncio
+from copy import copy
+import time
+
+import numpy as np
+
+from app.utils.pricing import AbstractPricingSomeMethod, AbstractPricingSomeMethodv2
+
+
+class PricingService:
+    """
+    Асинхронный сервис цен вокруг живого отеля и экземпляра стратегии.
+    Все операции (котировка, подтверждение, закрытие дня) идут через одну очередь и выполняются одной задачей
+    по порядку поступления, поэтому изменения состояния (booking, update_history, update_queue) не пересекаются.
+    Котировки, пришедшие в течение batch_window секунд после первой, собираются в пачку до max_batch штук:
+    у стратегий с set_price_batch цены пачки считаются одним вызовом, у обучающихся -- по одной.
+    Задержка решения -- время от вызова quote до готовой цены, копится для p50/p99.
+    """
+
+    def __init__(self, hotel, pricing, batch_window=0.002, max_batch=64, day=0):
+        """
+        Инициализация
+        :param hotel: экземпляр класса Hotel, для бесконечной работы -- RollingHotel
+        :param pricing: экземпляр стратегии ценообразования
+        :param batch_window: время ожидания пачки котировок, с
+        :param max_batch: максимальный размер пачки
+        :param day: текущий день
+        """
+        self.hotel = hotel
+        self.pricing = pricing
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.day = day
+        self.uid = 1
+        # число запросов за день и число оцененных запросов по глубинам -- для обучающихся стратегий
+        self.requests_today = 0
+        self.depth_count = {}
+        self.latencies = []
+        self.batch_sizes = []
+        self._queue = None
+        self._worker = None
+
+    async def start(self):
+        """
+        Запуск обработчика очереди
+        :return: None
+        """
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Остановка обработчика после выполнения уже поставленных операций
+        :return: None
+        """
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def _submit(self, kind, *args):
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((kind, args, future, time.perf_counter()))
+        return future
+
+    @staticmethod
+    def _resolve(future, result):
+        # клиент мог перестать ждать ответа
+        if not future.done():
+            future.set_result(result)
+
+    @staticmethod
+    def _fail(future, error):
+        if not future.done():
+            future.set_exception(error)
+
+    async def quote(self, request):
+        """
+        Цена для запроса, пришедшего в текущий день. Запрос клиента не меняется: заполняется его копия
+        :param request: незаполненный запрос, экземпляр класса Request
+        :return: (цена, свободные номера, заполненная копия запроса для confirm); цена None, если мест нет
+        """
+        return await self._submit('quote', request)
+
+    async def confirm(self, request, price, accepted):
+        """
+        Ответ клиента на котировку: запись в историю стратегии и бронирование, если номера еще свободны
+        :param request: заполненная копия запроса из ответа quote
+        :param price: предложенная цена
+        :param accepted: принял ли клиент цену
+        :return: забронирован ли заказ
+        """
+        return await self._submit('confirm', request, price, accepted)
+
+    async def close_day(self):
+        """
+        Закрытие дня: отмены, обновление оценки спроса, выручка, переход на следующий день
+        :return: выручка за день
+        """
+        return await self._submit('close_day')
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            if batch[0][0] == 'quote' and self.batch_window:
+                await asyncio.sleep(self.batch_window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # подряд идущие котировки считаются вместе, остальные операции -- строго по порядку
+            quotes = []
+            try:
+                for operation in batch:
+                    if operation[0] == 'quote':
+                        quotes.append(operation)
+                        continue
+                    self._guarded(quotes, self._process_quotes, quotes)
+                    quotes = []
+                    self._guarded([operation], self._process, operation)
+                self._guarded(quotes, self._process_quotes, quotes)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _guarded(self, operations, process, argument):
+        """
+        Выполнение операций; исключение передается ожидающим их клиентам, а обработчик очереди продолжает работу
+        :param operations: список операций, клиенты которых получат исключение
+        :param process: _process_quotes или _process
+        :param argument: аргумент process
+        :return: None
+        """
+        try:
+            process(argument)
+        except Exception as error:
+            for operation in operations:
+                self._fail(operation[2], error)
+
+    def _process_quotes(self, quotes):
+        """
+        Цены для пачки котировок
+        :param quotes: список операций quote
+        :return: None
+        """
+        if not quotes:
+            return
+        self.batch_sizes.append(len(quotes))
+        # (номер в пачке, запрос, свободные номера) для запросов, которым нужна цена
+        priced = []
+        for position, (_, (request,), future, _) in enumerate(quotes):
+            # fill меняет запрос, а один объект клиент может прислать несколько раз
+            request = copy(request)
+            request.fill(self.day)
+            vacant_rooms = self.hotel.is_vacant(request)
+            if len(vacant_rooms):
+                priced.append((position, request, vacant_rooms))
+            else:
+                self._resolve(future, (None, vacant_rooms, request))
+
+        if not priced:
+            prices = []
+        elif hasattr(self.pricing, 'set_price_batch'):
+            loads = np.array([
+                self.hotel.get_loading(request.start_day) / self.hotel.number_of_rooms * 100
+                for _, request, _ in priced
+            ])
+            depths = np.array([request.depth for _, request, _ in priced])
+            prices = self.pricing.set_price_batch(loads, depths).tolist()
+        elif isinstance(self.pricing, AbstractPricingSomeMethodv2):
+            # как в simulate(): число запросов дня, пришедших раньше текущего
+            prices = [
+                self.pricing.set_price(self.hotel, request, self.requests_today + position)
+                for position, request, _ in priced
+            ]
+        else:
+            prices = [self.pricing.set_price(self.hotel, request) for _, request, _ in priced]
+        self.requests_today += len(quotes)
+
+        now = time.perf_counter()
+        for price, (position, request, vacant_rooms) in zip(prices, priced):
+            self._resolve(quotes[position][2], (price, vacant_rooms, request))
+        for _, _, _, submitted in quotes:
+            self.latencies.append(now - submitted)
+
+    def _process(self, operation):
+        """
+        Выполнение операции, меняющей состояние
+        :param operation: операция confirm или close_day
+        :return: None
+        """
+        kind, args, future, _ = operation
+        if kind == 'confirm':
+            request, price, accepted = args
+            if isinstance(self.pricing, AbstractPricingSomeMethod):
+                self.pricing.update_history({'price': price, 'acceptance': accepted})
+                self.depth_count[request.depth] = self.depth_count.get(request.depth, 0) + 1
+            booked = False
+            if accepted and request.booking_day == self.day:
+                # номера могли занять, пока клиент решал
+                vacant_rooms = self.hotel.is_vacant(request)
+                if len(vacant_rooms):
+                    self.hotel.booking(request, vacant_rooms, self.uid, price)
+                    self.uid += 1
+                    booked = True
+            self._resolve(future, booked)
+        elif kind == 'close_day':
+            self.hotel.cancel_request(self.day)
+            if isinstance(self.pricing, AbstractPricingSomeMethod):
+                self.pricing.update_queue(self.depth_count)
+            revenue = self.hotel.get_revenue(self.day)
+            self.day += 1
+            self.requests_today = 0
+            self.depth_count = {}
+            self._resolve(future, revenue)
+
+    def latency(self):
+        """
+        Статистика задержки решения
+        :return: словарь: число котировок, p50 и p99 задержки в мс, средний размер пачки
+        """
+        latencies = np.array(self.latencies) * 1000
+        return {
+            'quotes': len(latencies),
+            'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+            'mean_batch': float(np.mean(self.batch_sizes)) if self.batch_sizes else None,
+        }
@@ -0,0 +1,169 @@
+from collections import defaultdict
+
+import numpy as np
+
+from app.utils.acceptance_rule import AcceptanceRule
+from app.utils.event_generator import EventGenerator
+
+
+class ReplicaEngine:
+    """
+    Симуляция N независимых копий отеля одновременно.
+    Состояние -- тензор занятости [копия, день, номер] с uid заказов. День обрабатывается по шагам:
+    на шаге k каждая копия рассматривает свой k-й запрос дня, поэтому порядок запросов внутри копии
+    тот же, что в simulate(), а генерация, проверка мест, цена, решение клиента, бронирование
+    и отмены выполняются несколькими операциями NumPy сразу над всеми копиями.
+    Поддерживаются стратегии без обратной связи по истории продаж, у которых есть set_price_batch:
+    PricingDefault, PricingConstant, PricingRandom.
+    """
+
+    def __init__(
+            self,
+            pricing,
+            n_replicas,
+            number_of_rooms=15,
+            number_of_days=365,
+            nominal_price=1000,
+            mu=30,
+            rng=None
+    ):
+        """
+        Инициализация
+        :param pricing: стратегия ценообразования с методом set_price_batch(loads, depths)
+        :param n_replicas: число копий
+        :param number_of_rooms: число номеров
+        :param number_of_days: число дней для симуляции
+        :param nominal_price: номинальная цена
+        :param mu: интенсивность прибытия
+        :param rng: генератор случайных чисел numpy
+        """
+        self.pricing = pricing
+        self.n_replicas = n_replicas
+        self.number_of_rooms = number_of_rooms
+        self.number_of_days = number_of_days
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.event = EventGenerator(mu=mu, rng=self.rng)
+        self.acceptance = AcceptanceRule(nominal_price=nominal_price, rng=self.rng)
+
+        # окно заказа: LoS ночей и день выезда, как срез [start_day, end_day] в Hotel
+        self.window = int(self.event.LoS_values.max()) + 1
+        padding = int(self.event.depth_values.max()) + self.window
+        self.state = np.zeros([n_replicas, number_of_days + padding, number_of_rooms], dtype=np.int32)
+        self.free_rooms = np.full([n_replicas, number_of_days + padding], number_of_rooms)
+        self.revenue = np.zeros([n_replicas, number_of_days + padding])
+        self.cancel_days = defaultdict(list)
+        self.uid = 1
+
+    def _window(self, start_day, end_day):
+        """
+        Дни заказов внутри горизонта
+        :param start_day: дни заезда
+        :param end_day: последние занятые дни
+        :return: матрица дней [заказ, день окна] и маска дней, попадающих в заказ и горизонт
+        """
+        days = start_day[:, None] + np.arange(self.window)
+        valid = (days <= end_day[:, None]) & (days < self.number_of_days)
+        return days, valid
+
+    def _step(self, replica, day, LoS, persons, depth, cancellation):
+        """
+        Обработка очередного запроса в каждой из копий
+        :param replica: номера копий, у которых есть запрос на этом шаге
+        :param day: текущий день
+        :param LoS: продолжительность заказов
+        :param persons: число гостей
+        :param depth: глубина бронирования
+        :param cancellation: глубина отмены, -1 -- без отмены
+        :return: None
+        """
+        start_day = day + depth
+        end_day = start_day + LoS
+        days, valid = self._window(start_day, end_day)
+
+        # проверяем, есть ли места
+        busy = (self.state[replica[:, None], days] != 0) & valid[:, :, None]
+        room_free = ~busy.any(axis=1)
+        vacant = room_free.sum(axis=1) >= persons
+        if not vacant.any():
+            return
+        replica, start_day, end_day, persons, depth, cancellation, days, valid, room_free = (
+            x[vacant] for x in (replica, start_day, end_day, persons, depth, cancellation, days, valid, room_free)
+        )
+
+        # устанавливаем цену
+        in_horizon = start_day < self.number_of_days
+        loading = np.where(in_horizon, self.number_of_rooms - self.free_rooms[replica, start_day], 0)
+        price = self.pricing.set_price_batch(loading / self.number_of_rooms * 100, depth)
+
+        # проверяем, устраивает ли цена
+        accepted = self.acceptance.decision_batch(price).astype(bool)
+        uid = self.uid + np.arange(len(replica))
+        self.uid += len(replica)
+        if not accepted.any():
+            return
+        replica, start_day, end_day, persons, cancellation, days, valid, room_free, price, uid, in_horizon = (
+            x[accepted] for x in (
+                replica, start_day, end_day, persons, cancellation, days, valid, room_free, price, uid, in_horizon
+            )
+        )
+
+        # бронируем первые persons свободных номеров; на шаге у каждой копии не больше одного заказа,
+        # поэтому индексы (копия, день) не повторяются
+        rooms = room_free & (np.cumsum(room_free, axis=1) <= persons[:, None])
+        booking, window_day, room = np.nonzero(valid[:, :, None] & rooms[:, None, :])
+        self.state[replica[booking], days[booking, window_day], room] = uid[booking]
+        self.free_rooms[replica[:, None], days] -= np.where(valid, persons[:, None], 0)
+        self.revenue[replica[in_horizon], start_day[in_horizon]] += (price * persons)[in_horizon]
+
+        # регистрируем дату отмены
+        cancelled = cancellation >= 0
+        for cancel_day in np.unique(start_day[cancelled] - cancellation[cancelled]).tolist():
+            mask = cancelled & (start_day - cancellation == cancel_day)
+            self.cancel_days[cancel_day].append(
+                (replica[mask], uid[mask], start_day[mask], end_day[mask], persons[mask], price[mask])
+            )
+
+    def cancel_requests(self, day):
+        """
+        Отмена броней, назначенных на день day
+        :param day: день отмены
+        :return: None
+        """
+        for replica, uid, start_day, end_day, persons, price in self.cancel_days.pop(day, []):
+            days, valid = self._window(start_day, end_day)
+            booking, window_day, room = np.nonzero(self.state[replica[:, None], days] == uid[:, None, None])
+            self.state[replica[booking], days[booking, window_day], room] = 0
+
+            # у одной копии может быть несколько отмен на день, поэтому индексы копит np.add.at
+            np.add.at(self.free_rooms, (replica[:, None], days), np.where(valid, persons[:, None], 0))
+            in_horizon = start_day < self.number_of_days
+            np.subtract.at(
+                self.revenue, (replica[in_horizon], start_day[in_horizon]), (price * persons)[in_horizon]
+            )
+
+    def run(self):
+        """
+        Симуляция всех копий на весь горизонт
+        :return: выручки копий и доли свободных номеро-дней
+        """
+        for day in range(self.number_of_days):
+            # "дни" пачки -- номера копий, запросы каждой копии идут подряд
+            batch = self.event.generate_batch(self.n_replicas)
+            bounds = batch.day_bounds(0, self.n_replicas)
+            position = np.arange(len(batch)) - bounds[batch.day]
+            order = np.lexsort((batch.day, position))
+            steps = np.searchsorted(position[order], np.arange(position.max(initial=-1) + 2))
+            for k in range(len(steps) - 1):
+                rows = order[steps[k]: steps[k + 1]]
+                self._step(
+                    batch.day[rows], day, batch.LoS[rows], batch.persons[rows], batch.depth[rows],
+                    batch.cancellation[rows]
+                )
+
+            # удаляем отменённые заказы
+            self.cancel_requests(day)
+
+        # выручка за день поступает в день заезда, заезды за горизонтом не учитываются
+        total_revenue = self.revenue[:, :self.number_of_days].sum(axis=1)
+        free_share = self.free_rooms[:, :self.number_of_days].sum(axis=1) / self.number_of_rooms / self.number_of_days
+        return total_revenue, free_share
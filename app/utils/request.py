@@ -1,19 +1,24 @@
+import numpy as np
+
+
 class Request:
     """
     класс, описивающий свойства запроса на бронирование
     """
 
-    def __init__(self, LoS=None, persons=None, depth=None, cancellation=None):
+    def __init__(self, LoS=None, persons=None, depth=None, cancellation=None, acceptance_draw=None):
         """
         :param LoS: продолжительность заказа
         :param persons: число гостей
         :param depth: глубина бронирования
         :param cancellation: глубина отмены бронирования
+        :param acceptance_draw: заранее разыгранное равномерное число для решения клиента
         """
         self.LoS = LoS
         self.persons = persons
         self.depth = depth
         self.cancellation_day = cancellation
+        self.acceptance_draw = acceptance_draw
 
     def __repr__(self):
         return f"""
@@ -35,3 +40,70 @@ class Request:
 
         if self.cancellation_day is not None:
             self.cancellation_day = self.start_day - self.cancellation_day
+
+
+class RequestBatch:
+    """
+    Колоночное представление пачки запросов на бронирование.
+    Каждое поле -- массив NumPy одинаковой длины, отмена брони хранится как глубина отмены
+    (-1, если отмены нет).
+    """
+
+    def __init__(self, day, LoS, persons, depth, cancellation, acceptance_draw=None):
+        """
+        :param day: номер дня, в который приходит запрос
+        :param LoS: продолжительность заказа
+        :param persons: число гостей
+        :param depth: глубина бронирования
+        :param cancellation: глубина отмены бронирования, -1 -- без отмены
+        :param acceptance_draw: заранее разыгранные равномерные числа для решений клиентов, None -- не разыграны
+        """
+        self.day = day
+        self.LoS = LoS
+        self.persons = persons
+        self.depth = depth
+        self.cancellation = cancellation
+        self.acceptance_draw = acceptance_draw
+
+    def __len__(self):
+        return len(self.day)
+
+    def __getitem__(self, item):
+        """
+        Срез пачки по маске или индексам
+        :param item: маска, срез или массив индексов
+        :return: экземпляр класса RequestBatch
+        """
+        return RequestBatch(
+            self.day[item], self.LoS[item], self.persons[item], self.depth[item], self.cancellation[item],
+            None if self.acceptance_draw is None else self.acceptance_draw[item]
+        )
+
+    def day_bounds(self, first_day, number_of_days):
+        """
+        Границы запросов каждого дня в пачке, упорядоченной по дню прихода
+        :param first_day: первый день пачки
+        :param number_of_days: число дней в пачке
+        :return: массив длины number_of_days + 1, запросы дня first_day + k лежат в [bounds[k], bounds[k + 1])
+        """
+        return np.searchsorted(self.day, np.arange(first_day, first_day + number_of_days + 1))
+
+    def to_requests(self):
+        """
+        Перевод пачки в список объектов Request
+        :return: список экземпляров класса Request
+        """
+        if self.acceptance_draw is None:
+            return [
+                Request(LoS, persons, depth, None if cancellation < 0 else cancellation)
+                for LoS, persons, depth, cancellation in zip(
+                    self.LoS.tolist(), self.persons.tolist(), self.depth.tolist(), self.cancellation.tolist()
+                )
+            ]
+        return [
+            Request(LoS, persons, depth, None if cancellation < 0 else cancellation, acceptance_draw)
+            for LoS, persons, depth, cancellation, acceptance_draw in zip(
+                self.LoS.tolist(), self.persons.tolist(), self.depth.tolist(), self.cancellation.tolist(),
+                self.acceptance_draw.tolist()
+            )
+        ]
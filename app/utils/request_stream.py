@@ -0,0 +1,158 @@
+import os
+
+import numpy as np
+
+from app.utils.request import RequestBatch
+
+# поле запроса -> столбец файла; день прихода -- номер дня или дата
+DEFAULT_COLUMNS = {
+    'day': 'day',
+    'LoS': 'LoS',
+    'persons': 'persons',
+    'depth': 'depth',
+    'cancellation': 'cancellation',
+}
+
+
+def read_chunks(path, columns, chunk_size=1_000_000):
+    """
+    Чтение файла запросов кусками
+    :param path: путь к .csv или .parquet
+    :param columns: список нужных столбцов
+    :param chunk_size: число строк в куске
+    :return: генератор pd.DataFrame
+    """
+    if os.path.splitext(path)[1] == '.parquet':
+        # pyarrow нужен только для parquet
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    import pandas as pd
+
+    with pd.read_csv(path, usecols=columns, chunksize=chunk_size) as reader:
+        yield from reader
+
+
+def to_batches(chunks, columns):
+    """
+    Перевод кусков файла в пачки запросов
+    :param chunks: генератор pd.DataFrame
+    :param columns: словарь поле запроса -> столбец, столбец отмены может быть None
+    :return: генератор экземпляров класса RequestBatch
+    """
+    import pandas as pd
+
+    origin = None
+    for chunk in chunks:
+        day = chunk[columns['day']]
+        if pd.api.types.is_integer_dtype(day.dtype):
+            day = day.to_numpy(np.int64)
+        else:
+            # даты переводятся в номера дней от первой даты файла
+            dates = pd.to_datetime(day).to_numpy().astype('datetime64[D]')
+            if origin is None:
+                origin = dates[0]
+            day = (dates - origin).astype(np.int64)
+
+        if columns.get('cancellation'):
+            cancellation = chunk[columns['cancellation']].fillna(-1).to_numpy(np.int64)
+        else:
+            cancellation = np.full(len(chunk), -1, dtype=np.int64)
+        yield RequestBatch(
+            day,
+            chunk[columns['LoS']].to_numpy(np.int64),
+            chunk[columns['persons']].to_numpy(np.int64),
+            chunk[columns['depth']].to_numpy(np.int64),
+            cancellation,
+        )
+
+
+def _concat(first, second):
+    """
+    Склейка двух пачек запросов
+    :return: экземпляр класса RequestBatch
+    """
+    return RequestBatch(*(
+        np.concatenate([getattr(first, name), getattr(second, name)])
+        for name in ('day', 'LoS', 'persons', 'depth', 'cancellation')
+    ))
+
+
+def group_by_day(batches):
+    """
+    Разбиение потока пачек по дням прихода. Последний день куска может продолжаться в следующем куске,
+    поэтому он переносится и склеивается со следующим
+    :param batches: генератор пачек, упорядоченных по дню прихода
+    :return: генератор экземпляров класса RequestBatch, по одному на день, в котором были запросы
+    """
+    tail = None
+    for batch in batches:
+        if tail is not None:
+            batch = _concat(tail, batch)
+        steps = np.diff(batch.day)
+        if (steps < 0).any():
+            raise ValueError('файл запросов должен быть упорядочен по дню прихода')
+        starts = [0] + (np.flatnonzero(steps) + 1).tolist()
+        for begin, end in zip(starts[:-1], starts[1:]):
+            yield batch[begin: end]
+        tail = batch[starts[-1]:]
+    if tail is not None and len(tail):
+        yield tail
+
+
+class RequestStream:
+    """
+    Источник запросов из исторического журнала (.csv или .parquet), слишком большого, чтобы читать его целиком.
+    Файл читается кусками по chunk_size строк и разбивается по дням прихода конвейером генераторов,
+    в памяти одновременно лежит один кусок. Повторяет интерфейс EventGenerator.generate_requests:
+    каждый вызов возвращает запросы следующего дня (пустой список для дней без запросов и после конца файла).
+    Решения клиентов в журнале нет, поэтому acceptance_draw у запросов не задан.
+    """
+
+    def __init__(self, path, columns=None, chunk_size=1_000_000, first_day=None):
+        """
+        Инициализация
+        :param path: путь к .csv или .parquet, строки упорядочены по дню прихода
+        :param columns: словарь поле запроса -> столбец файла поверх DEFAULT_COLUMNS;
+            'cancellation': None -- в файле нет отмен
+        :param chunk_size: число строк в куске
+        :param first_day: день файла, соответствующий первому дню симуляции, по умолчанию первый день файла
+        """
+        self.path = path
+        self.columns = dict(DEFAULT_COLUMNS, **(columns or {}))
+        self.chunk_size = chunk_size
+        self.first_day = first_day
+        self._days = self.days()
+
+    def days(self):
+        """
+        Пачки запросов по дням подряд, начиная с first_day
+        :return: генератор экземпляров класса RequestBatch
+        """
+        chunks = read_chunks(self.path, [column for column in self.columns.values() if column], self.chunk_size)
+        empty = np.empty(0, dtype=np.int64)
+        day = self.first_day
+        for batch in group_by_day(to_batches(chunks, self.columns)):
+            batch_day = int(batch.day[0])
+            if day is None:
+                day = batch_day
+            if batch_day < day:
+                continue
+            while day < batch_day:
+                yield RequestBatch(empty, empty, empty, empty, empty)
+                day += 1
+            yield batch
+            day += 1
+
+    def generate_requests(self):
+        """
+        Запросы на бронирование очередного дня
+        :return: список экземпляров класса Request
+        """
+        batch = next(self._days, None)
+        if batch is None:
+            return []
+        return batch.to_requests()
@@ -0,0 +1,149 @@
+import os
+
+import numpy as np
+
+from app.utils.event_generator import EventGenerator
+from app.utils.request import Request
+
+TRACE_DTYPE = np.dtype([
+    ('trace', '<i4'),
+    ('day', '<i2'),
+    ('LoS', 'i1'),
+    ('persons', 'i1'),
+    ('depth', 'i1'),
+    ('cancellation', 'i1'),
+    ('acceptance_draw', '<f4'),
+])
+
+REQUESTS_FILE = 'requests.npy'
+OFFSETS_FILE = 'offsets.npy'
+
+
+class RequestTrace:
+    """
+    Набор заранее сгенерированных годовых трасс запросов.
+    Трассы хранятся в каталоге: requests.npy -- записи всех трасс подряд (по трассе, затем по дню),
+    offsets.npy -- границы дней каждой трассы. Записи открываются через np.memmap только на чтение,
+    поэтому один и тот же файл можно использовать из нескольких процессов.
+    """
+
+    def __init__(self, path):
+        """
+        Инициализация
+        :param path: каталог с трассами
+        """
+        self.path = path
+        self.records = np.load(os.path.join(path, REQUESTS_FILE), mmap_mode='r')
+        self.offsets = np.load(os.path.join(path, OFFSETS_FILE))
+        self.number_of_days = self.offsets.shape[1] - 1
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @classmethod
+    def generate(cls, path, n_traces, number_of_days=365, mu=30, seed=None):
+        """
+        Генерация трасс и запись их на диск
+        :param path: каталог для трасс
+        :param n_traces: число трасс
+        :param number_of_days: число дней в трассе
+        :param mu: интенсивность прибытия
+        :param seed: зерно генератора случайных чисел
+        :return: экземпляр класса RequestTrace
+        """
+        os.makedirs(path, exist_ok=True)
+        offsets = np.zeros([n_traces, number_of_days + 1], dtype=np.int64)
+        raw_path = os.path.join(path, REQUESTS_FILE + '.tmp')
+
+        # пишем записи потоком во временный файл, т.к. общее число запросов заранее неизвестно
+        total = 0
+        with open(raw_path, 'wb') as f:
+            for k, seed_sequence in enumerate(np.random.SeedSequence(seed).spawn(n_traces)):
+                rng = np.random.default_rng(seed_sequence)
+                batch = EventGenerator(mu=mu, rng=rng).generate_batch(number_of_days)
+                records = np.empty(len(batch), dtype=TRACE_DTYPE)
+                records['trace'] = k
+                records['day'] = batch.day
+                records['LoS'] = batch.LoS
+                records['persons'] = batch.persons
+                records['depth'] = batch.depth
+                records['cancellation'] = batch.cancellation
+                records['acceptance_draw'] = rng.random(len(batch))
+                f.write(records.tobytes())
+
+                offsets[k] = total + batch.day_bounds(0, number_of_days)
+                total += len(batch)
+
+        raw = np.memmap(raw_path, dtype=TRACE_DTYPE, mode='r', shape=(total,))
+        out = np.lib.format.open_memmap(
+            os.path.join(path, REQUESTS_FILE), mode='w+', dtype=TRACE_DTYPE, shape=(total,)
+        )
+        out[:] = raw
+        out.flush()
+        del raw, out
+        os.remove(raw_path)
+
+        np.save(os.path.join(path, OFFSETS_FILE), offsets)
+        return cls(path)
+
+    def replay(self, trace):
+        """
+        Источник запросов, воспроизводящий одну трассу
+        :param trace: номер трассы
+        :return: экземпляр класса TraceReplay
+        """
+        # повтор трассы -- не независимое повторение, разброс выручки по таким повторениям занижен
+        if not 0 <= trace < len(self):
+            raise ValueError(f'трассы {trace} нет, в каталоге {self.path} трасс: {len(self)}')
+        return TraceReplay(self.records, self.offsets[trace])
+
+    def check(self, replications, number_of_days):
+        """
+        Проверка, что трасс хватает на все повторения, а дней -- на весь горизонт симуляции
+        :param replications: номера повторений, повторение k воспроизводит трассу k
+        :param number_of_days: число дней симуляции
+        :return: None
+        """
+        if len(replications) and max(replications) >= len(self):
+            raise ValueError(
+                f'в каталоге {self.path} трасс: {len(self)}, а нужно не меньше {max(replications) + 1}'
+            )
+        if number_of_days > self.number_of_days:
+            raise ValueError(
+                f'трассы в каталоге {self.path} на {self.number_of_days} дней, а симуляция на {number_of_days}'
+            )
+
+
+class TraceReplay:
+    """
+    Воспроизведение одной трассы. Повторяет интерфейс EventGenerator.generate_requests:
+    каждый вызов возвращает запросы следующего дня.
+    """
+
+    def __init__(self, records, bounds):
+        """
+        Инициализация
+        :param records: записи трасс
+        :param bounds: границы дней воспроизводимой трассы
+        """
+        self.records = records
+        self.bounds = bounds
+        self.day = 0
+
+    def generate_requests(self):
+        """
+        Запросы на бронирование очередного дня трассы
+        :return: список экземпляров класса Request
+        """
+        if self.day >= len(self.bounds) - 1:
+            raise ValueError(f'трасса закончилась: в ней {len(self.bounds) - 1} дней')
+
+        records = self.records[self.bounds[self.day]: self.bounds[self.day + 1]]
+        self.day += 1
+        return [
+            Request(LoS, persons, depth, None if cancellation < 0 else cancellation, acceptance_draw)
+            for LoS, persons, depth, cancellation, acceptance_draw in zip(
+                records['LoS'].tolist(), records['persons'].tolist(), records['depth'].tolist(),
+                records['cancellation'].tolist(), records['acceptance_draw'].tolist()
+            )
+        ]
@@ -0,0 +1,182 @@
+from functools import lru_cache
+import hashlib
+import json
+import numbers
+import os
+import sqlite3
+
+APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# поля конфигурации с путями к входным файлам, к ним добавляется хеш содержимого
+PATH_FIELDS = ('price_table', 'trace', 'trace_path', 'warm_start')
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """
+    Версия кода: хеш содержимого всех модулей app/**/*.py, включая еще не добавленные в git.
+    Изменения документации и тестов вне app ключ не меняют
+    :return: строка
+    """
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(APP):
+        dirs[:] = sorted(name for name in dirs if name != '__pycache__')
+        for name in sorted(files):
+            if name.endswith('.py'):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, APP).encode())
+                digest.update(content_hash(file_path).encode())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _file_hash(path, size, mtime):
+    """
+    Хеш содержимого файла; размер и время изменения входят в ключ кеша, чтобы измененный файл хешировался заново
+    :return: sha256 содержимого
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_hash(path):
+    """
+    Хеш содержимого файла или всех файлов каталога
+    :param path: путь к файлу или каталогу
+    :return: sha256
+    """
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return _file_hash(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).encode())
+            digest.update(content_hash(file_path).encode())
+    return digest.hexdigest()
+
+
+def _canonical(value, path=False):
+    """
+    Каноническое значение для ключа: числа приводятся к одному виду (2 и 2.0 совпадают),
+    к пути существующего файла или каталога из полей PATH_FIELDS добавляется хеш его содержимого
+    :param value: значение конфигурации
+    :param path: является ли значение путем к входному файлу
+    :return: значение, сериализуемое в json
+    """
+    if isinstance(value, dict):
+        return {str(key): _canonical(item, key in PATH_FIELDS) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item, path) for item in value]
+    if isinstance(value, (bool, type(None))):
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        value = float(value)
+        return int(value) if value.is_integer() else value
+    if path and isinstance(value, (str, os.PathLike)) and os.path.exists(value):
+        return {'path': os.fspath(value), 'content': content_hash(value)}
+    return str(value)
+
+
+def config_key(config):
+    """
+    Ключ конфигурации: каноническая конфигурация и версия кода
+    :param config: словарь конфигурации
+    :return: словарь, сериализуемый в json
+    """
+    return {'config': _canonical(config), 'code': code_version()}
+
+
+def config_hash(config):
+    """
+    Хеш полной конфигурации эксперимента вместе с версией кода и содержимым входных файлов
+    :param config: словарь конфигурации
+    :return: sha256 канонического json
+    """
+    return hashlib.sha256(json.dumps(config_key(config), sort_keys=True).encode()).hexdigest()
+
+
+class ResultStore:
+    """
+    Локальное хранилище результатов повторений в SQLite.
+    Строки повторений (выручка, доля свободных номеров) лежат под хешем полной конфигурации, версии кода
+    и содержимого входных файлов, поэтому повторный или расширенный запуск досчитывает только недостающие
+    повторения, а после изменения кода или файлов все считается заново.
+    База работает в режиме WAL с ожиданием блокировки, запись -- INSERT OR IGNORE,
+    поэтому в одну базу могут одновременно писать много процессов.
+    """
+
+    def __init__(self, path, timeout=60):
+        """
+        Инициализация
+        :param path: путь к файлу базы
+        :param timeout: сколько секунд ждать освобождения блокировки
+        """
+        self.path = path
+        self.timeout = timeout
+        self._connection = None
+
+    def __getstate__(self):
+        # соединение не переживает передачу в другой процесс, там оно откроется заново
+        return {'path': self.path, 'timeout': self.timeout, '_connection': None}
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=self.timeout)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            with self._connection:
+                self._connection.execute(
+                    'CREATE TABLE IF NOT EXISTS configs (config_hash TEXT PRIMARY KEY, config TEXT NOT NULL)'
+                )
+                self._connection.execute(
+                    'CREATE TABLE IF NOT EXISTS replications ('
+                    'config_hash TEXT NOT NULL, replication INTEGER NOT NULL, '
+                    'revenue REAL NOT NULL, hotel_state REAL NOT NULL, '
+                    'PRIMARY KEY (config_hash, replication))'
+                )
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def load(self, config):
+        """
+        Сохраненные повторения конфигурации
+        :param config: конфигурация
+        :return: словарь {номер повторения: (выручка, доля свободных номеров)}
+        """
+        rows = self.connection.execute(
+            'SELECT replication, revenue, hotel_state FROM replications WHERE config_hash = ?',
+            (config_hash(config),)
+        )
+        return {replication: (revenue, hotel_state) for replication, revenue, hotel_state in rows}
+
+    def save(self, config, rows):
+        """
+        Сохранение повторений конфигурации
+        :param config: конфигурация
+        :param rows: список (номер повторения, выручка, доля свободных номеров)
+        :return: None
+        """
+        key = config_hash(config)
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR IGNORE INTO configs VALUES (?, ?)', (key, json.dumps(config_key(config), sort_keys=True))
+            )
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO replications VALUES (?, ?, ?, ?)',
+                [
+                    (key, int(replication), float(revenue), float(hotel_state))
+                    for replication, revenue, hotel_state in rows
+                ]
+            )
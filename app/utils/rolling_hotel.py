@@ -0,0 +1,154 @@
+import numpy as np
+
+from app.utils.hotel import Hotel
+
+
+class RollingHotel(Hotel):
+    """
+    Отель со скользящим горизонтом: занятость хранится в кольцевом буфере [номер, window] дней,
+    день d лежит в столбце d % window. Окно покрывает самую дальнюю бронь (глубина + продолжительность),
+    поэтому горизонта симуляции нет: брони не обрезаются, загрузка за "концом" считается честно,
+    а память не растет с числом дней. День уходит из буфера в конце дня, при get_revenue(day),
+    когда ни новых броней, ни отмен на него уже не бывает; свободные номеро-дни ушедших дней копятся
+    для get_free_share.
+    Запрос, который заканчивается за пределами окна, не бронируется: is_vacant возвращает пустой список,
+    а счетчик rejected растет. Окно под модель спроса задает for_event.
+    """
+
+    def __init__(self, number_of_rooms=15, max_depth=30, max_LoS=8, margin=2):
+        """
+        Инициализация
+        :param number_of_rooms: число номеров
+        :param max_depth: максимальная глубина бронирования
+        :param max_LoS: максимальная продолжительность заказа
+        :param margin: запас окна в днях
+        """
+        # заказ занимает дни start_day..start_day + LoS включительно
+        self.window = max_depth + max_LoS + 1 + margin
+        super().__init__(number_of_rooms=number_of_rooms, number_of_days=self.window)
+        self.number_of_days = None
+        self.current_day = 0
+        self.free_room_days = 0
+        self.retired_days = 0
+        self.rejected = 0
+
+    @classmethod
+    def for_event(cls, event, number_of_rooms=15, margin=2):
+        """
+        Отель с окном под источник запросов: максимальные глубина и продолжительность берутся из таблиц
+        EventGenerator. У источников без таблиц (RequestStream, трассы) окно по умолчанию, а запросы за окном
+        отклоняются
+        :param event: источник запросов
+        :param number_of_rooms: число номеров
+        :param margin: запас окна в днях
+        :return: экземпляр класса RollingHotel
+        """
+        if not hasattr(event, 'depth_values') or not hasattr(event, 'LoS_values'):
+            return cls(number_of_rooms=number_of_rooms, margin=margin)
+        return cls(
+            number_of_rooms=number_of_rooms,
+            max_depth=int(np.max(event.depth_values)),
+            max_LoS=int(np.max(event.LoS_values)),
+            margin=margin,
+        )
+
+    def in_window(self, request):
+        """
+        Помещается ли запрос в окно
+        :param request: заполненный запрос
+        :return: да или нет
+        """
+        return request.end_day - self.current_day < self.window
+
+    def is_vacant(self, request):
+        """
+        Проверка, есть ли свободные места для данного запроса; запрос за пределами окна отклоняется
+        :param request: запрос
+        :return: номера свободных комнат
+        """
+        if not self.in_window(request):
+            self.rejected += 1
+            return []
+        return super().is_vacant(request)
+
+    def _days(self, start_day, end_day):
+        """
+        Индекс дней [start_day, end_day] в кольцевом буфере
+        :param start_day: первый день
+        :param end_day: последний день
+        :return: срез или массив столбцов, если дни переходят через конец буфера
+        """
+        if end_day - self.current_day >= self.window:
+            raise ValueError(f'день {end_day} за пределами скользящего окна в {self.window} дней')
+        first = start_day % self.window
+        last = first + end_day - start_day
+        if last < self.window:
+            return slice(first, last + 1)
+        return np.arange(first, last + 1) % self.window
+
+    def get_loading(self, days):
+        """
+        Загрузка отеля
+        :param days: интересующий день
+        :return: число занятых номеров
+        """
+        if days - self.current_day >= self.window:
+            # за окном броней нет
+            return 0
+        return self.number_of_rooms - self.free_rooms[days % self.window]
+
+    def retire(self, day):
+        """
+        Убрать из буфера все дни до day включительно
+        :param day: последний завершившийся день
+        :return: None
+        """
+        while self.current_day <= day:
+            column = self.current_day % self.window
+            self.free_room_days += int(self.free_rooms[column])
+            self.retired_days += 1
+            self.state[:, column] = 0
+            self.free_rooms[column] = self.number_of_rooms
+            self.current_day += 1
+
+    def get_revenue(self, day):
+        """
+        Получаем выручку за указанный день и закрываем его
+        :param day: интересующий день
+        :return: выручка
+        """
+        revenue = super().get_revenue(day)
+        self.retire(day)
+        return revenue
+
+    def snapshot(self):
+        """
+        Состояние отеля для сохранения, вместе с положением окна
+        :return: словарь массивов
+        """
+        return dict(
+            super().snapshot(),
+            current_day=self.current_day,
+            free_room_days=self.free_room_days,
+            retired_days=self.retired_days,
+        )
+
+    def restore(self, snapshot):
+        """
+        Восстановление отеля из snapshot
+        :param snapshot: словарь из snapshot()
+        :return: None
+        """
+        super().restore(snapshot)
+        self.current_day = int(snapshot['current_day'])
+        self.free_room_days = int(snapshot['free_room_days'])
+        self.retired_days = int(snapshot['retired_days'])
+
+    def get_free_share(self):
+        """
+        Доля свободных номеро-дней за завершившиеся дни, 1 -- если ни один день еще не завершился
+        :return: доля
+        """
+        if not self.retired_days:
+            return 1.0
+        return self.free_room_days / self.number_of_rooms / self.retired_days
@@ -0,0 +1,65 @@
+import numpy as np
+
+
+def flatten(tree, prefix=''):
+    """
+    Вложенный словарь в плоский с ключами через '/', как в файле .npz
+    :param tree: вложенный словарь массивов и чисел
+    :param prefix: префикс ключей
+    :return: словарь путь -> массив
+    """
+    flat = {}
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}/'))
+        else:
+            flat[f'{prefix}{key}'] = np.asarray(value)
+    return flat
+
+
+def unflatten(flat):
+    """
+    Плоский словарь с ключами через '/' во вложенный
+    :param flat: словарь путь -> массив
+    :return: вложенный словарь
+    """
+    tree = {}
+    for path, value in flat.items():
+        *parents, key = path.split('/')
+        node = tree
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[key] = value
+    return tree
+
+
+def save_snapshot(path, pricing, hotel=None):
+    """
+    Сохранение обученного состояния стратегии и, при необходимости, отеля в бинарный файл .npz
+    :param path: путь к файлу
+    :param pricing: стратегия PricingSomeMethod*
+    :param hotel: экземпляр класса Hotel или его наследника, None -- отель не сохраняется
+    :return: None
+    """
+    tree = {'pricing': pricing.snapshot()}
+    if hotel is not None:
+        tree['hotel'] = hotel.snapshot()
+    np.savez(path, **flatten(tree))
+
+
+def load_snapshot(path, pricing, hotel=None, threshold=True):
+    """
+    Теплый старт стратегии и, при необходимости, отеля из файла save_snapshot
+    :param path: путь к файлу
+    :param pricing: стратегия PricingSomeMethod* с той же сеткой цен и окном оценки спроса
+    :param hotel: отель того же размера, None -- отель не восстанавливается
+    :param threshold: брать ли порог стратегии из снимка
+    :return: None
+    """
+    with np.load(path) as data:
+        tree = unflatten(dict(data))
+    pricing.restore(tree['pricing'], threshold=threshold)
+    if hotel is not None:
+        if 'hotel' not in tree:
+            raise ValueError('в снимке нет состояния отеля')
+        hotel.restore(tree['hotel'])
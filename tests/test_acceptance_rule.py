@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from app.utils.acceptance_rule import AcceptanceRule
+
+PRICES = np.linspace(500, 1500, 41)
+
+
+def test_chance_matches_normal_survival_function():
+    rule = AcceptanceRule(nominal_price=1000, rho=3.0, prices=PRICES)
+    assert rule.rho == 3.0
+    expected = stats.norm.sf(3.0 * (PRICES / 1000 - 1))
+    assert np.allclose([rule.get_acceptance_chance(price) for price in PRICES.tolist()], expected)
+    assert rule.get_acceptance_chance(1000.0) == pytest.approx(0.5)
+
+
+def test_batch_matches_single_decisions():
+    rule = AcceptanceRule(nominal_price=1000)
+    rng = np.random.default_rng(0)
+    prices = rng.choice(PRICES, 200)
+    u = rng.random(200)
+    expected = [rule.decision(price, draw) for price, draw in zip(prices.tolist(), u.tolist())]
+    assert rule.decision_batch(prices, u).tolist() == expected
+
+
+def test_willingness_to_pay_matches_chance():
+    rule = AcceptanceRule(nominal_price=1000, rng=np.random.default_rng(1))
+    wtp = rule.willingness_to_pay(200000)
+    for price in (800.0, 1000.0, 1200.0):
+        assert np.mean(wtp > price) == pytest.approx(rule.get_acceptance_chance(price), abs=0.005)
@@ -0,0 +1,25 @@
+import pytest
+
+from app.benchmarks.macro import scaling_exponent
+from app.benchmarks.micro import MICRO_BENCHMARKS, micro_setup
+from app.benchmarks.timing import compare, load_baseline, measure, save_baseline
+
+
+@pytest.mark.parametrize('name', ['EventGenerator.generate_requests', 'Hotel.is_vacant', 'PricingDefault.set_price'])
+def test_micro_benchmark_runs(name):
+    stats = measure(micro_setup(name), repeat=1)
+    assert stats['ops'] > 0 and stats['per_op_us'] > 0
+    assert name in MICRO_BENCHMARKS
+
+
+def test_compare_flags_regressions(tmp_path):
+    path = str(tmp_path / 'baseline.json')
+    save_baseline(path, {'fast': {'per_op_us': 10.0}, 'slow': {'per_op_us': 10.0}})
+    results = {'fast': {'per_op_us': 11.0}, 'slow': {'per_op_us': 20.0}, 'new': {'per_op_us': 1.0}}
+    rows = compare(results, load_baseline(path), tolerance=0.25)
+    assert [(name, regressed) for name, _, _, _, regressed in rows] == [('fast', False), ('slow', True)]
+
+
+def test_scaling_exponent():
+    assert scaling_exponent([1, 2, 4, 8], [3, 6, 12, 24]) == pytest.approx(1)
+    assert scaling_exponent([1, 2, 4, 8], [1, 4, 16, 64]) == pytest.approx(2)
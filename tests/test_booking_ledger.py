@@ -0,0 +1,42 @@
+import numpy as np
+
+from app.utils.booking_ledger import BookingLedger
+
+
+def test_matches_dict_bookings():
+    # исходная схема: словарь броней и словарь отмен по дням
+    ledger = BookingLedger(capacity=4, room_slots=1)
+    bookings = {}
+    rng = np.random.default_rng(0)
+    uid = 1
+    max_size = 0
+    for day in range(1000):
+        for _ in range(rng.integers(0, 4)):
+            depth = int(rng.integers(0, 31))
+            persons = int(rng.integers(1, 4))
+            cancel_day = day + int(rng.integers(0, depth + 1)) if depth and rng.random() < 0.25 else None
+            price = float(rng.choice([500.0, 812.5, 1000.0]))
+            ledger.add(uid, list(range(persons)), day + depth, day + depth + 2, price, cancel_day)
+            bookings[uid] = (day + depth, persons, price, cancel_day)
+            uid += 1
+
+        cancelled = [id for id, (_, _, _, cancel_day) in bookings.items() if cancel_day == day]
+        assert [row[0] for row in ledger.cancel(day)] == cancelled
+        for id in cancelled:
+            del bookings[id]
+
+        revenue = sum(price * persons for start_day, persons, price, _ in bookings.values() if start_day == day)
+        assert ledger.revenue(day) == revenue
+        max_size = max(max_size, len(ledger))
+    # в журнале только действующие брони, память не растет с горизонтом
+    assert max_size < 200
+
+
+def test_snapshot_restore():
+    ledger = BookingLedger()
+    ledger.add(1, [0, 1, 2, 3, 4], 5, 7, 900.0, 3)
+    ledger.add(2, [5], 6, 6, 1000.0)
+    restored = BookingLedger(capacity=1, room_slots=1)
+    restored.restore(ledger.snapshot())
+    assert [row[0] for row in restored.cancel(3)] == [1]
+    assert restored.revenue(6) == 1000.0
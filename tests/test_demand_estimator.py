@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from app.utils.demand_estimator import DemandEstimator
+
+
+class QueueEstimator:
+    """
+    Исходная реализация: список последних window чисел запросов для каждой глубины
+    """
+
+    def __init__(self, window=7):
+        self.window = window
+        self.queue = {depth: [0] for depth in range(31)}
+
+    def update(self, counts):
+        for depth, count in counts.items():
+            if len(self.queue[depth]) == self.window:
+                self.queue[depth].pop(0)
+            self.queue[depth].append(count)
+
+    def query(self, depth):
+        return sum(sum(self.queue[x]) for x in range(depth + 1))
+
+
+def _days(seed, number_of_days=100, max_depth=30):
+    rng = np.random.default_rng(seed)
+    for _ in range(number_of_days):
+        depths = rng.choice(max_depth + 1, rng.integers(0, 10), replace=False)
+        yield {int(depth): int(rng.integers(1, 5)) for depth in depths}
+
+
+@pytest.mark.parametrize('window', [3, 7])
+def test_matches_queue_semantics(window):
+    estimator = DemandEstimator(window=window)
+    reference = QueueEstimator(window=window)
+    for counts in _days(window):
+        estimator.update(counts)
+        reference.update(counts)
+        assert [estimator.query(depth) for depth in range(31)] == [reference.query(depth) for depth in range(31)]
+
+
+def test_smoothing_is_scaled_to_window():
+    estimator = DemandEstimator(window=7, smoothing=0.5)
+    estimator.update({2: 4})
+    estimator.update({2: 4})
+    assert estimator.query(1) == 0
+    assert estimator.query(30) == pytest.approx(7 * 3)
+
+
+def test_grows_for_deep_requests():
+    estimator = DemandEstimator(window=7, max_depth=30)
+    estimator.update({45: 2, 3: 1})
+    assert estimator.max_depth == 45
+    assert estimator.query(30) == 1
+    assert estimator.query(60) == 3
+
+
+def test_snapshot_restore_continues_identically():
+    estimator = DemandEstimator(window=5)
+    days = list(_days(1, 40))
+    for counts in days[:20]:
+        estimator.update(counts)
+    restored = DemandEstimator(window=5)
+    restored.restore(estimator.snapshot())
+    for counts in days[20:]:
+        estimator.update(counts)
+        restored.update(counts)
+    assert [restored.query(depth) for depth in range(31)] == [estimator.query(depth) for depth in range(31)]
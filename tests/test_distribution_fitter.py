@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from app.utils.distribution_fitter import DistributionFitter
+from app.utils.event_generator import DEFAULT_DEPTH, DEFAULT_LOS, EventGenerator
+
+
+def _batch(number_of_days=2000, seed=0):
+    return EventGenerator(mu=30, rng=np.random.default_rng(seed)).generate_batch(number_of_days)
+
+
+def test_recovers_generator_distributions():
+    fitter = DistributionFitter()
+    fitter.update(_batch())
+    params = fitter.params()
+    assert abs(params['mu'] - 30) < 0.3
+    assert np.allclose(params['LoS_probs'][1:], DEFAULT_LOS[1], atol=0.005)
+    assert np.allclose(params['depth_probs'], DEFAULT_DEPTH[1], atol=0.005)
+    # заказы в день заезда не отменяются, остальные -- с вероятностью 0.25
+    assert params['cancellation_chance'][0] == 0
+    assert np.allclose(params['cancellation_chance'][1:], 0.25, atol=0.05)
+
+
+def test_merge_equals_single_pass():
+    batch = _batch(200)
+    whole = DistributionFitter()
+    whole.update(batch)
+    first, second = DistributionFitter(), DistributionFitter()
+    first.update(batch[batch.day >= 100])
+    second.update(batch[batch.day < 100])
+    first.merge(second)
+    for name, value in whole.params().items():
+        assert np.array_equal(first.params()[name], value)
+
+
+def test_file_fit_round_trips_to_generator(tmp_path):
+    batch = _batch(200)
+    pd.DataFrame({
+        'day': batch.day, 'LoS': batch.LoS, 'persons': batch.persons, 'depth': batch.depth,
+        'cancellation': np.where(batch.cancellation < 0, np.nan, batch.cancellation),
+    }).to_csv(tmp_path / 'log.csv', index=False)
+    fitter = DistributionFitter.from_file(str(tmp_path / 'log.csv'), chunk_size=500)
+    direct = DistributionFitter()
+    direct.update(batch)
+    assert np.array_equal(fitter.depth, direct.depth)
+    assert np.array_equal(fitter.day_counts, direct.day_counts)
+
+    fitter.save(str(tmp_path / 'params.npz'))
+    event = EventGenerator.load(str(tmp_path / 'params.npz'), rng=np.random.default_rng(1))
+    fitted = fitter.to_generator(rng=np.random.default_rng(1))
+    assert np.array_equal(event.generate_batch(10).LoS, fitted.generate_batch(10).LoS)
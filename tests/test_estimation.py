@@ -0,0 +1,37 @@
+import numpy as np
+
+from app.experiments.estimation import _run_estimation_replication
+from app.experiments.profile_simulation import simulate
+from app.utils.event_generator import DayStreamEventGenerator
+
+
+def test_antithetic_requests_aligned_by_day_and_position():
+    seed_sequence = np.random.SeedSequence(7, spawn_key=(0, 0))
+    plain = DayStreamEventGenerator(seed_sequence, mu=30, acceptance_draws=True)
+    mirrored = DayStreamEventGenerator(seed_sequence, antithetic=True, mu=30, acceptance_draws=True)
+    for _ in range(5):
+        a = plain.generate_batch()
+        b = mirrored.generate_batch()
+        # запрос k дня разыгрывается от u и 1 - u, даже если число запросов в днях разное
+        count = min(len(a.day), len(b.day))
+        assert np.allclose(a.acceptance_draw[:count] + b.acceptance_draw[:count], 1)
+
+
+def test_day_streams_do_not_depend_on_batch_size():
+    seed_sequence = np.random.SeedSequence(7, spawn_key=(0, 0))
+    whole = DayStreamEventGenerator(seed_sequence, mu=30).generate_batch(4)
+    by_day = DayStreamEventGenerator(seed_sequence, mu=30)
+    parts = [by_day.generate_batch(1, first_day=day) for day in range(4)]
+    assert np.array_equal(whole.LoS, np.concatenate([part.LoS for part in parts]))
+    assert np.array_equal(whole.day, np.concatenate([part.day for part in parts]))
+
+
+def test_antithetic_pairs_have_negative_request_correlation():
+    generated = []
+    for pair in range(20):
+        generated.append([
+            _run_estimation_replication(simulate, ('default',), {'number_of_days': 30}, 123, replication, True)[3]
+            for replication in (2 * pair, 2 * pair + 1)
+        ])
+    generated = np.array(generated)
+    assert np.corrcoef(generated[:, 0], generated[:, 1])[0, 1] < -0.5
@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from app.utils.event_generator import (
+    DEFAULT_LOS, EventGenerator, cancellation_depth_table, default_tables, poisson_table
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_batch_follows_default_distributions():
+    batch = EventGenerator(mu=30, rng=np.random.default_rng(0)).generate_batch(2000)
+    counts = np.bincount(batch.day, minlength=2000)
+    assert counts.mean() == pytest.approx(30, rel=0.01)
+    values, probs = DEFAULT_LOS
+    frequencies = np.array([np.mean(batch.LoS == value) for value in values])
+    assert np.allclose(frequencies, probs, atol=0.005)
+    # заказы в день заезда не отменяются, отмена не позже заезда
+    assert (batch.cancellation[batch.depth == 0] == -1).all()
+    assert (batch.cancellation <= batch.depth).all()
+
+
+def test_requests_are_a_view_of_the_batch():
+    batch = EventGenerator(mu=30, rng=np.random.default_rng(1)).generate_batch()
+    requests = EventGenerator(mu=30, rng=np.random.default_rng(1)).generate_requests()
+    assert [request.LoS for request in requests] == batch.LoS.tolist()
+    assert [request.depth for request in requests] == batch.depth.tolist()
+    assert [request.cancellation_day for request in requests] == [
+        None if cancellation < 0 else cancellation for cancellation in batch.cancellation.tolist()
+    ]
+
+
+def test_custom_request_number_is_used():
+    event = EventGenerator(rv_request_number=stats.randint(3, 4), rng=np.random.default_rng(2))
+    assert np.array_equal(np.bincount(event.generate_batch(10).day), np.full(10, 3))
+
+
+def test_fixed_seed_batch():
+    batch = EventGenerator(mu=5, rng=np.random.default_rng(3)).generate_batch(2)
+    assert batch.day.tolist() == [0, 0, 1, 1, 1]
+    assert batch.LoS.tolist() == [4, 2, 1, 2, 2]
+    assert batch.depth.tolist() == [3, 6, 12, 26, 1]
+    assert batch.cancellation.tolist() == [-1, -1, -1, 1, -1]
+
+
+@pytest.mark.parametrize('mu', [0.5, 5, 30, 300])
+def test_poisson_table_matches_scipy(mu):
+    values, cdf = poisson_table(mu)
+    assert np.allclose(cdf[:-1], stats.poisson.cdf(values[:-1], mu), rtol=0, atol=1e-12)
+
+
+def test_poisson_table_without_demand():
+    values, cdf = poisson_table(0)
+    assert values.tolist() == [0] and cdf.tolist() == [1.0]
+    assert EventGenerator(mu=0, rng=np.random.default_rng(0)).generate_batch(5).day.tolist() == []
+
+
+def test_cancellation_table_matches_scipy_distribution():
+    table = cancellation_depth_table()
+    for depth in (1, 7, 30):
+        i = np.arange(depth + 1)
+        alpha = np.log(0.6) / np.log(depth / (depth + 1))
+        y = ((depth + 1 - i) / (depth + 1)) ** alpha - ((depth - i) / (depth + 1)) ** alpha
+        rv = stats.rv_discrete(values=(i, y / y.sum()))
+        assert np.allclose(table[depth, :depth + 1], rv.cdf(i))
+
+
+def test_default_tables_are_shared_and_read_only():
+    assert default_tables() is default_tables()
+    values, cdf = default_tables()['LoS']
+    with pytest.raises(ValueError):
+        cdf[0] = 0
+
+
+def test_engine_path_imports_only_numpy():
+    code = (
+        'import sys, app.experiments.base_experiments, app.experiments.profile_simulation; '
+        'print("scipy" in sys.modules, "pandas" in sys.modules)'
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=ROOT)
+    assert result.stdout.split()[-2:] == ['False', 'False']
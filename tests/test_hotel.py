@@ -0,0 +1,29 @@
+import numpy as np
+
+from app.utils.event_generator import EventGenerator
+from app.utils.hotel import Hotel
+
+
+def _brute_vacant(hotel, request):
+    # исходная проверка: номера, свободные на все дни запроса, перебором по плотной матрице
+    nights = hotel.state[:, request.start_day: request.end_day + 1]
+    rooms = [room for room in range(hotel.number_of_rooms) if not nights[room].any()]
+    return rooms if len(rooms) >= request.persons else []
+
+
+def test_free_rooms_counter_matches_state():
+    hotel = Hotel(number_of_rooms=15, number_of_days=120)
+    event = EventGenerator(mu=30, rng=np.random.default_rng(0))
+    uid = 1
+    for day in range(120):
+        for request in event.generate_requests():
+            request.fill(day)
+            vacant_rooms = hotel.is_vacant(request)
+            assert list(vacant_rooms) == _brute_vacant(hotel, request)
+            if len(vacant_rooms) and uid % 2:
+                hotel.booking(request, vacant_rooms, uid, 1000)
+            uid += 1
+        hotel.cancel_request(day)
+        assert np.array_equal(hotel.free_rooms, (hotel.state == 0).sum(axis=0))
+        assert hotel.get_loading(day) == (hotel.state[:, day] != 0).sum()
+    assert hotel.get_loading(120) == 0
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from app.experiments.base_experiments import simulate
+from app.utils.event_generator import EventGenerator
+from app.utils.instrumentation import Instrumentation
+
+
+def test_instrumented_run_matches_plain_run():
+    total_revenue, _, hotel_state = simulate('default', rng=np.random.default_rng(0), number_of_days=60)
+    instrumentation = Instrumentation()
+    instrumented = simulate(
+        'default', rng=np.random.default_rng(0), number_of_days=60, instrumentation=instrumentation
+    )
+    assert instrumented[0] == total_revenue and instrumented[2] == hotel_state
+    report = instrumentation.report()
+    assert report['phases']['generate_requests']['calls'] == 60
+    assert report['phases']['get_revenue']['calls'] == 60
+    # собственное время фаз не больше полного
+    assert all(phase['self_s'] <= phase['inclusive_s'] + 1e-9 for phase in report['phases'].values())
+
+
+class FailingEvent(EventGenerator):
+    def generate_requests(self):
+        raise RuntimeError('источник запросов недоступен')
+
+
+def test_methods_are_restored_when_simulate_raises():
+    event = FailingEvent(mu=30, rng=np.random.default_rng(0))
+    with pytest.raises(RuntimeError):
+        simulate('default', event=event, number_of_days=5, instrumentation=Instrumentation())
+    assert 'generate_requests' not in vars(event)
+
+
+def test_unknown_capture_is_rejected():
+    with pytest.raises(ValueError):
+        Instrumentation(capture='trace')
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from app.experiments.base_experiments import simulate
+from app.utils.event_generator import EventGenerator
+from app.utils.interval_hotel import IntervalHotel
+
+
+def _fill(hotel, seed, number_of_days=120, mu=8):
+    # бронируем каждый запрос, для которого есть места, поэтому отели различаются только выбором номеров
+    event = EventGenerator(mu=mu, rng=np.random.default_rng(seed))
+    uid = 1
+    for day in range(number_of_days):
+        for request in event.generate_requests():
+            request.fill(day)
+            vacant_rooms = hotel.is_vacant(request)
+            if len(vacant_rooms):
+                hotel.booking(request, vacant_rooms, uid, 1000)
+            uid += 1
+        hotel.cancel_request(day)
+    return hotel
+
+
+def _free_gaps(state):
+    free = (state == 0).astype(int)
+    return int(sum(np.sum(np.diff(np.r_[0, row, 0]) == 1) for row in free))
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_first_fit_matches_hotel(seed):
+    total_revenue, _, hotel_state = simulate('default', rng=np.random.default_rng(seed), number_of_days=120)
+    interval_revenue, _, interval_state = simulate(
+        'default', rng=np.random.default_rng(seed), number_of_days=120, room_policy='first_fit'
+    )
+    assert interval_revenue == total_revenue
+    assert interval_state == hotel_state
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2, 3, 4])
+def test_best_fit_leaves_fewer_free_gaps(seed):
+    first_fit = _fill(IntervalHotel(15, 120, 'first_fit'), seed)
+    best_fit = _fill(IntervalHotel(15, 120, 'best_fit'), seed)
+    assert _free_gaps(best_fit.state) < _free_gaps(first_fit.state)
+
+
+def test_restore_rebuilds_index():
+    hotel = _fill(IntervalHotel(15, 120, 'best_fit'), 0, number_of_days=60)
+    restored = IntervalHotel(15, 120, 'best_fit')
+    restored.restore(hotel.snapshot())
+    assert np.array_equal(restored.state, hotel.state)
+    assert restored.busy == hotel.busy
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from app.experiments.portfolio import Portfolio, load_portfolio
+from app.experiments.profile_simulation import simulate
+from app.experiments.runner import replication_rng
+
+
+def test_load_portfolio_parses_numbers(tmp_path):
+    path = tmp_path / 'portfolio.csv'
+    path.write_text('name,number_of_rooms,mu,strategy\nsea,15.0,30,default\n,10,,PricingSomeMethodv2\n')
+    first, second = load_portfolio(str(path))
+    assert first['number_of_rooms'] == 15 and isinstance(first['number_of_rooms'], int)
+    assert first['mu'] == 30.0 and first['explore_count'] == 500
+    assert second['name'] == 'hotel_1' and second['mu'] == 30.0
+
+
+def test_load_portfolio_rejects_fractional_rooms(tmp_path):
+    path = tmp_path / 'portfolio.csv'
+    path.write_text('name,number_of_rooms\nsea,15.5\n')
+    with pytest.raises(ValueError, match='number_of_rooms'):
+        load_portfolio(str(path))
+
+
+def test_single_hotel_matches_simulate():
+    config = {
+        'name': 'sea', 'number_of_rooms': 10, 'mu': 20.0, 'nominal_price': 800.0,
+        'strategy': 'PricingSomeMethodv2', 'threshold': 2.0, 'explore_count': 500,
+    }
+    portfolio = Portfolio([config], workers=1, seed=3)
+    [row] = portfolio.run(number_of_days=60, progress=False)
+    total_revenue, _, free_share = simulate(
+        'PricingSomeMethodv2', number_of_days=60, number_of_rooms=10, nominal_price=800.0, mu=20.0,
+        rng=replication_rng(portfolio.entropy, 0)
+    )
+    assert row['revenue'] == total_revenue
+    assert row['free_share'] == pytest.approx(free_share)
+
+
+def test_result_does_not_depend_on_workers():
+    configs = [dict(config, name=f'hotel_{k}') for k, config in enumerate([
+        {'number_of_rooms': 10, 'mu': 20.0, 'nominal_price': 800.0, 'strategy': 'default',
+         'threshold': 2.0, 'explore_count': 500},
+    ] * 3)]
+    one = Portfolio(configs, workers=1, seed=3).run(number_of_days=60, progress=False)
+    two = Portfolio(configs, workers=2, seed=3).run(number_of_days=60, progress=False)
+    assert np.array_equal([row['revenue'] for row in one], [row['revenue'] for row in two])
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from app.utils.price_history import PriceHistory
+
+PRICES = np.linspace(500, 1500, 41)
+
+
+def _shows(seed, size=500):
+    rng = np.random.default_rng(seed)
+    return rng.choice(PRICES, size).tolist(), rng.integers(0, 2, size).tolist()
+
+
+def _recount(prices, acceptances):
+    counts = np.array([prices.count(price) for price in PRICES.tolist()], dtype=float)
+    accepted = np.array([
+        sum(acceptance for shown, acceptance in zip(prices, acceptances) if shown == price)
+        for price in PRICES.tolist()
+    ], dtype=float)
+    return counts, accepted
+
+
+def test_counts_match_log():
+    history = PriceHistory(PRICES, keep_log=True)
+    prices, acceptances = _shows(0)
+    for price, acceptance in zip(prices, acceptances):
+        history.add(price, acceptance)
+    counts, accepted = _recount(prices, acceptances)
+    assert np.array_equal(history.counts, counts)
+    assert np.array_equal(history.acceptances, accepted)
+    log = history.log.to_array()
+    assert log['price'].tolist() == prices and log['acceptance'].tolist() == acceptances
+
+
+def test_window_counts_only_last_shows():
+    history = PriceHistory(PRICES, window=100)
+    prices, acceptances = _shows(1)
+    for price, acceptance in zip(prices, acceptances):
+        history.add(price, acceptance)
+    counts, accepted = _recount(prices[-100:], acceptances[-100:])
+    assert np.array_equal(history.counts, counts)
+    assert np.array_equal(history.acceptances, accepted)
+
+
+def test_decay_forgets_old_shows():
+    history = PriceHistory(PRICES, decay=0.5)
+    history.add(PRICES[0], 1)
+    history.add(PRICES[1], 0)
+    assert history.counts[0] == 0.5 and history.acceptances[0] == 0.5
+    assert history.counts[1] == 1
+
+
+def test_window_and_decay_are_exclusive():
+    with pytest.raises(ValueError):
+        PriceHistory(PRICES, window=10, decay=0.9)
+
+
+def test_off_grid_price_is_rejected():
+    with pytest.raises(ValueError):
+        PriceHistory(PRICES).add(501.0, 1)
+
+
+def test_snapshot_restores_window():
+    history = PriceHistory(PRICES, window=50)
+    for price, acceptance in zip(*_shows(2, 120)):
+        history.add(price, acceptance)
+    restored = PriceHistory(PRICES, window=50)
+    restored.restore(history.snapshot())
+    for price, acceptance in zip(*_shows(3, 60)):
+        history.add(price, acceptance)
+        restored.add(price, acceptance)
+    assert np.array_equal(restored.counts, history.counts)
+    assert np.array_equal(restored.acceptances, history.acceptances)
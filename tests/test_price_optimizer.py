@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from app.experiments.base_experiments import simulate
+from app.utils.default_strategy import default_strategy
+from app.utils.event_generator import EventGenerator
+from app.utils.price_optimizer import PriceOptimizer
+from app.utils.price_table import PriceTable
+
+
+@pytest.fixture(scope='module')
+def optimizer():
+    optimizer = PriceOptimizer()
+    optimizer.solve()
+    return optimizer
+
+
+def test_strategy_covers_default_strategy_keys(optimizer):
+    strategy = optimizer.strategy()
+    assert set(strategy) == set(default_strategy)
+    assert all(0 <= discount <= 100 for discount in strategy.values())
+    # таблица без пропусков, PriceTable ее принимает
+    PriceTable.from_dict(strategy)
+
+
+def test_full_hotel_gets_rack_rate(optimizer):
+    assert optimizer.policy[-1].tolist() == [0] * optimizer.policy.shape[1]
+    assert all(optimizer.strategy()[(100, depth)] == 0 for depth in range(2, 31, 2))
+
+
+def test_value_monotonic(optimizer):
+    # занятый номер ценность не увеличивает, лишний день продаж -- не уменьшает
+    assert (np.diff(optimizer.values, axis=0) <= 1e-9).all()
+    assert (np.diff(optimizer.values, axis=1) >= -1e-9).all()
+    assert optimizer.values[-1].max() == 0
+    assert optimizer.expected_revenue() == pytest.approx(3970.9163441314945)
+
+
+def test_higher_demand_raises_revenue_and_lowers_discounts():
+    revenue, discount = [], []
+    for mu in (10, 30, 60):
+        optimizer = PriceOptimizer(event=EventGenerator(mu=mu))
+        discount.append(optimizer.solve().mean())
+        revenue.append(optimizer.expected_revenue())
+    assert revenue == sorted(revenue)
+    assert discount == sorted(discount, reverse=True)
+
+
+# выручка за 150 дней с найденной таблицей и с default_strategy при одних и тех же зернах
+@pytest.mark.parametrize('seed, optimal, default', [
+    (0, 669091.6666666666, 646650.0),
+    (1, 632366.6666666666, 625000.0),
+    (2, 660229.1666666665, 636950.0),
+])
+def test_solved_table_beats_default_strategy(optimizer, tmp_path, seed, optimal, default):
+    path = str(tmp_path / 'optimal_price_table.csv')
+    optimizer.price_table().save(path)
+    revenue, _, _ = simulate('default', number_of_days=150, rng=np.random.default_rng(seed), price_table=path)
+    baseline, _, _ = simulate('default', number_of_days=150, rng=np.random.default_rng(seed))
+    assert revenue == pytest.approx(optimal)
+    assert baseline == default
+    assert revenue > baseline
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from app.utils.default_strategy import default_strategy
+from app.utils.price_table import PriceTable
+from app.utils.pricing import ceil_to_base
+
+# загрузки, которые дает отель из 15 номеров, и все глубины по умолчанию
+LOADS = [rooms / 15 * 100 for rooms in range(16)]
+DEPTHS = list(range(31))
+
+
+def test_lookup_matches_dict_strategy():
+    table = PriceTable.from_dict(default_strategy)
+    for load in LOADS:
+        for depth in DEPTHS:
+            assert table.lookup(load, depth) == default_strategy[(ceil_to_base(load), ceil_to_base(depth))]
+
+
+def test_batch_matches_single_lookups():
+    table = PriceTable.from_dict(default_strategy)
+    loads, depths = np.meshgrid(LOADS, DEPTHS)
+    expected = [table.lookup(load, depth) for load, depth in zip(loads.ravel().tolist(), depths.ravel().tolist())]
+    assert table.lookup_batch(loads.ravel(), depths.ravel()).tolist() == expected
+
+
+def test_depth_beyond_last_bucket_is_clamped():
+    table = PriceTable.from_dict(default_strategy)
+    assert table.lookup(50, 45) == table.lookup(50, 30)
+    assert table.lookup_batch(np.array([50]), np.array([45])).tolist() == [table.lookup(50, 30)]
+
+
+@pytest.mark.parametrize('name', ['table.npy', 'table.csv'])
+def test_save_and_load(tmp_path, name):
+    table = PriceTable.from_dict(default_strategy)
+    path = str(tmp_path / name)
+    table.save(path)
+    assert np.array_equal(PriceTable.load(path).values[1:, 1:], table.values[1:, 1:])
+
+
+def test_table_with_gaps_is_rejected():
+    strategy = dict(default_strategy)
+    del strategy[(50, 10)]
+    with pytest.raises(ValueError):
+        PriceTable.from_dict(strategy)
@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from app.experiments.profile_simulation import simulate
+
+
+# выручка и доля свободных номеров при фиксированном зерне; ускорение стратегий не должно менять решения
+@pytest.mark.parametrize('pricing_method, revenue, free_share', [
+    ('default', 641350.0, 0.1568888888888889),
+    ('random', 478375.0, 0.14266666666666666),
+    ('PricingSomeMethod', 548550.0, 0.16933333333333334),
+    ('PricingSomeMethodv2', 548200.0, 0.14755555555555555),
+    ('PricingSomeMethodv3', 562150.0, 0.14622222222222223),
+    ('PricingSomeMethodv4', 572550.0, 0.16177777777777777),
+])
+def test_fixed_seed_revenue(pricing_method, revenue, free_share):
+    total_revenue, _, hotel_state = simulate(pricing_method, number_of_days=150, rng=np.random.default_rng(5))
+    assert total_revenue == revenue
+    assert hotel_state == pytest.approx(free_share)
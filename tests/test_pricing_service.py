@@ -0,0 +1,57 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.experiments.base_experiments import simulate
+from app.utils.acceptance_rule import AcceptanceRule
+from app.utils.event_generator import EventGenerator
+from app.utils.pricing import PricingDefault
+from app.utils.pricing_service import PricingService
+from app.utils.request import Request
+from app.utils.rolling_hotel import RollingHotel
+
+
+async def _sequential_run(seed, number_of_days):
+    # клиенты по одному, в порядке потока запросов -- как цикл simulate()
+    rng = np.random.default_rng(seed)
+    event = EventGenerator(mu=30, rng=rng)
+    acceptance = AcceptanceRule(nominal_price=1000, rng=rng)
+    service = PricingService(RollingHotel.for_event(event), PricingDefault(1000), batch_window=0)
+    total_revenue = 0
+    async with service:
+        for _ in range(number_of_days):
+            for request in event.generate_requests():
+                price, _, quoted = await service.quote(request)
+                if price is not None:
+                    await service.confirm(quoted, price, acceptance.decision(price, request.acceptance_draw))
+            total_revenue += await service.close_day()
+    return total_revenue
+
+
+def test_sequential_service_matches_simulate():
+    total_revenue, _, _ = simulate('default', rng=np.random.default_rng(4), number_of_days=60, rolling_horizon=True)
+    assert asyncio.run(_sequential_run(4, 60)) == total_revenue
+
+
+class BrokenPricing(PricingDefault):
+    def set_price_batch(self, loads, depths):
+        raise RuntimeError('стратегия недоступна')
+
+
+async def _broken_run():
+    service = PricingService(RollingHotel(), BrokenPricing(1000), batch_window=0)
+    request = Request(2, 1, 5, None)
+    async with service:
+        with pytest.raises(RuntimeError):
+            await service.quote(request)
+        # обработчик очереди жив: следующие операции выполняются
+        revenue = await service.close_day()
+    return request, revenue
+
+
+def test_strategy_error_reaches_client_and_service_survives():
+    request, revenue = asyncio.run(_broken_run())
+    assert revenue == 0
+    # запрос клиента не заполнялся
+    assert not hasattr(request, 'start_day')
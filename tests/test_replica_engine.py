@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from app.experiments.base_experiments import simulate, simulate_batch
+
+
+@pytest.mark.parametrize('pricing_method', ['default', 'constant', 'random'])
+@pytest.mark.parametrize('seed', [0, 1])
+def test_single_replica_matches_simulate(pricing_method, seed):
+    # одна копия тратит случайные числа в том же порядке, что simulate(), поэтому результат совпадает точно
+    total_revenue, _, hotel_state = simulate(pricing_method, rng=np.random.default_rng(seed), number_of_days=120)
+    revenues, hotel_states = simulate_batch(pricing_method, 1, rng=np.random.default_rng(seed), number_of_days=120)
+    assert revenues[0] == total_revenue
+    assert hotel_states[0] == pytest.approx(hotel_state)
+
+
+def test_fixed_seed_replicas():
+    revenues, hotel_states = simulate_batch('default', 4, rng=np.random.default_rng(11), number_of_days=120)
+    assert revenues.tolist() == [509000.0, 515750.0, 495600.0, 497950.0]
+    assert hotel_states == pytest.approx([0.13944444444444445, 0.14, 0.15833333333333333, 0.14777777777777779])
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.event_generator import EventGenerator
+from app.utils.request_stream import RequestStream
+
+
+def _write_log(path, number_of_days=20, dates=False):
+    batch = EventGenerator(mu=5, rng=np.random.default_rng(0)).generate_batch(number_of_days)
+    # дни без запросов должны остаться пустыми днями потока
+    keep = batch.day % 4 != 1
+    cancellation = batch.cancellation[keep]
+    frame = pd.DataFrame({
+        'day': batch.day[keep], 'LoS': batch.LoS[keep], 'persons': batch.persons[keep],
+        'depth': batch.depth[keep], 'cancellation': np.where(cancellation < 0, np.nan, cancellation),
+    })
+    if dates:
+        frame['day'] = (pd.Timestamp('2024-01-01') + pd.to_timedelta(frame['day'], unit='D')).dt.strftime('%Y-%m-%d')
+    frame.to_csv(path, index=False)
+    return batch, keep
+
+
+@pytest.mark.parametrize('chunk_size, dates', [(7, False), (1000, False), (5, True)])
+def test_stream_replays_log_by_day(tmp_path, chunk_size, dates):
+    path = str(tmp_path / 'requests.csv')
+    batch, keep = _write_log(path, dates=dates)
+    stream = RequestStream(path, chunk_size=chunk_size)
+    for day in range(20):
+        expected = batch[(batch.day == day) & keep]
+        requests = stream.generate_requests()
+        assert [request.LoS for request in requests] == expected.LoS.tolist()
+        assert [request.cancellation_day for request in requests] == [
+            None if cancellation < 0 else cancellation for cancellation in expected.cancellation.tolist()
+        ]
+    assert stream.generate_requests() == []
+
+
+def test_unsorted_log_is_rejected(tmp_path):
+    path = str(tmp_path / 'requests.csv')
+    frame = pd.DataFrame(
+        {'day': [1, 0], 'LoS': [1, 1], 'persons': [1, 1], 'depth': [0, 0], 'cancellation': [None, None]}
+    )
+    frame.to_csv(path, index=False)
+    with pytest.raises(ValueError):
+        RequestStream(path).generate_requests()
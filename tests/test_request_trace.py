@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from app.experiments.base_experiments import simulate
+from app.experiments.runner import Runner
+from app.utils.event_generator import EventGenerator
+from app.utils.request_trace import RequestTrace
+
+
+@pytest.fixture
+def trace(tmp_path):
+    return RequestTrace.generate(str(tmp_path), n_traces=3, number_of_days=20, seed=4)
+
+
+def test_replay_matches_generator(trace):
+    # трасса k -- это поток EventGenerator от k-го потомка SeedSequence(seed)
+    seed_sequence = np.random.SeedSequence(4).spawn(3)[1]
+    batch = EventGenerator(mu=30, rng=np.random.default_rng(seed_sequence)).generate_batch(20)
+    replay = trace.replay(1)
+    requests = [request for _ in range(20) for request in replay.generate_requests()]
+    assert [request.LoS for request in requests] == batch.LoS.tolist()
+    assert [request.depth for request in requests] == batch.depth.tolist()
+
+
+def test_replay_rejects_missing_trace(trace):
+    with pytest.raises(ValueError):
+        trace.replay(3)
+
+
+def test_exhausted_replay_raises(trace):
+    replay = trace.replay(0)
+    for _ in range(20):
+        replay.generate_requests()
+    with pytest.raises(ValueError):
+        replay.generate_requests()
+
+
+def test_runner_checks_trace_size(trace):
+    with Runner(workers=1, seed=1) as runner:
+        revenues, _ = runner.run(
+            simulate, 3, args=('constant',), kwargs={'number_of_days': 20}, trace_path=trace.path, progress=False
+        )
+        assert len(set(revenues.tolist())) == 3
+        with pytest.raises(ValueError):
+            runner.run(simulate, 6, args=('constant',), kwargs={'number_of_days': 20}, trace_path=trace.path)
+        with pytest.raises(ValueError):
+            runner.run(simulate, 3, args=('constant',), kwargs={'number_of_days': 30}, trace_path=trace.path)
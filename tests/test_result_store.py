@@ -0,0 +1,41 @@
+from app.utils import result_store
+from app.utils.result_store import ResultStore, config_hash
+
+
+def test_saved_replications_are_loaded(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.sqlite'))
+    config = {'simulate': 'base_experiments.simulate', 'pricing_method': 'default', 'mu': 30}
+    store.save(config, [(0, 510000.0, 0.15), (1, 505000.0, 0.16)])
+    # 30 и 30.0 -- одна конфигурация
+    assert store.load(dict(config, mu=30.0)) == {0: (510000.0, 0.15), 1: (505000.0, 0.16)}
+    assert store.load(dict(config, mu=31)) == {}
+    store.close()
+
+
+def test_only_path_fields_hash_content(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'default').write_text('a')
+    (tmp_path / 'table.csv').write_text('a')
+    config = {'pricing_method': 'default', 'price_table': 'table.csv'}
+    before = config_hash(config)
+    (tmp_path / 'default').write_text('bb')
+    assert config_hash(config) == before
+    (tmp_path / 'table.csv').write_text('bb')
+    assert config_hash(config) != before
+
+
+def test_code_version_covers_untracked_modules(tmp_path, monkeypatch):
+    (tmp_path / 'module.py').write_text('x = 1\n')
+    (tmp_path / 'README.md').write_text('docs\n')
+    monkeypatch.setattr(result_store, 'APP', str(tmp_path))
+    result_store.code_version.cache_clear()
+    before = result_store.code_version()
+
+    (tmp_path / 'README.md').write_text('other docs\n')
+    result_store.code_version.cache_clear()
+    assert result_store.code_version() == before
+
+    (tmp_path / 'new_module.py').write_text('y = 2\n')
+    result_store.code_version.cache_clear()
+    assert result_store.code_version() != before
+    result_store.code_version.cache_clear()
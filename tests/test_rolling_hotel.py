@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from app.experiments.base_experiments import simulate
+from app.utils.event_generator import EventGenerator
+from app.utils.hotel import Hotel
+from app.utils.rolling_hotel import RollingHotel
+
+
+def test_matches_hotel_inside_horizon():
+    # пока заказы не доходят до конца горизонта Hotel, оба отеля выдают одни и те же номера
+    number_of_days = 200
+    event = EventGenerator(mu=30, rng=np.random.default_rng(2))
+    hotel = Hotel(number_of_rooms=15, number_of_days=number_of_days)
+    rolling = RollingHotel.for_event(event, number_of_rooms=15)
+    uid = 1
+    for day in range(number_of_days - rolling.window):
+        for request in event.generate_requests():
+            request.fill(day)
+            vacant_rooms = hotel.is_vacant(request)
+            assert list(rolling.is_vacant(request)) == list(vacant_rooms)
+            if len(vacant_rooms) and uid % 3:
+                hotel.booking(request, vacant_rooms, uid, 1000)
+                rolling.booking(request, vacant_rooms, uid, 1000)
+            uid += 1
+        hotel.cancel_request(day)
+        rolling.cancel_request(day)
+        assert rolling.get_revenue(day) == hotel.get_revenue(day)
+        assert rolling.get_loading(day + 10) == hotel.get_loading(day + 10)
+
+
+def test_fixed_seed_revenue():
+    total_revenue, _, hotel_state = simulate(
+        'default', rng=np.random.default_rng(0), number_of_days=120, rolling_horizon=True
+    )
+    assert total_revenue == 510150.0
+    assert hotel_state == pytest.approx(0.1511111111111111)
+
+
+def test_free_share_before_first_day():
+    assert RollingHotel().get_free_share() == 1.0
+    assert simulate('default', rng=np.random.default_rng(0), number_of_days=0, rolling_horizon=True)[2] == 1.0
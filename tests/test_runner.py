@@ -0,0 +1,27 @@
+import numpy as np
+
+from app.experiments.base_experiments import simulate
+from app.experiments.runner import Runner, replication_streams
+
+
+def test_results_do_not_depend_on_workers_or_subset():
+    kwargs = {'number_of_days': 60}
+    with Runner(workers=1, seed=5) as runner:
+        revenues, hotel_states = runner.run(simulate, 4, args=('random',), kwargs=kwargs, progress=False)
+        subset, _ = runner.run(
+            simulate, 4, args=('random',), kwargs=kwargs, replications=[3, 1], progress=False
+        )
+    with Runner(workers=2, seed=5) as runner:
+        parallel, parallel_states = runner.run(simulate, 4, args=('random',), kwargs=kwargs, progress=False)
+    assert np.array_equal(revenues, parallel)
+    assert np.array_equal(hotel_states, parallel_states)
+    assert subset.tolist() == [revenues[3], revenues[1]]
+    assert len(set(revenues.tolist())) == 4
+
+
+def test_demand_stream_depends_only_on_replication():
+    demand, policy = replication_streams(5, 2)
+    other_demand, other_policy = replication_streams(5, 3, demand_replication=2)
+    assert np.array_equal(demand.random(10), other_demand.random(10))
+    assert not np.array_equal(policy.random(10), other_policy.random(10))
+
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from app.experiments.profile_simulation import simulate
+from app.utils.acceptance_rule import AcceptanceRule
+from app.utils.event_generator import EventGenerator
+from app.utils.hotel import Hotel
+from app.utils.pricing import PricingSomeMethodv3
+from app.utils.rolling_hotel import RollingHotel
+from app.utils.snapshot import flatten, load_snapshot, save_snapshot, unflatten
+
+
+def _run(pricing, hotel, seed, days, first_day=0):
+    """
+    Цикл new_algorithm_v2_experiments_iterates.simulate для готовых стратегии и отеля
+    :return: назначенные цены
+    """
+    rng = np.random.default_rng(seed)
+    event = EventGenerator(mu=30, rng=rng)
+    acceptance = AcceptanceRule(nominal_price=1000, rng=rng)
+    prices = []
+    uid = 1
+    for day in range(first_day, first_day + days):
+        acc_count = {}
+        for count, request in enumerate(event.generate_requests()):
+            request.fill(day)
+            vacant_rooms = hotel.is_vacant(request)
+            if len(vacant_rooms):
+                price = pricing.set_price(hotel, request, count)
+                accepted = acceptance.decision(price, request.acceptance_draw)
+                if accepted:
+                    hotel.booking(request, vacant_rooms, seed * 100000 + uid, price)
+                pricing.update_history({'price': price, 'acceptance': accepted})
+                acc_count[request.depth] = acc_count.get(request.depth, 0) + 1
+                prices.append(price)
+            uid += 1
+        hotel.cancel_request(day)
+        pricing.update_queue(acc_count)
+        hotel.get_revenue(day)
+    return prices
+
+
+def test_flatten_round_trip():
+    tree = {'pricing': {'threshold': 2.0, 'history': {'counts': np.arange(3)}}, 'hotel': {'state': np.eye(2)}}
+    flat = flatten(tree)
+    assert sorted(flat) == ['hotel/state', 'pricing/history/counts', 'pricing/threshold']
+    restored = unflatten(flat)
+    assert restored['pricing']['threshold'] == 2.0
+    assert restored['pricing']['history']['counts'].tolist() == [0, 1, 2]
+    assert restored['hotel']['state'].tolist() == np.eye(2).tolist()
+
+
+@pytest.mark.parametrize('history_window', [None, 200])
+@pytest.mark.parametrize('hotel_class', [Hotel, RollingHotel])
+def test_restored_state_continues_like_original(tmp_path, history_window, hotel_class):
+    # обученная стратегия и отель после 40 дней; восстановленные из файла должны продолжить так же, как исходные
+    original = PricingSomeMethodv3(1000, 2, explore_count=100, history_window=history_window)
+    hotel = hotel_class()
+    _run(original, hotel, seed=0, days=40)
+    path = str(tmp_path / 'snapshot.npz')
+    save_snapshot(path, original, hotel)
+
+    restored = PricingSomeMethodv3(1000, 3, explore_count=100, history_window=history_window)
+    restored_hotel = hotel_class()
+    load_snapshot(path, restored, restored_hotel)
+    assert restored.threshold == 2
+    assert restored_hotel.get_free_share() == hotel.get_free_share()
+
+    expected = _run(original, hotel, seed=1, days=40, first_day=40)
+    assert _run(restored, restored_hotel, seed=1, days=40, first_day=40) == expected
+    assert restored_hotel.state.tolist() == hotel.state.tolist()
+
+
+def test_threshold_can_be_kept(tmp_path):
+    pricing = PricingSomeMethodv3(1000, 2, explore_count=100)
+    path = str(tmp_path / 'snapshot.npz')
+    save_snapshot(path, pricing)
+    restored = PricingSomeMethodv3(1000, 3, explore_count=100)
+    load_snapshot(path, restored, threshold=False)
+    assert restored.threshold == 3
+
+
+def test_missing_hotel_raises(tmp_path):
+    path = str(tmp_path / 'snapshot.npz')
+    save_snapshot(path, PricingSomeMethodv3(1000, 2))
+    with pytest.raises(ValueError):
+        load_snapshot(path, PricingSomeMethodv3(1000, 2), Hotel())
+
+
+def test_mismatched_window_raises(tmp_path):
+    path = str(tmp_path / 'snapshot.npz')
+    save_snapshot(path, PricingSomeMethodv3(1000, 2, history_window=200))
+    with pytest.raises(ValueError):
+        load_snapshot(path, PricingSomeMethodv3(1000, 2, history_window=100))
+
+
+# теплый старт со снимка стратегии, обученной 60 дней при зерне 4, и холодный старт при тех же зернах
+@pytest.mark.parametrize('seed, warm, cold', [
+    (4, 244650.0, 206050.0),
+    (5, 263950.0, 249775.0),
+])
+def test_warm_start_revenue(tmp_path, seed, warm, cold):
+    kwargs = dict(explore_count=100, number_of_days=60)
+    _, pricing, _ = simulate('PricingSomeMethodv3', rng=np.random.default_rng(4), **kwargs)
+    path = str(tmp_path / 'snapshot.npz')
+    save_snapshot(path, pricing)
+    assert simulate('PricingSomeMethodv3', rng=np.random.default_rng(seed), warm_start=path, **kwargs)[0] == warm
+    assert simulate('PricingSomeMethodv3', rng=np.random.default_rng(seed), **kwargs)[0] == cold
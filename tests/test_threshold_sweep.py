@@ -0,0 +1,46 @@
+import numpy as np
+
+from app.experiments.threshold_sweep import ThresholdSweep
+
+
+class RecordingRunner:
+    """
+    Runner с заранее заданными выручками: выручка повторения k конфигурации -- mean + шум повторения k,
+    общий для всех конфигураций, как при общих случайных числах
+    """
+
+    def __init__(self, means):
+        self.means = means
+        self.calls = []
+
+    def run_sweep(self, simulate, points, iter_count, replications=None):
+        self.calls.append((tuple(config for config, _ in points), tuple(replications)))
+        noise = np.random.default_rng(0).normal(0, 1000, 1000)
+        return [
+            (np.array([self.means[config] + noise[k] for k in replications]), np.zeros(len(replications)))
+            for config, _ in points
+        ]
+
+
+CONFIGS = [('PricingSomeMethodv2', threshold, 500) for threshold in (1.0, 2.0, 3.0, 4.0)]
+
+
+def test_race_keeps_leader_and_drops_worse_configs():
+    means = dict(zip(CONFIGS, [100000, 100050, 90000, 80000]))
+    sweep = ThresholdSweep(RecordingRunner(means), CONFIGS, eta=2)
+    survivors = sweep.run(screen_days=30, screen_iter_count=4, iter_count=4, max_iter_count=16)
+    assert survivors[0] == CONFIGS[1]
+    assert CONFIGS[2] in sweep.eliminated and CONFIGS[3] in sweep.eliminated
+
+
+def test_replications_are_never_rerun():
+    means = dict(zip(CONFIGS, [100000, 100050, 90000, 80000]))
+    runner = RecordingRunner(means)
+    sweep = ThresholdSweep(runner, CONFIGS, eta=2)
+    sweep.run(screen_days=0, screen_iter_count=0, iter_count=4, max_iter_count=16)
+    seen = set()
+    for configs, replications in runner.calls:
+        for config in configs:
+            for replication in replications:
+                assert (config, replication) not in seen
+                seen.add((config, replication))